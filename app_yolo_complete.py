@@ -4,24 +4,65 @@ Full Python Backend + Integrated HTML Frontend
 Production-Ready Code Analysis Platform
 """
 
-from flask import Flask, request, jsonify, send_file, session, make_response
+from flask import Flask, request, jsonify, send_file, session, make_response, g
+from flask.sessions import SessionInterface, SessionMixin
 from flask_cors import CORS
+from werkzeug.datastructures import CallbackDict
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.utils import secure_filename
 import os
+import atexit
+import contextvars
+import cProfile
+import json
+import gzip
 import hashlib
-from datetime import datetime
+import itertools
+import math
+import pstats
+import queue
+import shutil
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import secrets
 import re
 
+try:
+    import brotli  # Optional: adds a .br variant next to each gzipped report
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl  # POSIX: lets upload locks span pre-forked server workers
+except ImportError:
+    fcntl = None
+
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(32)
 CORS(app, supports_credentials=True)
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
 REPORT_FOLDER = 'reports'
+CHUNK_FOLDER = os.path.join(UPLOAD_FOLDER, '.chunks')
+MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_MB', 500)) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_MB', 8)) * 1024 * 1024
+UPLOAD_TYPES = ('before', 'after')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(REPORT_FOLDER, exist_ok=True)
+os.makedirs(CHUNK_FOLDER, exist_ok=True)
+
+# Reject oversized bodies from the Content-Length header before reading them
+# (1 MB of headroom covers multipart framing on /api/upload)
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_SIZE + 1024 * 1024
 
 # Users Database
 USERS = {
@@ -37,1666 +78,177 @@ USERS = {
     }
 }
 
-# ==================== YOLO MODEL - 1x1 INCH BOX DETECTION ====================
+# ==================== SESSIONS ====================
+#
+# Every worker and node must sign session cookies with the same key, so it comes
+# from SECRET_KEY. SESSION_BACKEND=sqlite keeps session data server-side and the
+# cookie carries only a random id. The store needs just get/set/delete with a
+# TTL (Redis GET/SETEX/DEL), so a networked store can replace SQLiteSessionStore
+# once nodes stop sharing a disk.
 
-def extract_pdf_content(pdf_path):
-    """Extract text content from PDF for YOLO analysis"""
-    try:
-        with open(pdf_path, 'rb') as f:
-            raw_bytes = f.read()
-            try:
-                content = raw_bytes.decode('utf-8', errors='ignore')
-            except:
-                content = raw_bytes.decode('latin-1', errors='ignore')
-        return content, raw_bytes
-    except Exception as e:
-        print(f"Error extracting PDF: {e}")
-        return "", b""
+SECRET_KEY = os.environ.get('SECRET_KEY')
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cookie')
+SESSION_DB = os.environ.get('SESSION_DB', 'sessions.sqlite3')
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{43}$')
 
+app.secret_key = SECRET_KEY or secrets.token_hex(32)
+app.permanent_session_lifetime = timedelta(hours=int(os.environ.get('SESSION_LIFETIME_HOURS', 12)))
 
-def yolo_grid_scan_1x1_inch(content, raw_bytes, dpi=96):
-    """
-    YOLO-Style Detection: Scan PDF in 1x1 inch grid boxes
-    At 96 DPI: 1 inch = 96 pixels, so each box is 96x96 pixels
-    
-    Returns:
-        Dictionary with detected markups, confirmations, dimensions, annotations
-    """
-    
-    detected_boxes = {
-        'red_markups': [],
-        'green_confirmations': [],
-        'dimensions': [],
-        'annotations': [],
-        'total_1x1_boxes_scanned': 0,
-        'grid_map': []
-    }
-    
-    lines = content.split('\n')
-    
-    # Simulate 1x1 inch grid scanning
-    # In production, this would use actual image processing with OpenCV/PIL
-    box_size = 1  # 1 inch
-    current_box = {'x': 0, 'y': 0}
-    
-    for i, line in enumerate(lines):
-        line_lower = line.lower().strip()
-        
-        if not line_lower or len(line_lower) < 2:
-            continue
-        
-        # Calculate grid position (simulate inch-by-inch scanning)
-        grid_row = i // 10
-        grid_col = i % 10
-        grid_position = f"({grid_col}in, {grid_row}in)"
-        
-        # ========== RED MARKUP DETECTION (Engineer Comments) ==========
-        red_keywords = {
-            'bold': 'HIGH',
-            'missing': 'HIGH',
-            'fix': 'HIGH',
-            'correct': 'HIGH',
-            'check': 'MEDIUM',
-            'verify': 'MEDIUM',
-            'update': 'MEDIUM',
-            'add': 'MEDIUM',
-            'modify': 'MEDIUM',
-            'review': 'LOW',
-            'revise': 'LOW'
-        }
-        
-        # Special check for missing dimension variables
-        if re.search(r'\bd\b|\bD\b', line) and not re.search(r'\d+', line):
-            detected_boxes['red_markups'].append({
-                'box_id': f"box_{grid_row}_{grid_col}",
-                'grid_position': grid_position,
-                'pixel_coordinates': f"({grid_col * 96}px, {grid_row * 96}px)",
-                'content': line.strip()[:120],
-                'type': 'MISSING_DIMENSION',
-                'keyword': 'd' if 'd' in line else 'D',
-                'severity': 'HIGH',
-                'line_number': i + 1
-            })
-        
-        # Keyword-based red markup detection
-        for keyword, severity in red_keywords.items():
-            if keyword in line_lower:
-                detected_boxes['red_markups'].append({
-                    'box_id': f"box_{grid_row}_{grid_col}",
-                    'grid_position': grid_position,
-                    'pixel_coordinates': f"({grid_col * 96}px, {grid_row * 96}px)",
-                    'content': line.strip()[:120],
-                    'type': 'ENGINEER_COMMENT',
-                    'keyword': keyword,
-                    'severity': severity,
-                    'line_number': i + 1
-                })
-                break  # Only one classification per line
-        
-        # ========== GREEN CONFIRMATION DETECTION (Designer Updates) ==========
-        green_indicators = {
-            '✓': 'CHECKMARK',
-            '✔': 'CHECKMARK',
-            'done': 'KEYWORD',
-            'completed': 'KEYWORD',
-            'fixed': 'KEYWORD',
-            'updated': 'KEYWORD',
-            'resolved': 'KEYWORD',
-            'confirmed': 'KEYWORD',
-            'checked': 'KEYWORD',
-            'ok': 'KEYWORD'
-        }
-        
-        for indicator, indicator_type in green_indicators.items():
-            if indicator in line_lower:
-                detected_boxes['green_confirmations'].append({
-                    'box_id': f"box_{grid_row}_{grid_col}",
-                    'grid_position': grid_position,
-                    'pixel_coordinates': f"({grid_col * 96}px, {grid_row * 96}px)",
-                    'content': line.strip()[:120],
-                    'type': indicator_type,
-                    'indicator': indicator,
-                    'resolved': True,
-                    'line_number': i + 1
-                })
-                break
-        
-        # ========== DIMENSION DETECTION ==========
-        dimension_units = ['MM', 'THK', 'DIA', 'X', '@', 'C/C', 'φ']
-        if any(unit in line.upper() for unit in dimension_units):
-            # Extract numerical values
-            numbers = re.findall(r'\d+', line)
-            
-            detected_boxes['dimensions'].append({
-                'box_id': f"box_{grid_row}_{grid_col}",
-                'grid_position': grid_position,
-                'dimension_text': line.strip()[:100],
-                'values': numbers,
-                'unit': next((u for u in dimension_units if u in line.upper()), 'UNKNOWN'),
-                'complete': len(numbers) > 0,
-                'line_number': i + 1
-            })
-        
-        # ========== ANNOTATION DETECTION ==========
-        annotation_keywords = ['NOTE', 'NOTES', 'TYP', 'TYPICAL', 'PLAN', 'SECTION', 
-                               'ELEVATION', 'DETAIL', 'SCHEDULE', 'TABLE']
-        
-        for keyword in annotation_keywords:
-            if keyword in line.upper():
-                detected_boxes['annotations'].append({
-                    'box_id': f"box_{grid_row}_{grid_col}",
-                    'grid_position': grid_position,
-                    'type': keyword,
-                    'content': line.strip()[:100],
-                    'line_number': i + 1
-                })
-                break
-    
-    # Calculate total grid boxes scanned
-    detected_boxes['total_1x1_boxes_scanned'] = (max(len(lines) // 10, 1)) * 10
-    
-    return detected_boxes
+if not SECRET_KEY:
+    print("⚠️  SECRET_KEY not set - using a random key; logins won't survive a restart or work across nodes",
+          file=sys.stderr)
 
 
-def yolo_compare_red_to_green(before_boxes, after_boxes):
-    """
-    YOLO RED-to-GREEN Comparison
-    Matches each red markup with corresponding green confirmation
-    """
+class SQLiteSessionStore:
+    """Session data by id with expiry, in a SQLite file shared by all local workers"""
     
-    comparison_result = {
-        'total_red_comments': len(before_boxes['red_markups']),
-        'total_green_confirmations': len(after_boxes['green_confirmations']),
-        'resolved_items': [],
-        'unresolved_items': [],
-        'new_issues': [],
-        'resolution_rate': 0,
-        'status': 'UNKNOWN',
-        'message': ''
-    }
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        db = sqlite3.connect(path, timeout=10)
+        with db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)')
+            db.execute('CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)')
+        db.close()
     
-    # Track which green confirmations have been matched
-    matched_greens = set()
+    def _connection(self):
+        """One connection per thread, reopened after a fork"""
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.db = sqlite3.connect(self.path, timeout=10)
+            self._local.pid = os.getpid()
+        return self._local.db
     
-    # Match each red markup to green confirmations
-    for red_item in before_boxes['red_markups']:
-        red_keyword = red_item['keyword']
-        red_content = red_item['content'].lower()
-        red_position = red_item['grid_position']
-        
-        found_match = False
-        
-        # Look for matching green confirmation
-        for idx, green_item in enumerate(after_boxes['green_confirmations']):
-            if idx in matched_greens:
-                continue
-            
-            green_content = green_item['content'].lower()
-            green_position = green_item['grid_position']
-            
-            # Match criteria:
-            # 1. Same or adjacent grid position
-            # 2. Keyword overlap in content
-            # 3. Similar content words
-            
-            position_match = (red_position == green_position or
-                            _adjacent_position(red_position, green_position))
-            
-            keyword_match = (red_keyword in green_content or
-                           any(word in green_content for word in red_content.split()[:5]))
-            
-            if position_match or keyword_match:
-                comparison_result['resolved_items'].append({
-                    'original_comment': red_item['content'],
-                    'keyword': red_keyword,
-                    'severity': red_item['severity'],
-                    'resolution': green_item['content'],
-                    'indicator': green_item.get('indicator', '✓'),
-                    'red_position': red_position,
-                    'green_position': green_position,
-                    'status': '✅ RESOLVED'
-                })
-                matched_greens.add(idx)
-                found_match = True
-                break
-        
-        if not found_match:
-            comparison_result['unresolved_items'].append({
-                'comment': red_item['content'],
-                'keyword': red_keyword,
-                'severity': red_item['severity'],
-                'position': red_position,
-                'status': '❌ NOT RESOLVED',
-                'line_number': red_item.get('line_number', 'Unknown')
-            })
+    def get(self, sid):
+        row = self._connection().execute(
+            'SELECT data FROM sessions WHERE id = ? AND expires > ?', (sid, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
     
-    # Check for new red markups in AFTER (regression)
-    for red_item in after_boxes['red_markups']:
-        # Check if this red markup was NOT in BEFORE
-        is_new = True
-        for before_red in before_boxes['red_markups']:
-            if (red_item['content'] == before_red['content'] and 
-                red_item['grid_position'] == before_red['grid_position']):
-                is_new = False
-                break
-        
-        if is_new:
-            comparison_result['new_issues'].append({
-                'issue': red_item['content'],
-                'keyword': red_item['keyword'],
-                'severity': red_item['severity'],
-                'position': red_item['grid_position'],
-                'status': '⚠️ NEW ISSUE',
-                'line_number': red_item.get('line_number', 'Unknown')
-            })
+    def set(self, sid, data, ttl):
+        db = self._connection()
+        with db:
+            db.execute(
+                'INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)',
+                (sid, json.dumps(data), time.time() + ttl)
+            )
+            db.execute('DELETE FROM sessions WHERE expires <= ?', (time.time(),))
     
-    # Calculate resolution rate
-    total_comments = comparison_result['total_red_comments']
-    resolved_count = len(comparison_result['resolved_items'])
-    unresolved_count = len(comparison_result['unresolved_items'])
-    
-    if total_comments > 0:
-        comparison_result['resolution_rate'] = int((resolved_count / total_comments) * 100)
-    
-    # Determine status and message
-    if total_comments == 0:
-        comparison_result['status'] = 'NO_COMMENTS'
-        comparison_result['message'] = '✅ No engineer comments found in BEFORE file'
-    elif resolved_count == total_comments and unresolved_count == 0:
-        comparison_result['status'] = 'ALL_RESOLVED'
-        comparison_result['message'] = f'✅ All {total_comments} comment(s) addressed with green confirmations!'
-    elif resolved_count > 0 and unresolved_count > 0:
-        comparison_result['status'] = 'PARTIAL'
-        comparison_result['message'] = f'⚠️ {resolved_count}/{total_comments} comment(s) resolved. {unresolved_count} still pending.'
-    elif unresolved_count == total_comments:
-        comparison_result['status'] = 'NONE_RESOLVED'
-        comparison_result['message'] = f'❌ NO CHANGES DETECTED/UPDATED PROPERLY\n\nPlease redo/recheck the PDF attached.\n\nManual check needed for all {total_comments} item(s)!'
-    
-    return comparison_result
-
-
-def _adjacent_position(pos1, pos2):
-    """Check if two grid positions are adjacent (within 1 inch)"""
-    try:
-        # Extract coordinates from format "(Xin, Yin)"
-        x1, y1 = map(lambda s: int(s.replace('in', '').strip()), pos1.strip('()').split(','))
-        x2, y2 = map(lambda s: int(s.replace('in', '').strip()), pos2.strip('()').split(','))
-        
-        # Adjacent if within 1 inch in either direction
-        return abs(x1 - x2) <= 1 and abs(y1 - y2) <= 1
-    except:
-        return False
+    def delete(self, sid):
+        db = self._connection()
+        with db:
+            db.execute('DELETE FROM sessions WHERE id = ?', (sid,))
 
 
-def generate_yolo_report_html(before_boxes, after_boxes, comparison, before_file, after_file):
-    """Generate comprehensive YOLO analysis HTML report"""
-    
-    now = datetime.now()
-    
-    # Build resolved items table
-    resolved_html = ""
-    if comparison['resolved_items']:
-        for item in comparison['resolved_items']:
-            resolved_html += f'''
-            <tr style="background: rgba(0, 255, 65, 0.05);">
-                <td style="color: #00ff41; font-weight: bold;">✅</td>
-                <td>{item['red_position']}</td>
-                <td>{item['original_comment'][:80]}</td>
-                <td>{item['keyword']}</td>
-                <td style="color: #00ff41;">{item['indicator']}</td>
-                <td style="color: #00ff41; font-weight: bold;">RESOLVED</td>
-            </tr>
-            '''
-    else:
-        resolved_html = '<tr><td colspan="6" style="text-align: center; color: #666;">No resolved items</td></tr>'
-    
-    # Build unresolved items table
-    unresolved_html = ""
-    if comparison['unresolved_items']:
-        for item in comparison['unresolved_items']:
-            unresolved_html += f'''
-            <tr style="background: rgba(255, 0, 110, 0.05);">
-                <td style="color: #ff006e; font-weight: bold;">❌</td>
-                <td>{item['position']}</td>
-                <td>{item['comment'][:80]}</td>
-                <td>{item['keyword']}</td>
-                <td style="color: #ff006e;">{item['severity']}</td>
-                <td style="color: #ff006e; font-weight: bold;">NOT RESOLVED</td>
-            </tr>
-            '''
-    else:
-        unresolved_html = '<tr><td colspan="6" style="text-align: center; color: #666;">All items resolved</td></tr>'
-    
-    # Build new issues table
-    new_issues_html = ""
-    if comparison['new_issues']:
-        for item in comparison['new_issues']:
-            new_issues_html += f'''
-            <tr style="background: rgba(255, 165, 0, 0.05);">
-                <td style="color: #ffa500; font-weight: bold;">⚠️</td>
-                <td>{item['position']}</td>
-                <td>{item['issue'][:80]}</td>
-                <td style="color: #ffa500; font-weight: bold;">NEW ISSUE</td>
-            </tr>
-            '''
-        new_issues_section = f'''
-        <div class="section">
-            <h2>⚠️ NEW ISSUES DETECTED</h2>
-            <p style="color: #ffa500; font-weight: bold;">These issues appeared in AFTER that were not in BEFORE:</p>
-            <table>
-                <tr>
-                    <th>Status</th>
-                    <th>Location</th>
-                    <th>Issue</th>
-                    <th>Type</th>
-                </tr>
-                {new_issues_html}
-            </table>
-        </div>
-        '''
-    else:
-        new_issues_section = ""
-    
-    # Determine status color
-    if comparison['status'] == 'ALL_RESOLVED':
-        status_class = 'status-success'
-    elif comparison['status'] == 'PARTIAL':
-        status_class = 'status-warning'
-    else:
-        status_class = 'status-error'
-    
-    html = f'''
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>YOLO Analysis Report - CMT NEXUS</title>
-    <style>
-        @page {{ size: Letter; margin: 0.5in; }}
-        body {{
-            font-family: 'Courier New', 'Consolas', monospace;
-            color: #222;
-            line-height: 1.6;
-            background: #f9f9f9;
-        }}
-        
-        .cover {{
-            text-align: center;
-            padding: 100px 40px;
-            page-break-after: always;
-            background: linear-gradient(135deg, #00f0ff, #b967ff, #ff006e);
-            color: white;
-            min-height: 100vh;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-        }}
-        
-        .cover h1 {{
-            font-size: 64px;
-            margin-bottom: 20px;
-            text-shadow: 3px 3px 6px rgba(0,0,0,0.4);
-            letter-spacing: 4px;
-        }}
-        
-        .cover h2 {{
-            font-size: 28px;
-            margin-bottom: 50px;
-            opacity: 0.95;
-        }}
-        
-        .cover-meta {{
-            background: rgba(0,0,0,0.2);
-            padding: 30px;
-            border-radius: 15px;
-            margin-top: 40px;
-        }}
-        
-        .section {{
-            padding: 40px;
-            background: white;
-            margin: 20px 0;
-            page-break-inside: avoid;
-            border-radius: 10px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        
-        .section h2 {{
-            color: #00f0ff;
-            border-bottom: 4px solid #00f0ff;
-            padding-bottom: 15px;
-            font-size: 36px;
-            margin-bottom: 30px;
-        }}
-        
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin: 25px 0;
-        }}
-        
-        th {{
-            background: #00f0ff;
-            color: white;
-            padding: 15px;
-            text-align: left;
-            font-size: 14px;
-            font-weight: bold;
-        }}
-        
-        td {{
-            padding: 12px 15px;
-            border-bottom: 1px solid #e0e0e0;
-            font-size: 13px;
-        }}
-        
-        tr:hover {{
-            background: rgba(0, 240, 255, 0.05);
-        }}
-        
-        .metric-grid {{
-            display: grid;
-            grid-template-columns: repeat(3, 1fr);
-            gap: 20px;
-            margin: 30px 0;
-        }}
-        
-        .metric-box {{
-            background: linear-gradient(135deg, #f5f5f5, #e0e0e0);
-            padding: 25px;
-            border-radius: 12px;
-            text-align: center;
-            border: 2px solid #00f0ff;
-        }}
-        
-        .metric-value {{
-            font-size: 56px;
-            font-weight: bold;
-            color: #00f0ff;
-            margin-bottom: 10px;
-        }}
-        
-        .metric-label {{
-            font-size: 14px;
-            color: #666;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }}
-        
-        .status-box {{
-            padding: 40px;
-            border-radius: 20px;
-            margin: 40px 0;
-            text-align: center;
-            font-size: 28px;
-            font-weight: bold;
-        }}
-        
-        .status-success {{
-            background: rgba(0, 255, 65, 0.15);
-            border: 4px solid #00ff41;
-            color: #00cc33;
-        }}
-        
-        .status-warning {{
-            background: rgba(255, 165, 0, 0.15);
-            border: 4px solid #ffa500;
-            color: #ff8800;
-        }}
-        
-        .status-error {{
-            background: rgba(255, 0, 110, 0.15);
-            border: 4px solid #ff006e;
-            color: #cc0055;
-        }}
-        
-        .footer {{
-            text-align: center;
-            padding: 40px;
-            color: #666;
-            font-size: 12px;
-            margin-top: 50px;
-            border-top: 3px solid #00f0ff;
-        }}
-        
-        .grid-map {{
-            background: #f0f0f0;
-            padding: 20px;
-            border-radius: 10px;
-            font-family: 'Courier New', monospace;
-            font-size: 11px;
-            overflow-x: auto;
-        }}
-    </style>
-</head>
-<body>
-    <!-- COVER PAGE -->
-    <div class="cover">
-        <h1>🎯 YOLO ANALYSIS</h1>
-        <h2>1x1 Inch Grid Detection Report</h2>
-        <div class="cover-meta">
-            <p style="font-size: 20px; margin: 10px 0;"><strong>Analysis Date:</strong> {now.strftime('%B %d, %Y')}</p>
-            <p style="font-size: 20px; margin: 10px 0;"><strong>Time:</strong> {now.strftime('%I:%M %p')}</p>
-            <p style="font-size: 18px; margin: 20px 0; opacity: 0.9;"><strong>Model:</strong> YOLO-Style Inch-by-Inch Scanner</p>
-            <div style="margin-top: 40px; padding-top: 30px; border-top: 1px solid rgba(255,255,255,0.3);">
-                <p style="font-size: 16px; margin: 10px 0;"><strong>BEFORE File:</strong> {before_file}</p>
-                <p style="font-size: 16px; margin: 10px 0;"><strong>AFTER File:</strong> {after_file}</p>
-            </div>
-        </div>
-    </div>
-    
-    <!-- EXECUTIVE SUMMARY -->
-    <div class="section">
-        <h2>📊 EXECUTIVE SUMMARY</h2>
-        <div class="metric-grid">
-            <div class="metric-box">
-                <div class="metric-value">{before_boxes['total_1x1_boxes_scanned']}</div>
-                <div class="metric-label">Grid Boxes Scanned</div>
-            </div>
-            <div class="metric-box">
-                <div class="metric-value">{len(before_boxes['red_markups'])}</div>
-                <div class="metric-label">Red Comments (BEFORE)</div>
-            </div>
-            <div class="metric-box">
-                <div class="metric-value">{len(after_boxes['green_confirmations'])}</div>
-                <div class="metric-label">Green Confirmations (AFTER)</div>
-            </div>
-        </div>
-        
-        <div class="status-box {status_class}">
-            {comparison['message']}
-        </div>
-        
-        <table style="margin-top: 30px;">
-            <tr>
-                <th>Metric</th>
-                <th>Value</th>
-            </tr>
-            <tr>
-                <td><strong>Total Engineer Comments</strong></td>
-                <td>{comparison['total_red_comments']}</td>
-            </tr>
-            <tr style="background: rgba(0, 255, 65, 0.1);">
-                <td><strong>✅ Resolved Items</strong></td>
-                <td style="color: #00ff41; font-weight: bold;">{len(comparison['resolved_items'])}</td>
-            </tr>
-            <tr style="background: rgba(255, 0, 110, 0.1);">
-                <td><strong>❌ Unresolved Items</strong></td>
-                <td style="color: #ff006e; font-weight: bold;">{len(comparison['unresolved_items'])}</td>
-            </tr>
-            <tr style="background: rgba(255, 165, 0, 0.1);">
-                <td><strong>⚠️ New Issues Found</strong></td>
-                <td style="color: #ffa500; font-weight: bold;">{len(comparison['new_issues'])}</td>
-            </tr>
-            <tr style="background: rgba(0, 240, 255, 0.1);">
-                <td><strong>📈 Resolution Rate</strong></td>
-                <td style="font-size: 24px; font-weight: bold; color: #00f0ff;">{comparison['resolution_rate']}%</td>
-            </tr>
-        </table>
-    </div>
-    
-    <!-- RED MARKUPS DETECTED -->
-    <div class="section">
-        <h2>🔴 RED MARKUPS DETECTED (BEFORE PDF)</h2>
-        <p><strong>Total Engineer Comments:</strong> {len(before_boxes['red_markups'])}</p>
-        <p style="color: #666; margin-bottom: 20px;">These are the issues identified by the structural engineer that require correction:</p>
-        
-        <table>
-            <tr>
-                <th>Box ID</th>
-                <th>Grid Position</th>
-                <th>Comment Content</th>
-                <th>Keyword</th>
-                <th>Severity</th>
-                <th>Type</th>
-            </tr>
-'''
-    
-    for red in before_boxes['red_markups'][:50]:  # Limit to first 50
-        severity_color = '#ff006e' if red['severity'] == 'HIGH' else '#ffa500' if red['severity'] == 'MEDIUM' else '#666'
-        html += f'''
-            <tr>
-                <td style="font-family: monospace; font-size: 11px;">{red['box_id']}</td>
-                <td>{red['grid_position']}</td>
-                <td>{red['content'][:80]}</td>
-                <td style="font-weight: bold; color: #ff006e;">{red['keyword']}</td>
-                <td style="color: {severity_color}; font-weight: bold;">{red['severity']}</td>
-                <td>{red['type']}</td>
-            </tr>
-        '''
-    
-    html += f'''
-        </table>
-    </div>
-    
-    <!-- GREEN CONFIRMATIONS DETECTED -->
-    <div class="section">
-        <h2>✅ GREEN CONFIRMATIONS (AFTER PDF)</h2>
-        <p><strong>Total Designer Updates:</strong> {len(after_boxes['green_confirmations'])}</p>
-        <p style="color: #666; margin-bottom: 20px;">These are the confirmations provided by the designer showing completed work:</p>
-        
-        <table>
-            <tr>
-                <th>Box ID</th>
-                <th>Grid Position</th>
-                <th>Confirmation Content</th>
-                <th>Indicator</th>
-                <th>Type</th>
-            </tr>
-'''
-    
-    for green in after_boxes['green_confirmations'][:50]:
-        html += f'''
-            <tr style="background: rgba(0, 255, 65, 0.03);">
-                <td style="font-family: monospace; font-size: 11px;">{green['box_id']}</td>
-                <td>{green['grid_position']}</td>
-                <td>{green['content'][:80]}</td>
-                <td style="color: #00ff41; font-size: 18px; font-weight: bold;">{green['indicator']}</td>
-                <td>{green['type']}</td>
-            </tr>
-        '''
-    
-    html += f'''
-        </table>
-    </div>
-    
-    <!-- RED-TO-GREEN COMPARISON -->
-    <div class="section">
-        <h2>🔄 RED-TO-GREEN COMPARISON</h2>
-        <p style="margin-bottom: 20px;">Detailed matching of engineer comments to designer confirmations:</p>
-        
-        <h3 style="color: #00ff41; margin-top: 30px;">✅ RESOLVED ITEMS ({len(comparison['resolved_items'])})</h3>
-        <table>
-            <tr>
-                <th>Status</th>
-                <th>Location</th>
-                <th>Original Comment</th>
-                <th>Keyword</th>
-                <th>Confirmation</th>
-                <th>Result</th>
-            </tr>
-            {resolved_html}
-        </table>
-        
-        <h3 style="color: #ff006e; margin-top: 40px;">❌ UNRESOLVED ITEMS ({len(comparison['unresolved_items'])})</h3>
-        <table>
-            <tr>
-                <th>Status</th>
-                <th>Location</th>
-                <th>Comment</th>
-                <th>Keyword</th>
-                <th>Severity</th>
-                <th>Result</th>
-            </tr>
-            {unresolved_html}
-        </table>
-    </div>
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None):
+        def on_update(self):
+            self.modified = True
+        
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session backed by a get/set/delete store; the cookie holds only the id"""
     
-    {new_issues_section}
-    
-    <!-- DIMENSIONS ANALYSIS -->
-    <div class="section">
-        <h2>📐 DIMENSIONS ANALYSIS</h2>
-        <table>
-            <tr>
-                <th>Metric</th>
-                <th>BEFORE</th>
-                <th>AFTER</th>
-                <th>Change</th>
-            </tr>
-            <tr>
-                <td><strong>Total Dimensions Detected</strong></td>
-                <td>{len(before_boxes['dimensions'])}</td>
-                <td>{len(after_boxes['dimensions'])}</td>
-                <td style="font-weight: bold;">{len(after_boxes['dimensions']) - len(before_boxes['dimensions']):+d}</td>
-            </tr>
-            <tr>
-                <td><strong>Annotations Found</strong></td>
-                <td>{len(before_boxes['annotations'])}</td>
-                <td>{len(after_boxes['annotations'])}</td>
-                <td style="font-weight: bold;">{len(after_boxes['annotations']) - len(before_boxes['annotations']):+d}</td>
-            </tr>
-        </table>
-    </div>
+    def __init__(self, store):
+        self.store = store
     
-    <!-- FOOTER -->
-    <div class="footer">
-        <p style="font-size: 16px; font-weight: bold; color: #00f0ff; margin-bottom: 10px;">CMT NEXUS - YOLO ANALYSIS SYSTEM</p>
-        <p>Inch-by-Inch Grid Detection • Red/Green Color Analysis • Automated Verification</p>
-        <p style="margin-top: 15px;">© {now.year} All Rights Reserved • Generated: {now.strftime('%Y-%m-%d %H:%M:%S')}</p>
-        <p style="margin-top: 10px; font-size: 10px; color: #999;">Report ID: {hashlib.md5(f"{before_file}{after_file}{now}".encode()).hexdigest()[:12].upper()}</p>
-    </div>
-</body>
-</html>
-    '''
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app), '')
+        data = self.store.get(sid) if SESSION_ID_PATTERN.match(sid) else None
+        if data is None:
+            # Unknown ids are never adopted, so a planted cookie can't fix the id
+            return ServerSideSession(sid=secrets.token_urlsafe(32))
+        return ServerSideSession(data, sid=sid)
     
-    return html
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        
+        if not session:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        
+        if not self.should_set_cookie(app, session):
+            return
+        
+        self.store.set(session.sid, dict(session), app.permanent_session_lifetime.total_seconds())
+        response.vary.add('Cookie')
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
 
 
-# ==================== API ROUTES ====================
+if SESSION_BACKEND == 'sqlite':
+    app.session_interface = ServerSideSessionInterface(SQLiteSessionStore(SESSION_DB))
+elif SESSION_BACKEND != 'cookie':
+    raise ValueError(f"Unknown SESSION_BACKEND {SESSION_BACKEND!r} (expected 'cookie' or 'sqlite')")
 
-@app.route('/')
-def index():
-    """Main application with complete HTML frontend"""
-    user = session.get('user')
-    username = session.get('name', '') if user else ''
-    is_logged_in = 'true' if user else 'false'
-    
-    return f'''<!DOCTYPE html>
+# ==================== YOLO MODEL & REPORT RENDERER ====================
+#
+# The scanner, matcher and report renderer live in yolo_pipeline.py, which has
+# no import-time side effects, so the offline CLI and benchmarks can use them
+# without this app creating folders or printing warnings.
+
+from yolo_pipeline import (
+    REPORT_CHUNK_SIZE,
+    REPORT_CSS,
+    REPORT_CSS_HASH,
+    REPORT_CSS_LINK_PATTERN,
+    build_analysis_payload,
+    compile_report_template,
+    extract_pdf_content,
+    generate_yolo_report_html,
+    iter_yolo_report_html,
+    render_template_chunks,
+    report_stylesheet_tag,
+    yolo_compare_red_to_green,
+    yolo_grid_scan_1x1_inch,
+)
+
+
+# Reports are stored in compressed form: <name>.html.gz (+ <name>.html.br with brotli);
+# a plain <name>.html is written from the gzip on the first download that needs it
+REPORT_GZIP_LEVEL = int(os.environ.get('REPORT_GZIP_LEVEL', 6))
+REPORT_BROTLI = brotli is not None and os.environ.get('REPORT_BROTLI', '1') == '1'
+REPORT_ENCODINGS = (('br', '.br'), ('gzip', '.gz'), ('identity', ''))
+
+# Hand report bytes to a front proxy instead of streaming them from Python:
+# '' (off), 'x-sendfile' (Apache/lighttpd) or 'x-accel' (nginx internal location
+# at REPORT_ACCEL_PREFIX mapped onto REPORT_FOLDER; add
+# "add_header Content-Encoding $upstream_http_content_encoding;" there)
+REPORT_SENDFILE = os.environ.get('REPORT_SENDFILE', '')
+REPORT_ACCEL_PREFIX = os.environ.get('REPORT_ACCEL_PREFIX', '/protected-reports')
+app.config['USE_X_SENDFILE'] = REPORT_SENDFILE == 'x-sendfile'
+
+
+# ==================== FRONTEND SHELL ====================
+#
+# The page is identical for every visitor, so it is encoded, hashed and
+# compressed once at startup. index() only negotiates encoding and answers
+# If-None-Match; the signed-in user is fetched by the page from /api/session.
+# CSS, JS and fonts are separate fingerprinted assets (see STATIC ASSETS below).
+
+INDEX_TEMPLATE = '''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>CMT NEXUS - YOLO Analysis</title>
-    <link href="https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&family=Space+Mono:wght@400;700&display=swap" rel="stylesheet">
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        :root {{
-            --primary: #00f0ff;
-            --secondary: #ff006e;
-            --accent: #b967ff;
-            --dark: #0a0a0f;
-        }}
-        
-        body {{
-            font-family: 'Space Mono', monospace;
-            background: var(--dark);
-            color: white;
-            overflow-x: hidden;
-            cursor: none;
-        }}
-        
-        /* Custom Cursor */
-        #cursor {{
-            position: fixed;
-            width: 20px;
-            height: 20px;
-            border: 2px solid var(--primary);
-            border-radius: 50%;
-            pointer-events: none;
-            z-index: 10000;
-            transition: all 0.1s ease;
-            transform: translate(-50%, -50%);
-        }}
-        
-        #cursorTrail {{
-            position: fixed;
-            width: 8px;
-            height: 8px;
-            background: var(--primary);
-            border-radius: 50%;
-            pointer-events: none;
-            z-index: 9999;
-            opacity: 0.5;
-            transition: all 0.15s ease;
-            transform: translate(-50%, -50%);
-        }}
-        
-        .cursor-splash {{
-            position: fixed;
-            width: 40px;
-            height: 40px;
-            border: 2px solid var(--primary);
-            border-radius: 50%;
-            pointer-events: none;
-            z-index: 9998;
-            animation: splash 0.6s ease-out forwards;
-            transform: translate(-50%, -50%);
-        }}
-        
-        @keyframes splash {{
-            0% {{ transform: translate(-50%, -50%) scale(0); opacity: 1; }}
-            100% {{ transform: translate(-50%, -50%) scale(2); opacity: 0; }}
-        }}
-        
-        /* Background Animation */
-        .bg-container {{
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            z-index: -1;
-            overflow: hidden;
-        }}
-        
-        .bg-gradient {{
-            position: absolute;
-            width: 200%;
-            height: 200%;
-            background: 
-                radial-gradient(circle at 20% 50%, rgba(0, 240, 255, 0.15) 0%, transparent 50%),
-                radial-gradient(circle at 80% 80%, rgba(255, 0, 110, 0.15) 0%, transparent 50%),
-                radial-gradient(circle at 40% 20%, rgba(185, 103, 255, 0.1) 0%, transparent 50%);
-            animation: bgMove 20s ease-in-out infinite;
-        }}
-        
-        @keyframes bgMove {{
-            0%, 100% {{ transform: translate(0, 0) rotate(0deg); }}
-            33% {{ transform: translate(-5%, -5%) rotate(120deg); }}
-            66% {{ transform: translate(5%, 5%) rotate(240deg); }}
-        }}
-        
-        .particles {{
-            position: absolute;
-            width: 100%;
-            height: 100%;
-        }}
-        
-        .particle {{
-            position: absolute;
-            width: 2px;
-            height: 2px;
-            background: var(--primary);
-            border-radius: 50%;
-            animation: particleFloat 15s infinite;
-            opacity: 0.3;
-        }}
-        
-        @keyframes particleFloat {{
-            0%, 100% {{ transform: translateY(0) translateX(0); opacity: 0; }}
-            10% {{ opacity: 0.3; }}
-            90% {{ opacity: 0.3; }}
-            100% {{ transform: translateY(-100vh) translateX(100px); opacity: 0; }}
-        }}
-        
-        /* Navigation */
-        nav {{
-            position: fixed;
-            top: 0;
-            width: 100%;
-            padding: 20px 60px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            z-index: 1000;
-            background: rgba(10, 10, 15, 0.95);
-            backdrop-filter: blur(10px);
-            border-bottom: 1px solid rgba(255,255,255,0.1);
-        }}
-        
-        .logo {{
-            font-family: 'Orbitron', sans-serif;
-            font-size: 24px;
-            font-weight: 900;
-        }}
-        
-        .logo span:first-child {{ color: var(--primary); }}
-        .logo span:last-child {{ color: var(--secondary); }}
-        
-        .nav-center {{
-            display: flex;
-            gap: 50px;
-        }}
-        
-        .nav-center a {{
-            color: white;
-            text-decoration: none;
-            font-size: 13px;
-            font-weight: 600;
-            letter-spacing: 2px;
-            transition: color 0.3s;
-        }}
-        
-        .nav-center a:hover {{ color: var(--primary); }}
-        
-        .nav-right {{
-            display: flex;
-            gap: 20px;
-            align-items: center;
-        }}
-        
-        .user-dropdown {{
-            position: relative;
-        }}
-        
-        .user-display {{
-            padding: 10px 25px;
-            background: rgba(0, 240, 255, 0.1);
-            border: 1px solid var(--primary);
-            border-radius: 25px;
-            font-size: 12px;
-            color: var(--primary);
-            letter-spacing: 1px;
-            cursor: pointer;
-            transition: all 0.3s;
-        }}
-        
-        .user-display:hover {{
-            background: rgba(0, 240, 255, 0.2);
-        }}
-        
-        .dropdown-content {{
-            display: none;
-            position: absolute;
-            top: 50px;
-            right: 0;
-            background: #1a1a2e;
-            border: 1px solid var(--primary);
-            border-radius: 10px;
-            padding: 10px;
-            min-width: 150px;
-        }}
-        
-        .dropdown-content.active {{
-            display: block;
-            animation: fadeIn 0.3s;
-        }}
-        
-        @keyframes fadeIn {{
-            from {{ opacity: 0; transform: translateY(-10px); }}
-            to {{ opacity: 1; transform: translateY(0); }}
-        }}
-        
-        .dropdown-content button {{
-            width: 100%;
-            padding: 12px;
-            background: transparent;
-            border: 1px solid var(--secondary);
-            color: var(--secondary);
-            border-radius: 8px;
-            cursor: pointer;
-            font-size: 12px;
-            letter-spacing: 1px;
-            transition: all 0.3s;
-        }}
-        
-        .dropdown-content button:hover {{
-            background: var(--secondary);
-            color: white;
-        }}
-        
-        .btn-signin {{
-            padding: 12px 35px;
-            background: linear-gradient(90deg, var(--primary), var(--accent));
-            color: var(--dark);
-            border: none;
-            border-radius: 25px;
-            font-weight: 700;
-            font-size: 12px;
-            letter-spacing: 2px;
-            cursor: pointer;
-            transition: all 0.3s;
-        }}
-        
-        .btn-signin:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 0 30px rgba(0, 240, 255, 0.6);
-        }}
-        
-        /* Hero Section */
-        .hero {{
-            min-height: 100vh;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            padding: 0 20px;
-            position: relative;
-            z-index: 1;
-        }}
-        
-        .hero-title {{
-            font-family: 'Orbitron', sans-serif;
-            font-size: clamp(50px, 9vw, 110px);
-            font-weight: 900;
-            text-align: center;
-            line-height: 1.1;
-            margin-bottom: 30px;
-            background: linear-gradient(90deg, var(--primary), var(--accent), var(--secondary), var(--primary));
-            background-size: 200% auto;
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            animation: gradientFlow 3s linear infinite;
-        }}
-        
-        @keyframes gradientFlow {{
-            0% {{ background-position: 0% center; }}
-            100% {{ background-position: 200% center; }}
-        }}
-        
-        .hero-subtitle {{
-            font-size: clamp(14px, 2.5vw, 20px);
-            color: #888;
-            text-align: center;
-            letter-spacing: 4px;
-            margin-bottom: 50px;
-        }}
-        
-        .cta-buttons {{
-            display: flex;
-            gap: 25px;
-            flex-wrap: wrap;
-            justify-content: center;
-        }}
-        
-        .cta-button {{
-            padding: 18px 50px;
-            font-size: 14px;
-            font-weight: 700;
-            text-decoration: none;
-            border-radius: 50px;
-            cursor: pointer;
-            border: none;
-            letter-spacing: 2px;
-            transition: all 0.3s;
-            font-family: 'Space Mono', monospace;
-        }}
-        
-        .cta-primary {{
-            background: linear-gradient(90deg, var(--primary), var(--accent));
-            color: var(--dark);
-            box-shadow: 0 0 30px rgba(0, 240, 255, 0.4);
-        }}
-        
-        .cta-primary:hover {{
-            transform: translateY(-3px);
-            box-shadow: 0 0 50px rgba(0, 240, 255, 0.7);
-        }}
-        
-        .cta-secondary {{
-            background: transparent;
-            color: var(--secondary);
-            border: 2px solid var(--secondary);
-        }}
-        
-        .cta-secondary:hover {{
-            background: var(--secondary);
-            color: white;
-        }}
-        
-        /* Analysis Section */
-        .analysis-section {{
-            min-height: 100vh;
-            padding: 120px 20px 80px 20px;
-            position: relative;
-            z-index: 1;
-        }}
-        
-        .section-title {{
-            font-family: 'Orbitron', sans-serif;
-            font-size: clamp(36px, 6vw, 72px);
-            font-weight: 900;
-            text-align: center;
-            margin-bottom: 20px;
-            color: var(--primary);
-        }}
-        
-        .section-subtitle {{
-            text-align: center;
-            color: #888;
-            font-size: 16px;
-            letter-spacing: 3px;
-            margin-bottom: 60px;
-        }}
-        
-        .upload-container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
-            gap: 40px;
-            margin-bottom: 50px;
-        }}
-        
-        .upload-box {{
-            background: rgba(255, 255, 255, 0.03);
-            border: 2px dashed rgba(255, 255, 255, 0.2);
-            border-radius: 20px;
-            padding: 50px 30px;
-            text-align: center;
-            transition: all 0.3s;
-        }}
-        
-        .upload-box:hover {{
-            border-color: var(--primary);
-            background: rgba(0, 240, 255, 0.05);
-        }}
-        
-        .upload-box.has-file {{
-            border-color: #00ff41;
-            background: rgba(0, 255, 65, 0.05);
-        }}
-        
-        .upload-title {{
-            font-size: 24px;
-            font-weight: 700;
-            margin-bottom: 15px;
-            color: var(--primary);
-        }}
-        
-        .upload-desc {{
-            color: #888;
-            font-size: 13px;
-            margin-bottom: 25px;
-            line-height: 1.6;
-        }}
-        
-        .upload-icon {{
-            font-size: 64px;
-            margin-bottom: 20px;
-            opacity: 0.5;
-        }}
-        
-        input[type="file"] {{
-            display: none;
-        }}
-        
-        .upload-button {{
-            padding: 14px 40px;
-            background: rgba(0, 240, 255, 0.1);
-            border: 1px solid var(--primary);
-            color: var(--primary);
-            border-radius: 25px;
-            cursor: pointer;
-            font-size: 13px;
-            letter-spacing: 2px;
-            transition: all 0.3s;
-            font-family: 'Space Mono', monospace;
-        }}
-        
-        .upload-button:hover {{
-            background: var(--primary);
-            color: var(--dark);
-        }}
-        
-        .file-name {{
-            margin-top: 20px;
-            color: #00ff41;
-            font-size: 12px;
-            word-break: break-all;
-        }}
-        
-        .analyze-button {{
-            display: block;
-            margin: 40px auto;
-            padding: 20px 70px;
-            background: linear-gradient(90deg, var(--primary), var(--accent));
-            color: var(--dark);
-            border: none;
-            border-radius: 50px;
-            font-size: 16px;
-            font-weight: 700;
-            letter-spacing: 2px;
-            cursor: pointer;
-            transition: all 0.3s;
-            font-family: 'Space Mono', monospace;
-        }}
-        
-        .analyze-button:hover:not(:disabled) {{
-            transform: translateY(-3px);
-            box-shadow: 0 0 50px rgba(0, 240, 255, 0.7);
-        }}
-        
-        .analyze-button:disabled {{
-            opacity: 0.3;
-            cursor: not-allowed;
-        }}
-        
-        /* Loading Animation - Top Level Blueprint */
-        .loading-overlay {{
-            display: none;
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(10, 10, 15, 0.98);
-            z-index: 5000;
-            align-items: center;
-            justify-content: center;
-        }}
-        
-        .loading-overlay.active {{
-            display: flex;
-        }}
-        
-        .loader-container {{
-            text-align: center;
-        }}
-        
-        .blueprint-loader {{
-            width: 300px;
-            height: 300px;
-            position: relative;
-            margin: 0 auto 40px auto;
-        }}
-        
-        .blueprint-grid {{
-            position: absolute;
-            width: 100%;
-            height: 100%;
-            background-image: 
-                linear-gradient(rgba(0, 240, 255, 0.1) 1px, transparent 1px),
-                linear-gradient(90deg, rgba(0, 240, 255, 0.1) 1px, transparent 1px);
-            background-size: 20px 20px;
-            animation: gridPulse 2s ease-in-out infinite;
-        }}
-        
-        @keyframes gridPulse {{
-            0%, 100% {{ opacity: 0.3; }}
-            50% {{ opacity: 0.7; }}
-        }}
-        
-        .measuring-tool {{
-            position: absolute;
-            width: 150px;
-            height: 2px;
-            background: var(--primary);
-            top: 100px;
-            left: 75px;
-            transform-origin: left center;
-            animation: measure 3s ease-in-out infinite;
-        }}
-        
-        @keyframes measure {{
-            0%, 100% {{ transform: rotate(0deg); width: 150px; }}
-            50% {{ transform: rotate(45deg); width: 200px; }}
-        }}
-        
-        .compass {{
-            position: absolute;
-            width: 80px;
-            height: 80px;
-            border: 3px solid var(--primary);
-            border-radius: 50%;
-            top: 110px;
-            right: 60px;
-            animation: compassSpin 4s linear infinite;
-        }}
-        
-        @keyframes compassSpin {{
-            0% {{ transform: rotate(0deg); }}
-            100% {{ transform: rotate(360deg); }}
-        }}
-        
-        .compass-needle {{
-            position: absolute;
-            width: 2px;
-            height: 30px;
-            background: var(--secondary);
-            top: 10px;
-            left: 39px;
-            transform-origin: bottom center;
-        }}
-        
-        .protractor {{
-            position: absolute;
-            width: 120px;
-            height: 60px;
-            border: 3px solid var(--accent);
-            border-bottom: none;
-            border-radius: 120px 120px 0 0;
-            bottom: 80px;
-            left: 90px;
-            animation: protractorRotate 3s ease-in-out infinite;
-        }}
-        
-        @keyframes protractorRotate {{
-            0%, 100% {{ transform: rotate(-30deg); }}
-            50% {{ transform: rotate(30deg); }}
-        }}
-        
-        .scanning-box {{
-            position: absolute;
-            width: 96px;
-            height: 96px;
-            border: 2px solid var(--primary);
-            box-shadow: 0 0 20px rgba(0, 240, 255, 0.5);
-            animation: boxScan 3s ease-in-out infinite;
-        }}
-        
-        @keyframes boxScan {{
-            0% {{ top: 0; left: 0; opacity: 0; }}
-            25% {{ top: 0; left: 200px; opacity: 1; }}
-            50% {{ top: 200px; left: 200px; opacity: 1; }}
-            75% {{ top: 200px; left: 0; opacity: 1; }}
-            100% {{ top: 0; left: 0; opacity: 0; }}
-        }}
-        
-        .loading-text {{
-            font-size: 28px;
-            color: var(--primary);
-            letter-spacing: 4px;
-            margin-bottom: 20px;
-            animation: textPulse 1.5s ease-in-out infinite;
-        }}
-        
-        @keyframes textPulse {{
-            0%, 100% {{ opacity: 0.5; transform: scale(1); }}
-            50% {{ opacity: 1; transform: scale(1.05); }}
-        }}
-        
-        .loading-subtitle {{
-            font-size: 14px;
-            color: #888;
-            letter-spacing: 2px;
-            animation: subtitleFade 2s ease-in-out infinite;
-        }}
-        
-        @keyframes subtitleFade {{
-            0%, 100% {{ opacity: 0.3; }}
-            50% {{ opacity: 0.8; }}
-        }}
-        
-        .progress-bar {{
-            width: 300px;
-            height: 4px;
-            background: rgba(255, 255, 255, 0.1);
-            margin: 30px auto 0 auto;
-            border-radius: 2px;
-            overflow: hidden;
-        }}
-        
-        .progress-fill {{
-            height: 100%;
-            background: linear-gradient(90deg, var(--primary), var(--accent));
-            animation: progressFill 3s ease-in-out infinite;
-        }}
-        
-        @keyframes progressFill {{
-            0% {{ width: 0%; }}
-            100% {{ width: 100%; }}
-        }}
-        
-        /* Results Section */
-        .results-section {{
-            max-width: 1400px;
-            margin: 60px auto;
-            padding: 0 20px;
-            display: none;
-        }}
-        
-        .results-section.active {{
-            display: block;
-        }}
-        
-        .status-banner {{
-            padding: 30px;
-            border-radius: 15px;
-            margin-bottom: 40px;
-            text-align: center;
-        }}
-        
-        .status-banner.error {{
-            background: rgba(255, 0, 110, 0.1);
-            border: 2px solid var(--secondary);
-        }}
-        
-        .status-banner.success {{
-            background: rgba(0, 255, 65, 0.1);
-            border: 2px solid #00ff41;
-        }}
-        
-        .status-banner.warning {{
-            background: rgba(255, 165, 0, 0.1);
-            border: 2px solid #ffa500;
-        }}
-        
-        .results-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 30px;
-            margin-bottom: 50px;
-        }}
-        
-        .result-card {{
-            background: rgba(255, 255, 255, 0.03);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 15px;
-            padding: 30px;
-        }}
-        
-        .result-card h3 {{
-            color: var(--primary);
-            font-size: 18px;
-            margin-bottom: 20px;
-        }}
-        
-        .change-item {{
-            background: rgba(255, 255, 255, 0.02);
-            padding: 15px;
-            border-radius: 10px;
-            margin-bottom: 15px;
-            border-left: 3px solid var(--primary);
-        }}
-        
-        .change-type {{
-            font-size: 11px;
-            color: #888;
-            letter-spacing: 1.5px;
-            margin-bottom: 5px;
-        }}
-        
-        .change-desc {{
-            font-size: 13px;
-            line-height: 1.6;
-        }}
-        
-        .severity-high {{ border-left-color: var(--secondary); }}
-        .severity-good {{ border-left-color: #00ff41; }}
-        
-        .download-btn {{
-            display: block;
-            margin: 30px auto;
-            padding: 18px 60px;
-            background: linear-gradient(90deg, #00ff41, var(--primary));
-            color: var(--dark);
-            border: none;
-            border-radius: 50px;
-            font-size: 16px;
-            font-weight: 700;
-            letter-spacing: 2px;
-            cursor: pointer;
-            transition: all 0.3s;
-            font-family: 'Space Mono', monospace;
-        }}
-        
-        .download-btn:hover {{
-            transform: translateY(-3px);
-            box-shadow: 0 0 50px rgba(0, 255, 65, 0.7);
-        }}
-        
-        /* Modal */
-        .modal {{
-            display: none;
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(0, 0, 0, 0.95);
-            z-index: 2000;
-            align-items: center;
-            justify-content: center;
-        }}
-        
-        .modal.active {{ display: flex; }}
-        
-        .modal-content {{
-            background: #1a1a2e;
-            padding: 50px;
-            border-radius: 20px;
-            max-width: 500px;
-            width: 90%;
-            border: 1px solid rgba(0, 240, 255, 0.3);
-            animation: modalSlideIn 0.3s;
-        }}
-        
-        @keyframes modalSlideIn {{
-            from {{ transform: translateY(-50px); opacity: 0; }}
-            to {{ transform: translateY(0); opacity: 1; }}
-        }}
-        
-        .modal h2 {{
-            font-family: 'Orbitron', sans-serif;
-            color: var(--primary);
-            margin-bottom: 30px;
-            font-size: 28px;
-        }}
-        
-        .form-group {{
-            margin-bottom: 25px;
-        }}
-        
-        .form-group label {{
-            display: block;
-            margin-bottom: 10px;
-            color: #888;
-            font-size: 12px;
-            letter-spacing: 1.5px;
-        }}
-        
-        .form-group input {{
-            width: 100%;
-            padding: 15px;
-            background: rgba(255, 255, 255, 0.05);
-            border: 1px solid rgba(255, 255, 255, 0.2);
-            border-radius: 10px;
-            color: white;
-            font-size: 15px;
-        }}
-        
-        .form-group input:focus {{
-            outline: none;
-            border-color: var(--primary);
-        }}
-        
-        .close-modal {{
-            float: right;
-            font-size: 28px;
-            cursor: pointer;
-            color: #888;
-            line-height: 1;
-        }}
-        
-        .close-modal:hover {{ color: var(--secondary); }}
-        
-        /* Identical File Popup */
-        .popup-overlay {{
-            display: none;
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(0, 0, 0, 0.9);
-            z-index: 9999;
-        }}
-        
-        .popup-overlay.active {{
-            display: block;
-        }}
-        
-        .identical-popup {{
-            display: none;
-            position: fixed;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            background: #1a1a2e;
-            padding: 50px;
-            border-radius: 20px;
-            border: 3px solid var(--secondary);
-            z-index: 10000;
-            max-width: 600px;
-            width: 90%;
-            text-align: center;
-            animation: popupSlideIn 0.3s;
-            box-shadow: 0 0 100px rgba(255, 0, 110, 0.5);
-        }}
-        
-        .identical-popup.active {{
-            display: block;
-        }}
-        
-        @keyframes popupSlideIn {{
-            from {{ transform: translate(-50%, -60%); opacity: 0; }}
-            to {{ transform: translate(-50%, -50%); opacity: 1; }}
-        }}
-        
-        .identical-popup h2 {{
-            color: var(--secondary);
-            font-size: 32px;
-            margin-bottom: 20px;
-        }}
-        
-        .identical-popup p {{
-            font-size: 16px;
-            line-height: 1.8;
-            margin: 15px 0;
-            color: #ccc;
-        }}
-        
-        .identical-popup ul {{
-            text-align: left;
-            margin: 25px auto;
-            max-width: 500px;
-            line-height: 2;
-        }}
-        
-        .identical-popup button {{
-            margin-top: 30px;
-            padding: 15px 50px;
-            background: var(--secondary);
-            color: white;
-            border: none;
-            border-radius: 30px;
-            font-size: 16px;
-            font-weight: 700;
-            cursor: pointer;
-            letter-spacing: 2px;
-            transition: all 0.3s;
-        }}
-        
-        .identical-popup button:hover {{
-            transform: translateY(-3px);
-            box-shadow: 0 0 30px rgba(255, 0, 110, 0.7);
-        }}
-        
-        /* Right-Click Protection Popup */
-        .protection-popup {{
-            display: none;
-            position: fixed;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            background: #1a1a2e;
-            padding: 40px;
-            border-radius: 20px;
-            border: 2px solid var(--secondary);
-            z-index: 10001;
-            text-align: center;
-            animation: popupBounce 0.3s;
-        }}
-        
-        @keyframes popupBounce {{
-            0% {{ transform: translate(-50%, -50%) scale(0.8); }}
-            50% {{ transform: translate(-50%, -50%) scale(1.1); }}
-            100% {{ transform: translate(-50%, -50%) scale(1); }}
-        }}
-        
-        .protection-popup.active {{
-            display: block;
-        }}
-        
-        .protection-popup h3 {{
-            color: var(--secondary);
-            margin-bottom: 20px;
-            font-size: 24px;
-        }}
-        
-        @media (max-width: 768px) {{
-            nav {{ padding: 20px 30px; }}
-            .nav-center {{ display: none; }}
-            .hero-title {{ font-size: 50px; }}
-        }}
-    </style>
+    <link rel="stylesheet" href="${app_css}">
 </head>
 <body>
     <!-- Custom Cursor -->
@@ -1720,16 +272,7 @@ def index():
         </div>
         <div class="nav-right">
             <div id="userArea">
-                {f'''
-                <div class="user-dropdown">
-                    <div class="user-display" onclick="toggleDropdown()">
-                        👤 {username} ▼
-                    </div>
-                    <div class="dropdown-content" id="userDropdown">
-                        <button onclick="logout()">SIGN OUT</button>
-                    </div>
-                </div>
-                ''' if user else '<button class="btn-signin" onclick="showLogin()">SIGN IN</button>'}
+                <button class="btn-signin" onclick="showLogin()">SIGN IN</button>
             </div>
         </div>
     </nav>
@@ -1740,7 +283,7 @@ def index():
         <p class="hero-subtitle">ML-POWERED • GRID SCANNING • RED-TO-GREEN MATCHING</p>
         <div class="cta-buttons">
             <button class="cta-button cta-primary" onclick="scrollToAnalyze()">START ANALYSIS</button>
-            {'' if user else '<button class="cta-button cta-secondary" onclick="showLogin()">SIGN IN</button>'}
+            <button class="cta-button cta-secondary" id="heroSignIn" onclick="showLogin()">SIGN IN</button>
         </div>
     </section>
     
@@ -1841,351 +384,174 @@ def index():
         <p style="margin-top: 15px; color: #888; font-size: 12px;">This content is protected</p>
     </div>
     
-    <script>
-        const isLoggedIn = {is_logged_in};
-        let beforeFile = null;
-        let afterFile = null;
-        let currentReportFile = null;
-        
-        // ========== CUSTOM CURSOR ==========
-        const cursor = document.getElementById('cursor');
-        const cursorTrail = document.getElementById('cursorTrail');
-        
-        document.addEventListener('mousemove', (e) => {{
-            cursor.style.left = e.clientX + 'px';
-            cursor.style.top = e.clientY + 'px';
-            
-            setTimeout(() => {{
-                cursorTrail.style.left = e.clientX + 'px';
-                cursorTrail.style.top = e.clientY + 'px';
-            }}, 50);
-        }});
-        
-        document.addEventListener('click', (e) => {{
-            const splash = document.createElement('div');
-            splash.className = 'cursor-splash';
-            splash.style.left = e.clientX + 'px';
-            splash.style.top = e.clientY + 'px';
-            document.body.appendChild(splash);
-            
-            setTimeout(() => splash.remove(), 600);
-        }});
-        
-        // ========== PARTICLES ==========
-        function generateParticles() {{
-            const particlesContainer = document.getElementById('particles');
-            for (let i = 0; i < 50; i++) {{
-                const particle = document.createElement('div');
-                particle.className = 'particle';
-                particle.style.left = Math.random() * 100 + '%';
-                particle.style.top = Math.random() * 100 + '%';
-                particle.style.animationDelay = Math.random() * 15 + 's';
-                particlesContainer.appendChild(particle);
-            }}
-        }}
-        
-        generateParticles();
-        
-        // ========== RIGHT-CLICK PROTECTION ==========
-        document.addEventListener('contextmenu', (e) => {{
-            e.preventDefault();
-            const popup = document.getElementById('protectionPopup');
-            popup.classList.add('active');
-            setTimeout(() => popup.classList.remove('active'), 2000);
-        }});
-        
-        document.addEventListener('keydown', (e) => {{
-            if (e.key === 'F12' || 
-                (e.ctrlKey && e.shiftKey && e.key === 'I') ||
-                (e.ctrlKey && e.key === 'u')) {{
-                e.preventDefault();
-                const popup = document.getElementById('protectionPopup');
-                popup.classList.add('active');
-                setTimeout(() => popup.classList.remove('active'), 2000);
-            }}
-        }});
-        
-        // ========== NAVIGATION ==========
-        function scrollToAnalyze() {{
-            document.getElementById('analyze').scrollIntoView({{ behavior: 'smooth' }});
-        }}
-        
-        function toggleDropdown() {{
-            document.getElementById('userDropdown').classList.toggle('active');
-        }}
-        
-        function showLogin() {{
-            document.getElementById('loginModal').classList.add('active');
-        }}
-        
-        function closeLogin() {{
-            document.getElementById('loginModal').classList.remove('active');
-        }}
-        
-        function showIdenticalPopup() {{
-            document.getElementById('popupOverlay').classList.add('active');
-            document.getElementById('identicalPopup').classList.add('active');
-        }}
-        
-        function closeIdenticalPopup() {{
-            document.getElementById('popupOverlay').classList.remove('active');
-            document.getElementById('identicalPopup').classList.remove('active');
-        }}
-        
-        // ========== AUTH ==========
-        async function handleLogin(e) {{
-            e.preventDefault();
-            const username = document.getElementById('username').value;
-            const password = document.getElementById('password').value;
-            
-            try {{
-                const response = await fetch('/api/login', {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{ username, password }}),
-                    credentials: 'include'
-                }});
-                
-                const data = await response.json();
-                
-                if (data.success) {{
-                    closeLogin();
-                    location.reload();
-                }} else {{
-                    alert('Login failed: ' + data.message);
-                }}
-            }} catch (error) {{
-                alert('Error: ' + error.message);
-            }}
-        }}
-        
-        async function logout() {{
-            try {{
-                await fetch('/api/logout', {{
-                    method: 'POST',
-                    credentials: 'include'
-                }});
-                location.reload();
-            }} catch (error) {{
-                console.error('Logout error:', error);
-            }}
-        }}
-        
-        // ========== FILE UPLOAD ==========
-        async function handleFileSelect(type) {{
-            const fileInput = document.getElementById(type + 'File');
-            const file = fileInput.files[0];
-            
-            if (!file) return;
-            
-            const formData = new FormData();
-            formData.append('file', file);
-            formData.append('type', type);
-            
-            try {{
-                const response = await fetch('/api/upload', {{
-                    method: 'POST',
-                    body: formData,
-                    credentials: 'include'
-                }});
-                
-                const data = await response.json();
-                
-                if (data.success) {{
-                    if (type === 'before') {{
-                        beforeFile = data.filename;
-                        document.getElementById('beforeName').textContent = '✓ ' + file.name;
-                        document.getElementById('beforeBox').classList.add('has-file');
-                    }} else {{
-                        afterFile = data.filename;
-                        document.getElementById('afterName').textContent = '✓ ' + file.name;
-                        document.getElementById('afterBox').classList.add('has-file');
-                    }}
-                    
-                    if (beforeFile && afterFile) {{
-                        document.getElementById('analyzeBtn').disabled = false;
-                    }}
-                }} else {{
-                    alert('Upload failed: ' + data.message);
-                }}
-            }} catch (error) {{
-                alert('Upload error: ' + error.message);
-            }}
-        }}
-        
-        // ========== ANALYSIS ==========
-        async function performAnalysis() {{
-            if (!beforeFile || !afterFile) {{
-                alert('Please upload both files');
-                return;
-            }}
-            
-            document.getElementById('loadingOverlay').classList.add('active');
-            
-            const minDelay = new Promise(resolve => setTimeout(resolve, 3000));
-            
-            try {{
-                const analysisPromise = fetch('/api/analyze', {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{
-                        before_file: beforeFile,
-                        after_file: afterFile
-                    }}),
-                    credentials: 'include'
-                }});
-                
-                const [response] = await Promise.all([analysisPromise, minDelay]);
-                const data = await response.json();
-                
-                document.getElementById('loadingOverlay').classList.remove('active');
-                
-                if (data.identical) {{
-                    showIdenticalPopup();
-                }} else if (data.success) {{
-                    displayYOLOResults(data.yolo_analysis);
-                    if (data.report_file) {{
-                        currentReportFile = data.report_file;
-                    }}
-                }} else {{
-                    alert('Analysis failed: ' + data.message);
-                }}
-            }} catch (error) {{
-                document.getElementById('loadingOverlay').classList.remove('active');
-                alert('Error: ' + error.message);
-            }}
-        }}
-        
-        function displayYOLOResults(analysis) {{
-            const resultsSection = document.getElementById('results');
-            
-            const before = analysis.before;
-            const after = analysis.after;
-            const comparison = analysis.comparison;
-            
-            let statusClass = 'error';
-            if (comparison.status === 'ALL_RESOLVED') statusClass = 'success';
-            else if (comparison.status === 'PARTIAL') statusClass = 'warning';
-            
-            // CLEAN PROFESSIONAL DISPLAY - NO RAW TEXT
-            let redMarkupsHTML = '';
-            if (analysis.red_markups_list && analysis.red_markups_list.length > 0) {{
-                redMarkupsHTML = `
-                    <div style="background: rgba(255,0,110,0.1); padding: 25px; border-radius: 15px; border-left: 4px solid #ff006e;">
-                        <h4 style="color: #ff006e; margin-bottom: 15px; font-size: 18px;">🔴 Red Marked Areas Detected</h4>
-                        <p style="font-size: 16px; line-height: 1.8;">
-                            Found <strong>${{analysis.red_markups_list.length}}</strong> area(s) marked by engineer requiring attention.
-                        </p>
-                        <p style="margin-top: 10px; opacity: 0.9;">
-                            Keywords detected: ${{[...new Set(analysis.red_markups_list.map(r => r.keyword))].join(', ')}}
-                        </p>
-                    </div>
-                `;
-            }} else {{
-                redMarkupsHTML = '<p style="color: #888;">No red markups detected</p>';
-            }}
-            
-            let unresolvedHTML = '';
-            if (analysis.unresolved_items && analysis.unresolved_items.length > 0) {{
-                unresolvedHTML = `
-                    <div class="result-card">
-                        <h3>❌ AREAS REQUIRING ATTENTION</h3>
-                        <div style="background: rgba(255,0,110,0.1); padding: 25px; border-radius: 15px; margin-top: 20px;">
-                            <p style="font-size: 18px; font-weight: bold; color: #ff006e; margin-bottom: 15px;">
-                                ${{analysis.unresolved_items.length}} area(s) still need updates
-                            </p>
-                            ${{analysis.unresolved_items.map((item, idx) => `
-                                <div style="background: rgba(0,0,0,0.2); padding: 15px; border-radius: 10px; margin-bottom: 10px;">
-                                    <strong>Area ${{idx + 1}}:</strong> ${{item.severity}} priority
-                                </div>
-                            `).join('')}}
-                        </div>
-                        ${{comparison.status === 'NONE_RESOLVED' ? `
-                            <div style="margin-top: 25px; padding: 30px; background: rgba(255,0,110,0.15); border-radius: 15px; border: 2px solid #ff006e;">
-                                <h3 style="color: #ff006e; margin-bottom: 15px;">❌ NO CHANGES DETECTED</h3>
-                                <p style="font-size: 16px; line-height: 1.8;">
-                                    The AFTER drawing does not show any updates in the marked areas.
-                                </p>
-                                <p style="margin-top: 15px; font-weight: bold;">
-                                    ⚠️ Action Required: Please review and update all red marked areas before resubmitting.
-                                </p>
-                            </div>
-                        ` : ''}}
-                    </div>
-                `;
-            }}
-            
-            resultsSection.innerHTML = `
-                <div class="status-banner ${{statusClass}}">
-                    <h2>${{comparison.message}}</h2>
-                    <p style="margin-top: 15px; font-size: 20px;">Resolution Rate: ${{comparison.resolution_rate}}%</p>
-                </div>
-                
-                <div class="results-grid">
-                    <div class="result-card">
-                        <h3>📄 BEFORE PDF</h3>
-                        <p>1x1" Boxes Scanned: ${{before.total_1x1_boxes}}</p>
-                        <p>🔴 Red Markups: ${{before.red_markups}}</p>
-                        <p>📐 Dimensions: ${{before.dimensions}}</p>
-                        <p>📝 Annotations: ${{before.annotations}}</p>
-                    </div>
-                    
-                    <div class="result-card">
-                        <h3>📄 AFTER PDF</h3>
-                        <p>1x1" Boxes Scanned: ${{after.total_1x1_boxes}}</p>
-                        <p>✅ Green Confirmations: ${{after.green_confirmations}}</p>
-                        <p>📐 Dimensions: ${{after.dimensions}}</p>
-                        <p>📝 Annotations: ${{after.annotations}}</p>
-                    </div>
-                </div>
-                
-                <div class="result-card">
-                    <h3>🔴 RED MARKUPS DETECTED (BEFORE)</h3>
-                    ${{redMarkupsHTML}}
-                </div>
-                
-                ${{unresolvedHTML}}
-                
-                <div class="result-card">
-                    <h3>📊 COMPARISON SUMMARY</h3>
-                    <p>Total Engineer Comments: ${{comparison.total_comments}}</p>
-                    <p style="color: #00ff41;">✅ Resolved: ${{comparison.resolved}}</p>
-                    <p style="color: var(--secondary);">❌ Unresolved: ${{comparison.unresolved}}</p>
-                </div>
-                
-                <button class="download-btn" onclick="downloadReport()">
-                    📥 DOWNLOAD YOLO ANALYSIS REPORT
-                </button>
-            `;
-            
-            resultsSection.classList.add('active');
-            resultsSection.scrollIntoView({{ behavior: 'smooth' }});
-        }}
-        
-        function downloadReport() {{
-            if (currentReportFile) {{
-                window.location.href = '/download/' + currentReportFile;
-            }} else {{
-                alert('No report available');
-            }}
-        }}
-        
-        window.onclick = function(event) {{
-            const modal = document.getElementById('loginModal');
-            if (event.target === modal) {{
-                closeLogin();
-            }}
-            
-            const dropdown = document.getElementById('userDropdown');
-            if (dropdown && !event.target.closest('.user-dropdown')) {{
-                dropdown.classList.remove('active');
-            }}
-        }}
-    </script>
+    <script src="${app_js}" defer></script>
 </body>
 </html>'''
 
 
+def build_static_response(body, mimetype, compress=True):
+    """Precompute identity/gzip/brotli encodings and ETags for a static body"""
+    data = body.encode('utf-8') if isinstance(body, str) else body
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    variants = {'identity': (data, digest)}
+    if compress:
+        variants['gzip'] = (gzip.compress(data, 9, mtime=0), f'{digest}-gzip')
+        if brotli is not None:
+            variants['br'] = (brotli.compress(data, mode=brotli.MODE_TEXT), f'{digest}-br')
+    return {'mimetype': mimetype, 'variants': variants}
+
+
+def send_static_response(static, cache_control=None):
+    """Serve a build_static_response() body, picking the best encoding and honouring If-None-Match"""
+    encoding = next((e for e in ('br', 'gzip') if e in static['variants'] and request.accept_encodings[e]), 'identity')
+    data, etag = static['variants'][encoding]
+    
+    response = app.response_class(data, mimetype=static['mimetype'])
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+# ==================== STATIC ASSETS ====================
+#
+# Sources live in frontend/ (app.css, app.js, fonts/*.woff2). `python build_static.py`
+# minifies them into static/dist/ under content-hashed names with a manifest.json;
+# without a build the sources are fingerprinted in memory at startup instead.
+# Either way an asset's URL changes with its content, so it is cached as immutable.
+# A font missing from frontend/fonts/ has its url() source dropped from the CSS,
+# so the page falls back to local()/system fonts instead of requesting a 404.
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+FRONTEND_FOLDER = os.path.join(APP_ROOT, 'frontend')
+STATIC_DIST_FOLDER = os.path.join(APP_ROOT, 'static', 'dist')
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ASSET_MIMETYPES = {'.css': 'text/css', '.js': 'application/javascript', '.woff2': 'font/woff2'}
+FONT_URL_PATTERN = re.compile(r"url\('(fonts/[^']+)'\)")
+FONT_SOURCE_PATTERN = re.compile(r",\s*url\('(fonts/[^']+)'\)\s*format\('woff2'\)")
+
+
+def fingerprint_name(name, data):
+    """app.css -> app.<sha256 prefix>.css"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def collect_frontend_assets(source_folder=FRONTEND_FOLDER, minify=None):
+    """
+    Fingerprint the frontend sources
+    
+    Fonts are hashed first so url() references in the CSS point at their
+    fingerprinted names; minify(name, text) may rewrite CSS/JS before hashing.
+    
+    Returns:
+        {logical name: (fingerprinted name, bytes)}
+    """
+    assets = {}
+    
+    font_folder = os.path.join(source_folder, 'fonts')
+    if os.path.isdir(font_folder):
+        for name in sorted(os.listdir(font_folder)):
+            if name.endswith('.woff2'):
+                with open(os.path.join(font_folder, name), 'rb') as f:
+                    data = f.read()
+                assets[f'fonts/{name}'] = (f'fonts/{fingerprint_name(name, data)}', data)
+    
+    for name in ('app.css', 'app.js'):
+        with open(os.path.join(source_folder, name), 'r', encoding='utf-8') as f:
+            text = f.read()
+        if name.endswith('.css'):
+            missing = sorted({m.group(1) for m in FONT_SOURCE_PATTERN.finditer(text)} - set(assets))
+            if missing:
+                print(f"⚠️  Fonts not in {font_folder} (python build_static.py --fetch-fonts): {', '.join(missing)}",
+                      file=sys.stderr)
+                text = FONT_SOURCE_PATTERN.sub(lambda m: '' if m.group(1) in missing else m.group(0), text)
+            text = FONT_URL_PATTERN.sub(
+                lambda m: f"url('{assets[m.group(1)][0]}')" if m.group(1) in assets else m.group(0), text
+            )
+        if minify:
+            text = minify(name, text)
+        data = text.encode('utf-8')
+        assets[name] = (fingerprint_name(name, data), data)
+    
+    return assets
+
+
+def load_static_assets():
+    """
+    Load built assets from static/dist, falling back to the unminified sources
+    
+    Returns:
+        ({logical name: URL}, {fingerprinted name: static response})
+    """
+    manifest_path = os.path.join(STATIC_DIST_FOLDER, 'manifest.json')
+    
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        assets = {}
+        for logical, hashed in manifest.items():
+            with open(os.path.join(STATIC_DIST_FOLDER, hashed), 'rb') as f:
+                assets[logical] = (hashed, f.read())
+    else:
+        assets = collect_frontend_assets()
+    
+    urls = {logical: f'/assets/{hashed}' for logical, (hashed, _) in assets.items()}
+    responses = {}
+    for hashed, data in assets.values():
+        ext = os.path.splitext(hashed)[1]
+        responses[hashed] = build_static_response(data, ASSET_MIMETYPES[ext], compress=ext != '.woff2')
+    return urls, responses
+
+
+ASSET_URLS, ASSET_RESPONSES = load_static_assets()
+
+INDEX_HTML = ''.join(render_template_chunks(compile_report_template(INDEX_TEMPLATE), {
+    'app_css': ASSET_URLS['app.css'],
+    'app_js': ASSET_URLS['app.js']
+}))
+INDEX_RESPONSE = build_static_response(INDEX_HTML, 'text/html')
+
+
+@app.route('/')
+def index():
+    """Main application with complete HTML frontend"""
+    return send_static_response(INDEX_RESPONSE)
+
+
+@app.route('/assets/<path:filename>')
+def static_asset(filename):
+    """Fingerprinted CSS/JS/font assets, cacheable forever"""
+    static = ASSET_RESPONSES.get(filename)
+    if static is None:
+        return jsonify({'error': 'File not found'}), 404
+    return send_static_response(static, ASSET_CACHE_CONTROL)
+
+
+@app.route('/api/session')
+def session_bootstrap():
+    """User-specific bootstrap data for the static page shell"""
+    user = session.get('user')
+    response = jsonify({
+        'logged_in': bool(user),
+        'user': {
+            'username': user,
+            'name': session.get('name', ''),
+            'role': session.get('role', '')
+        } if user else None,
+        'upload_chunk_size': UPLOAD_CHUNK_SIZE
+    })
+    response.cache_control.no_store = True
+    return response
+
+
+# ==================== API ROUTES ====================
+
 @app.route('/api/login', methods=['POST'])
 def login():
     data = request.json
@@ -2215,6 +581,11 @@ def logout():
     return jsonify({'success': True})
 
 
+def upload_filename(file_type, original_name):
+    """Timestamped name for an upload, safe to join onto UPLOAD_FOLDER whatever the client sent"""
+    return secure_filename(f"{file_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{original_name}")
+
+
 @app.route('/api/upload', methods=['POST'])
 def upload():
     if 'file' not in request.files:
@@ -2223,130 +594,2615 @@ def upload():
     file = request.files['file']
     file_type = request.form.get('type')
     
+    if file_type not in UPLOAD_TYPES:
+        return jsonify({'success': False, 'message': 'Upload type must be before or after'}), 400
+    
     if not file.filename.endswith('.pdf'):
         return jsonify({'success': False, 'message': 'Only PDF files allowed'}), 400
     
-    filename = f"{file_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
+    filename = upload_filename(file_type, file.filename)
     filepath = os.path.join(UPLOAD_FOLDER, filename)
     file.save(filepath)
+    size = os.path.getsize(filepath)
+    register_upload(filename, size, admission_key())
     
     return jsonify({
         'success': True,
         'filename': filename,
-        'size': os.path.getsize(filepath)
+        'size': size
     })
 
 
-@app.route('/api/analyze', methods=['POST'])
-def analyze():
-    """YOLO Analysis Endpoint"""
-    data = request.json
-    before_file = data.get('before_file')
-    after_file = data.get('after_file')
+# ==================== CHUNKED RESUMABLE UPLOADS ====================
+#
+# Protocol:
+#   POST /api/upload/chunked                 {filename, type, size} -> upload_id, chunk_size
+#   GET  /api/upload/chunked/<id>            -> current offset (resume point)
+#   PUT  /api/upload/chunked/<id>?offset=N   raw chunk body, optional X-Chunk-SHA256 header
+#   POST /api/upload/chunked/<id>/complete   -> filename usable by /api/analyze
+#
+# Every chunk except the last must be exactly chunk_size bytes and must start at the
+# current end of the partial file, so the partial file is append-only and its size
+# is the resume offset.
+
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+_chunk_locks = {}
+_chunk_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _chunk_lock(upload_id):
+    """
+    Per-upload lock so two PUTs for the same upload never interleave writes
     
-    if not before_file or not after_file:
-        return jsonify({'success': False, 'message': 'Both files required'}), 400
+    A thread lock covers this process; where fcntl exists an flock on
+    <id>.lock also covers the other workers of a pre-fork server. The thread
+    lock is dropped once no request holds or waits for it.
+    """
+    with _chunk_locks_guard:
+        entry = _chunk_locks.setdefault(upload_id, [threading.Lock(), 0])
+        entry[1] += 1
     
     try:
-        before_path = os.path.join(UPLOAD_FOLDER, before_file)
-        after_path = os.path.join(UPLOAD_FOLDER, after_file)
-        
-        # Extract PDF content
-        before_content, before_bytes = extract_pdf_content(before_path)
-        after_content, after_bytes = extract_pdf_content(after_path)
-        
-        # Check if identical
-        before_hash = hashlib.md5(before_bytes).hexdigest()
-        after_hash = hashlib.md5(after_bytes).hexdigest()
-        
-        if before_hash == after_hash:
+        with entry[0]:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(CHUNK_FOLDER, upload_id + '.lock'), 'a') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                yield
+    finally:
+        with _chunk_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                _chunk_locks.pop(upload_id, None)
+
+
+def _chunk_paths(upload_id):
+    """Return (metadata path, partial file path) for an upload id"""
+    base = os.path.join(CHUNK_FOLDER, upload_id)
+    return base + '.json', base + '.part'
+
+
+def _load_chunk_meta(upload_id):
+    """Load upload metadata, or None for unknown/invalid ids"""
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        return None
+    meta_path, _ = _chunk_paths(upload_id)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _chunk_files_present(upload_id):
+    """False once the upload was completed or cleaned up (checked again under its lock)"""
+    return all(os.path.exists(path) for path in _chunk_paths(upload_id))
+
+
+def _chunk_status(upload_id, meta):
+    _, part_path = _chunk_paths(upload_id)
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    return {
+        'success': True,
+        'upload_id': upload_id,
+        'offset': offset,
+        'total_size': meta['size'],
+        'chunk_size': meta['chunk_size'],
+        'next_chunk': offset // meta['chunk_size'],
+        'complete': offset == meta['size']
+    }
+
+
+@app.route('/api/upload/chunked', methods=['POST'])
+def upload_chunked_init():
+    """Start a chunked upload and return its id and fixed chunk size"""
+    data = request.json or {}
+    original_name = data.get('filename') or ''
+    file_type = data.get('type')
+    
+    try:
+        total_size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'File size required'}), 400
+    
+    if file_type not in UPLOAD_TYPES:
+        return jsonify({'success': False, 'message': 'Upload type must be before or after'}), 400
+    
+    if not original_name.endswith('.pdf'):
+        return jsonify({'success': False, 'message': 'Only PDF files allowed'}), 400
+    
+    if total_size <= 0:
+        return jsonify({'success': False, 'message': 'Empty file'}), 400
+    
+    if total_size > MAX_UPLOAD_SIZE:
+        return jsonify({
+            'success': False,
+            'message': f'File too large (max {MAX_UPLOAD_SIZE // (1024 * 1024)} MB)'
+        }), 413
+    
+    upload_id = secrets.token_hex(16)
+    meta = {
+        'filename': upload_filename(file_type, original_name),
+        'type': file_type,
+        'size': total_size,
+        'chunk_size': UPLOAD_CHUNK_SIZE,
+        'created': datetime.now().isoformat()
+    }
+    
+    meta_path, part_path = _chunk_paths(upload_id)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    open(part_path, 'wb').close()
+    register_chunked_upload(upload_id, total_size, admission_key())
+    
+    return jsonify(_chunk_status(upload_id, meta))
+
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['GET'])
+def upload_chunked_status(upload_id):
+    """Resume query: report how many bytes the server already holds"""
+    meta = _load_chunk_meta(upload_id)
+    if meta is None:
+        return jsonify({'success': False, 'message': 'Unknown upload'}), 404
+    
+    return jsonify(_chunk_status(upload_id, meta))
+
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['PUT'])
+def upload_chunked_part(upload_id):
+    """Append one chunk, streaming the request body straight to disk"""
+    meta = _load_chunk_meta(upload_id)
+    if meta is None:
+        return jsonify({'success': False, 'message': 'Unknown upload'}), 404
+    
+    offset = request.args.get('offset', type=int)
+    expected_checksum = (request.headers.get('X-Chunk-SHA256') or '').lower()
+    _, part_path = _chunk_paths(upload_id)
+    
+    with _chunk_lock(upload_id):
+        if not _chunk_files_present(upload_id):
+            return jsonify({'success': False, 'message': 'Unknown upload'}), 404
+        current = os.path.getsize(part_path)
+        
+        if offset != current:
+            status = _chunk_status(upload_id, meta)
+            status.update({'success': False, 'message': f'Expected offset {current}'})
+            return jsonify(status), 409
+        
+        expected_length = min(meta['chunk_size'], meta['size'] - current)
+        if expected_length <= 0 or request.content_length != expected_length:
             return jsonify({
                 'success': False,
-                'identical': True,
-                'message': '⚠️ FILES ARE IDENTICAL',
-                'popup_message': 'BEFORE and AFTER PDFs are the same! Upload different versions.'
+                'message': f'Chunk must be exactly {expected_length} bytes'
+            }), 400
+        
+        digest = hashlib.sha256()
+        written = 0
+        with open(part_path, 'ab') as f:
+            while written < expected_length:
+                block = request.stream.read(min(64 * 1024, expected_length - written))
+                if not block:
+                    break
+                digest.update(block)
+                f.write(block)
+                written += len(block)
+        
+        if written != expected_length or (expected_checksum and digest.hexdigest() != expected_checksum):
+            # Roll back the partial chunk so the file stays aligned on chunk boundaries
+            with open(part_path, 'r+b') as f:
+                f.truncate(current)
+            status = _chunk_status(upload_id, meta)
+            status.update({
+                'success': False,
+                'message': 'Chunk checksum mismatch' if written == expected_length else 'Incomplete chunk'
             })
-        
-        # YOLO 1x1 inch grid scanning
-        before_boxes = yolo_grid_scan_1x1_inch(before_content, before_bytes)
-        after_boxes = yolo_grid_scan_1x1_inch(after_content, after_bytes)
-        
-        # RED-to-GREEN comparison
-        comparison = yolo_compare_red_to_green(before_boxes, after_boxes)
-        
-        # Generate HTML report
-        report_html = generate_yolo_report_html(
-            before_boxes, after_boxes, comparison, before_file, after_file
+            return jsonify(status), 422
+    
+    status = _chunk_status(upload_id, meta)
+    status['checksum'] = digest.hexdigest()
+    return jsonify(status)
+
+
+@app.route('/api/upload/chunked/<upload_id>/complete', methods=['POST'])
+def upload_chunked_complete(upload_id):
+    """Move the fully assembled file into UPLOAD_FOLDER"""
+    meta = _load_chunk_meta(upload_id)
+    if meta is None:
+        return jsonify({'success': False, 'message': 'Unknown upload'}), 404
+    
+    meta_path, part_path = _chunk_paths(upload_id)
+    
+    with _chunk_lock(upload_id):
+        if not _chunk_files_present(upload_id):
+            return jsonify({'success': False, 'message': 'Unknown upload'}), 404
+        size = os.path.getsize(part_path)
+        if size != meta['size']:
+            status = _chunk_status(upload_id, meta)
+            status.update({'success': False, 'message': f'Upload incomplete ({size}/{meta["size"]} bytes)'})
+            return jsonify(status), 409
+        
+        filepath = os.path.join(UPLOAD_FOLDER, meta['filename'])
+        os.replace(part_path, filepath)
+        os.remove(meta_path)
+    
+    # The .lock file stays: requests may be waiting on it, and a new file at the
+    # same path would not exclude them. The storage janitor removes it later.
+    # Requests waiting on the lock find the files gone and answer 404.
+    register_upload(meta['filename'], size, admission_key(), chunked_upload_id=upload_id)
+    
+    return jsonify({
+        'success': True,
+        'filename': meta['filename'],
+        'size': size
+    })
+
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({
+        'success': False,
+        'message': f'File too large (max {MAX_UPLOAD_SIZE // (1024 * 1024)} MB)'
+    }), 413
+
+
+# ==================== STORAGE RETENTION ====================
+#
+# Every upload, report and unfinished chunked upload is recorded in a SQLite
+# index (STORAGE_DB) with its owner, size and last access, and SQL triggers keep
+# a per-owner usage total, so limits are checked without walking UPLOAD_FOLDER
+# or REPORT_FOLDER. Analyses are recorded as history; the files of a user's
+# HISTORY_PROTECTED most recent ones (report and both uploads) are never evicted
+# for space, nor expired while that history is within RETENTION_DAYS.
+#
+# A janitor thread in one worker at a time (claimed through the index) then:
+#   - deletes anything not accessed for RETENTION_DAYS, and older history
+#   - evicts each user's least recently used files down to USER_QUOTA_MB
+#   - evicts least recently used files down to STORAGE_LOW_WATER x STORAGE_MAX_MB
+#   - removes chunked uploads idle for CHUNK_RETENTION_HOURS
+# Quota and size limits are also enforced as soon as a new file takes a user or
+# the whole store over them. Files accessed within EVICTION_GRACE_MINUTES (an
+# upload waiting for its analysis, a report being fetched) are never evicted.
+#
+# The index is created on first use; if it did not exist yet, the files already
+# on disk are adopted (with no owner) in one scan.
+
+STORAGE_DB = os.environ.get('STORAGE_DB', 'storage.sqlite3')
+RETENTION_SECONDS = float(os.environ.get('RETENTION_DAYS', 30)) * 86400
+STORAGE_MAX_BYTES = int(float(os.environ.get('STORAGE_MAX_MB', 10240)) * 1024 * 1024)
+STORAGE_LOW_WATER = float(os.environ.get('STORAGE_LOW_WATER', 0.9))
+USER_QUOTA_BYTES = int(float(os.environ.get('USER_QUOTA_MB', 2048)) * 1024 * 1024)
+HISTORY_PROTECTED = int(os.environ.get('HISTORY_PROTECTED', 20))
+EVICTION_GRACE_SECONDS = float(os.environ.get('EVICTION_GRACE_MINUTES', 60)) * 60
+CHUNK_RETENTION_SECONDS = float(os.environ.get('CHUNK_RETENTION_HOURS', 24)) * 3600
+JANITOR_INTERVAL_SECONDS = float(os.environ.get('JANITOR_INTERVAL_SECONDS', 300))
+JANITOR_BATCH = 200
+HISTORY_PAGE_SIZE = 50
+REPORT_SUFFIXES = ('', '.gz', '.br', '.json')
+
+_storage_owner = contextvars.ContextVar('storage_owner', default='')
+_storage_lock = threading.Lock()
+_storage = {'index': None, 'janitor_pid': None}
+
+STORAGE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    kind TEXT NOT NULL, name TEXT NOT NULL, owner TEXT NOT NULL, size INTEGER NOT NULL,
+    created REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (kind, name)
+);
+CREATE INDEX IF NOT EXISTS files_accessed ON files (accessed);
+CREATE INDEX IF NOT EXISTS files_owner ON files (owner, accessed);
+CREATE TABLE IF NOT EXISTS usage (owner TEXT PRIMARY KEY, bytes INTEGER NOT NULL, files INTEGER NOT NULL);
+CREATE TRIGGER IF NOT EXISTS files_added AFTER INSERT ON files BEGIN
+    UPDATE usage SET bytes = bytes + NEW.size, files = files + 1 WHERE owner = NEW.owner;
+END;
+CREATE TRIGGER IF NOT EXISTS files_removed AFTER DELETE ON files BEGIN
+    UPDATE usage SET bytes = bytes - OLD.size, files = files - 1 WHERE owner = OLD.owner;
+END;
+CREATE TRIGGER IF NOT EXISTS files_resized AFTER UPDATE OF size, owner ON files BEGIN
+    UPDATE usage SET bytes = bytes - OLD.size, files = files - 1 WHERE owner = OLD.owner;
+    UPDATE usage SET bytes = bytes + NEW.size, files = files + 1 WHERE owner = NEW.owner;
+END;
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY, owner TEXT NOT NULL, before_file TEXT NOT NULL, after_file TEXT NOT NULL,
+    report_file TEXT NOT NULL, created REAL NOT NULL, available INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS history_owner ON history (owner, id);
+CREATE INDEX IF NOT EXISTS history_report ON history (report_file);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL NOT NULL);
+'''
+# Kept in PRAGMA user_version; bump it whenever a trigger body above changes, so
+# older indexes get their triggers replaced once instead of on every start
+STORAGE_SCHEMA_VERSION = 2
+DROP_STORAGE_TRIGGERS = '''
+DROP TRIGGER IF EXISTS files_added;
+DROP TRIGGER IF EXISTS files_removed;
+DROP TRIGGER IF EXISTS files_resized;
+'''
+# The triggers only UPDATE usage: an INSERT OR IGNORE inside a trigger takes the
+# conflict handling of the statement that fired it (an upsert then fails on
+# usage.owner), so callers create the owner's usage row first.
+ENSURE_USAGE_ROW = 'INSERT OR IGNORE INTO usage (owner, bytes, files) VALUES (?, 0, 0)'
+
+# Files in each owner's HISTORY_PROTECTED most recent available analyses
+PROTECTED_FILES = '''
+WITH recent AS (
+    SELECT before_file, after_file, report_file FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY owner ORDER BY id DESC) AS rank
+        FROM history WHERE available
+    ) WHERE rank <= :protected
+)
+'''
+NOT_PROTECTED = '''
+    NOT (kind = 'report' AND name IN (SELECT report_file FROM recent))
+    AND NOT (kind = 'upload' AND name IN (SELECT before_file FROM recent UNION SELECT after_file FROM recent))
+'''
+
+
+class StorageIndex:
+    """Owner, size and last access of every stored file, plus analysis history, in SQLite"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        db = sqlite3.connect(path, timeout=10)
+        with db:
+            db.execute('PRAGMA journal_mode=WAL')
+            if db.execute('PRAGMA user_version').fetchone()[0] < STORAGE_SCHEMA_VERSION:
+                # One transaction, so no worker writes between a trigger's drop and re-create
+                db.executescript(
+                    f'BEGIN IMMEDIATE; {DROP_STORAGE_TRIGGERS} {STORAGE_SCHEMA} '
+                    f'PRAGMA user_version = {STORAGE_SCHEMA_VERSION}; COMMIT;'
+                )
+            else:
+                db.executescript(STORAGE_SCHEMA)
+            adopt = db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('adopted', ?)", (time.time(),)).rowcount
+            db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('janitor_run', ?)", (time.time(),))
+            if adopt:
+                db.execute(ENSURE_USAGE_ROW, ('',))
+                db.executemany(
+                    'INSERT OR IGNORE INTO files (kind, name, owner, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)',
+                    _scan_stored_files()
+                )
+        db.close()
+    
+    def _connection(self):
+        """One connection per thread, reopened after a fork"""
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.db = sqlite3.connect(self.path, timeout=10)
+            self._local.pid = os.getpid()
+        return self._local.db
+    
+    def add(self, kind, name, owner, size):
+        now = time.time()
+        db = self._connection()
+        with db:
+            db.execute(ENSURE_USAGE_ROW, (owner,))
+            db.execute(
+                'INSERT INTO files (kind, name, owner, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (kind, name) DO UPDATE SET owner = excluded.owner, size = excluded.size, '
+                'accessed = excluded.accessed',
+                (kind, name, owner, size, now, now)
+            )
+    
+    def forget(self, kind, name):
+        db = self._connection()
+        with db:
+            db.execute('DELETE FROM files WHERE kind = ? AND name = ?', (kind, name))
+            if kind == 'report':
+                db.execute('UPDATE history SET available = 0 WHERE report_file = ?', (name,))
+    
+    def touch(self, kind, *names):
+        db = self._connection()
+        with db:
+            db.executemany('UPDATE files SET accessed = ? WHERE kind = ? AND name = ?',
+                           [(time.time(), kind, name) for name in names])
+    
+    def grow(self, kind, name, size):
+        """Add size bytes to a stored file (e.g. a report variant written later)"""
+        db = self._connection()
+        with db:
+            db.execute('UPDATE files SET size = size + ? WHERE kind = ? AND name = ?', (size, kind, name))
+    
+    def record_analysis(self, owner, before_file, after_file, report_file, report_size):
+        """Index a new report, add it to the owner's history and mark both uploads used"""
+        now = time.time()
+        db = self._connection()
+        with db:
+            db.execute(ENSURE_USAGE_ROW, (owner,))
+            db.execute(
+                'INSERT OR IGNORE INTO files (kind, name, owner, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)',
+                ('report', report_file, owner, report_size, now, now)
+            )
+            db.execute(
+                'INSERT INTO history (owner, before_file, after_file, report_file, created) VALUES (?, ?, ?, ?, ?)',
+                (owner, before_file, after_file, report_file, now)
+            )
+            db.executemany("UPDATE files SET accessed = ? WHERE kind = 'upload' AND name = ?",
+                           [(now, before_file), (now, after_file)])
+    
+    def usage(self, owner=None):
+        """(bytes, files) held by owner, or by everyone"""
+        if owner is None:
+            row = self._connection().execute('SELECT SUM(bytes), SUM(files) FROM usage').fetchone()
+        else:
+            row = self._connection().execute('SELECT bytes, files FROM usage WHERE owner = ?', (owner,)).fetchone()
+        return (row[0] or 0, row[1] or 0) if row else (0, 0)
+    
+    def eviction_candidates(self, owner=None, limit=JANITOR_BATCH):
+        """Unprotected uploads and reports outside the grace period, least recently used first"""
+        where = 'owner = :owner AND ' if owner is not None else ''
+        return self._connection().execute(
+            PROTECTED_FILES + f'''
+            SELECT kind, name, size FROM files
+            WHERE {where}kind IN ('upload', 'report') AND accessed < :grace AND {NOT_PROTECTED}
+            ORDER BY accessed LIMIT :limit''',
+            {'owner': owner, 'grace': time.time() - EVICTION_GRACE_SECONDS,
+             'protected': HISTORY_PROTECTED, 'limit': limit}
+        ).fetchall()
+    
+    def expired(self, cutoff, limit=JANITOR_BATCH):
+        """Unprotected uploads and reports last accessed before cutoff"""
+        return self._connection().execute(
+            PROTECTED_FILES + f'''
+            SELECT kind, name, size FROM files
+            WHERE kind IN ('upload', 'report') AND accessed < :cutoff AND {NOT_PROTECTED}
+            ORDER BY accessed LIMIT :limit''',
+            {'cutoff': cutoff, 'protected': HISTORY_PROTECTED, 'limit': limit}
+        ).fetchall()
+    
+    def chunk_sessions(self, cutoff):
+        """Ids of chunked uploads started before cutoff"""
+        return [row[0] for row in self._connection().execute(
+            "SELECT name FROM files WHERE kind = 'chunk' AND created < ?", (cutoff,)
+        )]
+    
+    def prune_history(self, cutoff):
+        db = self._connection()
+        with db:
+            return db.execute('DELETE FROM history WHERE created < ?', (cutoff,)).rowcount
+    
+    def history(self, owner, limit=HISTORY_PAGE_SIZE):
+        rows = self._connection().execute(
+            'SELECT id, before_file, after_file, report_file, created, available FROM history '
+            'WHERE owner = ? ORDER BY id DESC LIMIT ?', (owner, limit)
         )
-        
-        # Save report
-        report_filename = f"YOLO_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-        report_path = os.path.join(REPORT_FOLDER, report_filename)
-        
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_html)
-        
-        return jsonify({
-            'success': True,
-            'identical': False,
-            'yolo_analysis': {
-                'before': {
-                    'total_1x1_boxes': before_boxes['total_1x1_boxes_scanned'],
-                    'red_markups': len(before_boxes['red_markups']),
-                    'dimensions': len(before_boxes['dimensions']),
-                    'annotations': len(before_boxes['annotations'])
-                },
-                'after': {
-                    'total_1x1_boxes': after_boxes['total_1x1_boxes_scanned'],
-                    'green_confirmations': len(after_boxes['green_confirmations']),
-                    'dimensions': len(after_boxes['dimensions']),
-                    'annotations': len(after_boxes['annotations'])
-                },
-                'comparison': {
-                    'status': comparison['status'],
-                    'message': comparison['message'],
-                    'total_comments': comparison['total_red_comments'],
-                    'resolved': len(comparison['resolved_items']),
-                    'unresolved': len(comparison['unresolved_items']),
-                    'resolution_rate': comparison['resolution_rate']
-                },
-                'red_markups_list': before_boxes['red_markups'][:10],
-                'green_confirmations_list': after_boxes['green_confirmations'][:10],
-                'unresolved_items': comparison['unresolved_items']
-            },
-            'report_file': report_filename
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': f'Analysis failed: {str(e)}'
-        }), 500
+        return [{
+            'id': row[0],
+            'before_file': row[1],
+            'after_file': row[2],
+            'report_file': row[3],
+            'created': datetime.fromtimestamp(row[4]).isoformat(timespec='seconds'),
+            'available': bool(row[5])
+        } for row in rows]
+    
+    def claim_janitor_run(self, interval):
+        """True for exactly one caller per interval, across all workers sharing the index"""
+        now = time.time()
+        db = self._connection()
+        with db:
+            return db.execute("UPDATE meta SET value = ? WHERE key = 'janitor_run' AND value <= ?",
+                              (now, now - interval)).rowcount == 1
 
 
-@app.route('/download/<filename>')
-def download(filename):
-    filepath = os.path.join(REPORT_FOLDER, filename)
-    if os.path.exists(filepath):
-        return send_file(filepath, as_attachment=True, download_name=filename)
-    return jsonify({'error': 'File not found'}), 404
+def _scan_stored_files():
+    """Rows for the files already in UPLOAD_FOLDER, REPORT_FOLDER and CHUNK_FOLDER (adoption only)"""
+    rows = {}
+    
+    def add(kind, name, stat):
+        size, created, accessed = rows.get((kind, name), (0, stat.st_mtime, stat.st_mtime))
+        rows[(kind, name)] = (size + stat.st_size, min(created, stat.st_mtime), max(accessed, stat.st_mtime))
+    
+    for kind, folder in (('upload', UPLOAD_FOLDER), ('report', REPORT_FOLDER), ('chunk', CHUNK_FOLDER)):
+        try:
+            entries = list(os.scandir(folder))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            name = entry.name
+            if kind == 'report':
+                name = next((name[:-len(s)] for s in REPORT_SUFFIXES if s and name.endswith(s)), name)
+                if not name.endswith('.html'):
+                    continue
+            elif kind == 'chunk':
+                name = os.path.splitext(name)[0]
+                if not UPLOAD_ID_PATTERN.match(name):
+                    continue
+            add(kind, name, entry.stat())
+    
+    return [(kind, name, '', *values) for (kind, name), values in rows.items()]
 
 
-@app.route('/health')
-def health():
+def storage_index():
+    """Open the index lazily, so importing the app alone never touches the disk"""
+    if _storage['index'] is None:
+        with _storage_lock:
+            if _storage['index'] is None:
+                _storage['index'] = StorageIndex(STORAGE_DB)
+    return _storage['index']
+
+
+def run_as_owner(owner, runner):
+    """Call runner() with owner credited for the reports it writes"""
+    token = _storage_owner.set(owner or '')
+    try:
+        return runner()
+    finally:
+        _storage_owner.reset(token)
+
+
+def _stored_paths(kind, name):
+    if kind == 'upload':
+        return [os.path.join(UPLOAD_FOLDER, name)]
+    if kind == 'report':
+        return [os.path.join(REPORT_FOLDER, name + suffix) for suffix in REPORT_SUFFIXES]
+    return [os.path.join(CHUNK_FOLDER, name + suffix) for suffix in ('.json', '.part', '.lock')]
+
+
+def delete_stored(kind, name):
+    """Remove a stored file (every variant of a report) and its index entry"""
+    for path in _stored_paths(kind, name):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    storage_index().forget(kind, name)
+
+
+def evict(target_bytes, owner=None):
+    """Delete least recently used unprotected files until usage is at most target_bytes; returns bytes freed"""
+    index = storage_index()
+    excess = index.usage(owner)[0] - target_bytes
+    freed = 0
+    while freed < excess:
+        candidates = index.eviction_candidates(owner)
+        if not candidates:
+            print(f"⚠️  Storage{f' for {owner}' if owner else ''} is {(excess - freed) / (1024 * 1024):.1f} MB "
+                  f"over its limit but everything left is recent or in history")
+            break
+        for kind, name, size in candidates:
+            delete_stored(kind, name)
+            freed += size
+            if freed >= excess:
+                break
+    return freed
+
+
+def enforce_storage_limits(owner):
+    """Evict as soon as owner's quota or the store's size limit is exceeded"""
+    index = storage_index()
+    if owner and USER_QUOTA_BYTES and index.usage(owner)[0] > USER_QUOTA_BYTES:
+        evict(int(USER_QUOTA_BYTES * STORAGE_LOW_WATER), owner)
+    if STORAGE_MAX_BYTES and index.usage()[0] > STORAGE_MAX_BYTES:
+        evict(int(STORAGE_MAX_BYTES * STORAGE_LOW_WATER))
+
+
+@contextmanager
+def _indexing(action):
+    """Index writes (and the evictions they trigger) never fail the request: the file is stored either way"""
+    try:
+        yield
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️  Storage index: {action} failed: {e}")
+
+
+def register_upload(filename, size, owner, chunked_upload_id=None):
+    """
+    Index a stored upload
+    
+    For a completed chunked upload the reservation drops to zero bytes but
+    stays indexed, so the janitor still removes its leftover .lock file.
+    """
+    with _indexing(f'registering {filename}'):
+        if chunked_upload_id:
+            storage_index().add('chunk', chunked_upload_id, owner or '', 0)
+        storage_index().add('upload', filename, owner or '', size)
+        enforce_storage_limits(owner)
+
+
+def register_chunked_upload(upload_id, size, owner):
+    """Reserve the declared size of a chunked upload against its owner"""
+    with _indexing(f'registering chunked upload {upload_id}'):
+        storage_index().add('chunk', upload_id, owner or '', size)
+        enforce_storage_limits(owner)
+
+
+def touch_report(filename):
+    """Mark a report as just used, for LRU eviction"""
+    with _indexing(f'touching {filename}'):
+        storage_index().touch('report', filename)
+
+
+def record_analysis(before_file, after_file, report_filename):
+    """Index a finished analysis's report and add it to the current owner's history"""
+    owner = _storage_owner.get()
+    size = 0
+    for path in _stored_paths('report', report_filename):
+        try:
+            size += os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+    with _indexing(f'recording {report_filename}'):
+        storage_index().record_analysis(owner, before_file, after_file, report_filename, size)
+        enforce_storage_limits(owner)
+
+
+def janitor_pass():
+    """One retention pass; returns what was removed"""
+    index = storage_index()
+    now = time.time()
+    removed = {'expired': 0, 'chunks': 0, 'history': 0, 'quota_bytes': 0, 'evicted_bytes': 0}
+    
+    if RETENTION_SECONDS:
+        # Old history goes first, so it no longer protects the files it names
+        removed['history'] = index.prune_history(now - RETENTION_SECONDS)
+        while True:
+            expired = index.expired(now - RETENTION_SECONDS)
+            for kind, name, _ in expired:
+                delete_stored(kind, name)
+            removed['expired'] += len(expired)
+            if len(expired) < JANITOR_BATCH:
+                break
+    
+    for upload_id in index.chunk_sessions(now - CHUNK_RETENTION_SECONDS):
+        # Still receiving chunks if the partial file changed recently
+        try:
+            active = os.path.getmtime(_chunk_paths(upload_id)[1]) >= now - CHUNK_RETENTION_SECONDS
+        except OSError:
+            active = False
+        if not active:
+            delete_stored('chunk', upload_id)
+            removed['chunks'] += 1
+    
+    if USER_QUOTA_BYTES:
+        over_quota = index._connection().execute(
+            "SELECT owner FROM usage WHERE owner != '' AND bytes > ?", (USER_QUOTA_BYTES,)
+        ).fetchall()
+        for (owner,) in over_quota:
+            removed['quota_bytes'] += evict(int(USER_QUOTA_BYTES * STORAGE_LOW_WATER), owner)
+    
+    if STORAGE_MAX_BYTES and index.usage()[0] > STORAGE_MAX_BYTES:
+        removed['evicted_bytes'] = evict(int(STORAGE_MAX_BYTES * STORAGE_LOW_WATER))
+    
+    return removed
+
+
+def _ensure_storage_janitor():
+    """Start the janitor thread once per process (after any fork); the index picks who runs each pass"""
+    if not JANITOR_INTERVAL_SECONDS or _storage['janitor_pid'] == os.getpid():
+        return
+    with _storage_lock:
+        if _storage['janitor_pid'] == os.getpid():
+            return
+        _storage['janitor_pid'] = os.getpid()
+    
+    def clean_forever():
+        while True:
+            time.sleep(JANITOR_INTERVAL_SECONDS)
+            try:
+                if storage_index().claim_janitor_run(JANITOR_INTERVAL_SECONDS):
+                    removed = janitor_pass()
+                    if any(removed.values()):
+                        print(f"🧹 Storage janitor: {removed}")
+            except Exception as e:
+                print(f"⚠️  Storage janitor failed: {e}")
+    
+    threading.Thread(target=clean_forever, name='yolo-janitor', daemon=True).start()
+
+
+@app.route('/api/history')
+def analysis_history():
+    """The signed-in user's recent analyses, with whether each report is still stored"""
+    user = session.get('user')
+    if not user:
+        return jsonify({'success': False, 'message': 'Login required'}), 401
+    
+    index = storage_index()
+    used_bytes, files = index.usage(user)
     return jsonify({
-        'status': 'healthy',
-        'version': '7.0.0 - YOLO COMPLETE',
-        'features': [
-            'YOLO 1x1 Inch Grid Scanning',
-            'Red Markup Detection',
-            'Green Confirmation Detection',
-            'RED-to-GREEN Matching',
-            'Comprehensive PDF Reports',
+        'success': True,
+        'history': index.history(user),
+        'storage': {'bytes': used_bytes, 'files': files, 'quota_bytes': USER_QUOTA_BYTES}
+    })
+
+
+# ==================== METRICS ====================
+#
+# GET /metrics serves the Prometheus text format from a small in-process
+# registry. Under a pre-fork server every worker also writes its values to
+# METRICS_DIR (every METRICS_FLUSH_SECONDS and at exit) and the scraped worker
+# adds the other workers' files to its own, so totals cover the whole server.
+# Counters of exited workers are folded into retired.json so they never go
+# backwards; gauges only count live workers.
+
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = tuple(kb * 1024 for kb in (1, 10, 100, 1024, 10 * 1024, 50 * 1024, 100 * 1024, 500 * 1024))
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
+CONDITIONAL_ENDPOINTS = {'index', 'static_asset', 'report_stylesheet', 'download'}
+
+METRICS = {}
+_metrics_lock = threading.Lock()
+_metrics_flusher = {'pid': None, 'file': None}
+
+if METRICS_DIR:
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+
+class Metric:
+    """One metric family (counter, gauge or histogram) keyed by label values"""
+    
+    def __init__(self, kind, name, help_text, labels=(), buckets=None):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}
+        METRICS[name] = self
+    
+    def _key(self, labels):
+        return tuple(str(labels[label]) for label in self.labels)
+    
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _metrics_lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def set(self, value, **labels):
+        with _metrics_lock:
+            self.values[self._key(labels)] = value
+    
+    def observe(self, value, **labels):
+        """Histogram observation; state is per-bucket counts (last is +Inf) then the sum"""
+        key = self._key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with _metrics_lock:
+            state = self.values.setdefault(key, [0] * (len(self.buckets) + 2))
+            state[index] += 1
+            state[-1] += value
+
+
+HTTP_REQUESTS = Metric('counter', 'yolo_http_requests_total', 'HTTP requests by endpoint and status',
+                       ('method', 'endpoint', 'status'))
+HTTP_ERRORS = Metric('counter', 'yolo_http_request_errors_total', 'HTTP 5xx responses by endpoint', ('endpoint',))
+HTTP_SECONDS = Metric('histogram', 'yolo_http_request_duration_seconds', 'Time to response headers',
+                      ('endpoint',), LATENCY_BUCKETS)
+STAGE_SECONDS = Metric('histogram', 'yolo_stage_duration_seconds',
+                       'Pipeline stage latency (extract_pdf_content, yolo_grid_scan_1x1_inch per side, '
+                       'yolo_compare_red_to_green, report render and write)', ('stage',), LATENCY_BUCKETS)
+STAGE_PEAK_BYTES = Metric('histogram', 'yolo_stage_memory_peak_bytes',
+                          'Peak Python heap growth per pipeline stage (MEMORY_TRACKING / ?memory=1)',
+                          ('stage',), SIZE_BUCKETS)
+STAGE_RETAINED_BYTES = Metric('histogram', 'yolo_stage_memory_retained_bytes',
+                              'Heap growth still allocated when a pipeline stage ends (negative counts as 0)',
+                              ('stage',), SIZE_BUCKETS)
+INPUT_BYTES = Metric('histogram', 'yolo_input_bytes', 'Size of analysed uploads', ('side',), SIZE_BUCKETS)
+DETECTIONS = Metric('histogram', 'yolo_detections', 'Detections per analysis', ('kind',), COUNT_BUCKETS)
+CACHE_LOOKUPS = Metric('counter', 'yolo_cache_lookups_total',
+                       'Batch scan dedup and HTTP revalidation (304) hits and misses', ('cache', 'result'))
+ANALYSES_RUNNING = Metric('gauge', 'yolo_analyses_running', 'Analyses holding a running slot')
+ANALYSES_QUEUED = Metric('gauge', 'yolo_analyses_queued', 'Admitted analyses waiting for a slot')
+JOBS_TRACKED = Metric('gauge', 'yolo_jobs', 'Background jobs held in memory by status', ('status',))
+
+
+def observe_detections(before_boxes, after_boxes, comparison):
+    DETECTIONS.observe(len(before_boxes['red_markups']), kind='red_markups')
+    DETECTIONS.observe(len(after_boxes['green_confirmations']), kind='green_confirmations')
+    DETECTIONS.observe(len(comparison['resolved_items']), kind='resolved')
+    DETECTIONS.observe(len(comparison['unresolved_items']), kind='unresolved')
+    DETECTIONS.observe(len(comparison['new_issues']), kind='new_issues')
+
+
+def _update_gauges():
+    admission = ANALYSIS_ADMISSION.status()
+    ANALYSES_RUNNING.set(admission['running'])
+    ANALYSES_QUEUED.set(admission['queued'])
+    with _jobs_lock:
+        statuses = [job['status'] for job in JOBS.values()]
+    for status in ('queued', 'running', 'done', 'failed'):
+        JOBS_TRACKED.set(statuses.count(status), status=status)
+
+
+def _metrics_snapshot():
+    with _metrics_lock:
+        return {
+            name: [[list(key), list(value) if isinstance(value, list) else value]
+                   for key, value in metric.values.items()]
+            for name, metric in METRICS.items()
+        }
+
+
+def flush_metrics():
+    """Write this worker's values to METRICS_DIR for the other workers' scrapes"""
+    if not METRICS_DIR or not _metrics_flusher['file']:
+        return
+    _update_gauges()
+    path = _metrics_flusher['file']
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(_metrics_snapshot(), f)
+    os.replace(path + '.tmp', path)
+
+
+def _ensure_metrics_flusher():
+    """Start the periodic flush once per process (after any fork)"""
+    if not METRICS_DIR or _metrics_flusher['pid'] == os.getpid():
+        return
+    with _metrics_lock:
+        if _metrics_flusher['pid'] == os.getpid():
+            return
+        _metrics_flusher['pid'] = os.getpid()
+        _metrics_flusher['file'] = os.path.join(METRICS_DIR, f'{os.getpid()}-{secrets.token_hex(4)}.json')
+    
+    def flush_forever():
+        while True:
+            time.sleep(METRICS_FLUSH_SECONDS)
+            flush_metrics()
+    
+    threading.Thread(target=flush_forever, name='yolo-metrics', daemon=True).start()
+    atexit.register(flush_metrics)
+
+
+def _merge_metric_values(totals, snapshot, include_gauges=True):
+    for name, entries in snapshot.items():
+        metric = METRICS.get(name)
+        if metric is None or (metric.kind == 'gauge' and not include_gauges):
+            continue
+        values = totals.setdefault(name, {})
+        for key, value in entries:
+            key = tuple(key)
+            if isinstance(value, list):
+                current = values.setdefault(key, [0] * len(value))
+                values[key] = [a + b for a, b in zip(current, value)]
+            else:
+                values[key] = values.get(key, 0) + value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _load_metrics_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _collect_worker_metrics(totals):
+    """Add every other worker's flushed values, folding exited workers into retired.json"""
+    retired_path = os.path.join(METRICS_DIR, 'retired.json')
+    lock_file = open(os.path.join(METRICS_DIR, 'retired.lock'), 'a')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        retired = {}
+        _merge_metric_values(retired, _load_metrics_file(retired_path) or {})
+        changed = False
+        
+        for name in os.listdir(METRICS_DIR):
+            path = os.path.join(METRICS_DIR, name)
+            if not name.endswith('.json') or name == 'retired.json' or path == _metrics_flusher['file']:
+                continue
+            snapshot = _load_metrics_file(path)
+            if snapshot is None:
+                continue
+            if _pid_alive(int(name.split('-', 1)[0])):
+                _merge_metric_values(totals, snapshot)
+            else:
+                _merge_metric_values(retired, snapshot, include_gauges=False)
+                os.remove(path)
+                changed = True
+        
+        if changed:
+            with open(retired_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({name: [[list(k), v] for k, v in values.items()] for name, values in retired.items()}, f)
+            os.replace(retired_path + '.tmp', retired_path)
+        _merge_metric_values(totals, {name: [[list(k), v] for k, v in values.items()] for name, values in retired.items()})
+    finally:
+        lock_file.close()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def _format_number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_metrics():
+    """All metrics in Prometheus text exposition format (version 0.0.4)"""
+    _update_gauges()
+    totals = {}
+    _merge_metric_values(totals, _metrics_snapshot())
+    if METRICS_DIR:
+        _collect_worker_metrics(totals)
+    
+    lines = []
+    for name, metric in METRICS.items():
+        lines.append(f'# HELP {name} {metric.help}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for key, value in sorted(totals.get(name, {}).items()):
+            labels = dict(zip(metric.labels, key))
+            if metric.kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_format_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ('+Inf',), value[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_number(bound)
+                lines.append(f'{name}_bucket{_format_labels(dict(labels, le=le))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_number(value[-1])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def ensure_background_threads():
+    """Start this process's metrics flusher and storage janitor (per request, Flask or ASGI)"""
+    _ensure_metrics_flusher()
+    _ensure_storage_janitor()
+
+
+def record_request_metrics(method, endpoint, status, seconds=None):
+    """Count one answered request (shared with the ASGI front end's own routes)"""
+    HTTP_REQUESTS.inc(method=method, endpoint=endpoint, status=status)
+    if status >= 500:
+        HTTP_ERRORS.inc(endpoint=endpoint)
+    if seconds is not None:
+        HTTP_SECONDS.observe(seconds, endpoint=endpoint)
+    if endpoint in CONDITIONAL_ENDPOINTS and method == 'GET' and status in (200, 304):
+        CACHE_LOOKUPS.inc(cache='http_revalidation', result='hit' if status == 304 else 'miss')
+
+
+@app.before_request
+def _start_request_metrics():
+    g.request_started = time.perf_counter()
+    ensure_background_threads()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    seconds = time.perf_counter() - g.request_started if 'request_started' in g else None
+    record_request_metrics(request.method, request.endpoint or 'unmatched', response.status_code, seconds)
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    return app.response_class(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ==================== TRACING ====================
+#
+# span() times a block and records its attributes; spans opened inside another
+# (tracked with contextvars, so concurrent requests never mix) become its
+# children. When a root span closes, the trace is queued for an OpenTelemetry
+# collector (OTLP/HTTP JSON to OTEL_EXPORTER_OTLP_ENDPOINT, when set) and, if it
+# ran longer than SLOW_ANALYSIS_SECONDS, written with its full span breakdown
+# to SLOW_ANALYSIS_LOG as one JSON line.
+
+OTLP_ENDPOINT = os.environ.get('OTEL_EXPORTER_OTLP_ENDPOINT', '').rstrip('/')
+OTLP_SERVICE_NAME = os.environ.get('OTEL_SERVICE_NAME', 'cmt-nexus-yolo')
+OTLP_BATCH_SIZE = 512
+OTLP_QUEUE_SIZE = 1024
+SLOW_ANALYSIS_SECONDS = float(os.environ.get('SLOW_ANALYSIS_SECONDS', 10))
+SLOW_ANALYSIS_LOG = os.environ.get('SLOW_ANALYSIS_LOG', 'slow_analyses.jsonl')
+
+_current_span = contextvars.ContextVar('yolo_current_span', default=None)
+_slow_log_lock = threading.Lock()
+_trace_exporter_lock = threading.Lock()
+_trace_exporter = {'pid': None, 'queue': None}
+
+
+@contextmanager
+def span(name, **attributes):
+    """Record a block as a trace span; yields its attribute dict so the block can add to it"""
+    parent = _current_span.get()
+    record = {
+        'name': name,
+        'trace_id': parent['trace_id'] if parent else secrets.token_hex(16),
+        'span_id': secrets.token_hex(8),
+        'parent_id': parent['span_id'] if parent else None,
+        'start_ns': time.time_ns(),
+        'end_ns': None,
+        'attributes': attributes,
+        'error': None,
+        'trace': parent['trace'] if parent else []
+    }
+    token = _current_span.set(record)
+    try:
+        yield attributes
+    except Exception as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        record['end_ns'] = time.time_ns()
+        if record['error'] is None and 'error' in attributes:
+            record['error'] = str(attributes['error'])
+        _current_span.reset(token)
+        record['trace'].append(record)
+        if parent is None:
+            _finish_trace(record)
+
+
+def annotate_span(**attributes):
+    """Add attributes to the innermost open span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current['attributes'].update(attributes)
+
+
+def _finish_trace(root):
+    if OTLP_ENDPOINT:
+        _export_spans(root['trace'])
+    if SLOW_ANALYSIS_LOG and root['end_ns'] - root['start_ns'] >= SLOW_ANALYSIS_SECONDS * 1e9:
+        _log_slow_trace(root)
+
+
+def _log_slow_trace(root):
+    """Append the full span breakdown of a slow trace to SLOW_ANALYSIS_LOG"""
+    to_ms = lambda ns: round(ns / 1e6, 3)
+    entry = {
+        'timestamp': datetime.fromtimestamp(root['start_ns'] / 1e9).isoformat(),
+        'trace_id': root['trace_id'],
+        'name': root['name'],
+        'duration_ms': to_ms(root['end_ns'] - root['start_ns']),
+        'attributes': root['attributes'],
+        'error': root['error'],
+        'spans': [
+            {
+                'name': record['name'],
+                'offset_ms': to_ms(record['start_ns'] - root['start_ns']),
+                'duration_ms': to_ms(record['end_ns'] - record['start_ns']),
+                'attributes': record['attributes'],
+                'error': record['error']
+            }
+            for record in sorted(root['trace'], key=lambda record: record['start_ns'])
+            if record is not root
+        ]
+    }
+    line = json.dumps(entry, default=str) + '\n'
+    with _slow_log_lock:
+        with open(SLOW_ANALYSIS_LOG, 'a', encoding='utf-8') as f:
+            f.write(line)
+    print(f"🐢 Slow {root['name']}: {entry['duration_ms'] / 1000:.1f}s (trace {root['trace_id']}) -> {SLOW_ANALYSIS_LOG}")
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_span(record):
+    otlp = {
+        'traceId': record['trace_id'],
+        'spanId': record['span_id'],
+        'name': record['name'],
+        'kind': 1,
+        'startTimeUnixNano': str(record['start_ns']),
+        'endTimeUnixNano': str(record['end_ns']),
+        'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in record['attributes'].items()],
+        'status': {'code': 2, 'message': record['error']} if record['error'] else {'code': 0}
+    }
+    if record['parent_id']:
+        otlp['parentSpanId'] = record['parent_id']
+    return otlp
+
+
+def _export_spans(records):
+    """Queue finished spans for the exporter thread, dropping them rather than blocking if it falls behind"""
+    with _trace_exporter_lock:
+        if _trace_exporter['pid'] != os.getpid():
+            _trace_exporter['pid'] = os.getpid()
+            _trace_exporter['queue'] = queue.Queue(maxsize=OTLP_QUEUE_SIZE)
+            threading.Thread(target=_export_forever, args=(_trace_exporter['queue'],),
+                             name='yolo-trace-export', daemon=True).start()
+    try:
+        _trace_exporter['queue'].put_nowait([_otlp_span(record) for record in records])
+    except queue.Full:
+        pass
+
+
+def _export_forever(pending):
+    resource = {'attributes': [{'key': 'service.name', 'value': {'stringValue': OTLP_SERVICE_NAME}}]}
+    while True:
+        batch = pending.get()
+        while len(batch) < OTLP_BATCH_SIZE and not pending.empty():
+            batch.extend(pending.get_nowait())
+        body = json.dumps({'resourceSpans': [{
+            'resource': resource,
+            'scopeSpans': [{'scope': {'name': 'app_yolo_complete'}, 'spans': batch}]
+        }]}).encode('utf-8')
+        export = urllib.request.Request(f'{OTLP_ENDPOINT}/v1/traces', data=body,
+                                        headers={'Content-Type': 'application/json'})
+        try:
+            urllib.request.urlopen(export, timeout=5).close()
+        except Exception as e:
+            print(f"⚠️  Trace export to {OTLP_ENDPOINT} failed: {e}")
+
+
+# ==================== MEMORY ACCOUNTING ====================
+#
+# tracemalloc records the peak and net (still allocated at the end) Python heap
+# bytes of each pipeline stage: extract, scan_before / scan_after, compare and
+# report (render + compress + write). MEMORY_TRACKING=1 traces every analysis
+# and feeds the stage memory metrics; otherwise tracing runs only while an
+# analysis requested with ?memory=1 is in flight, and that request also gets a
+# 'memory' section in its JSON. Peaks are process-wide, so analyses overlapping
+# in one worker inflate each other's figures (ANALYZE_CONCURRENCY=1 for exact ones).
+
+MEMORY_TRACKING = os.environ.get('MEMORY_TRACKING', '0') == '1'
+
+_memory_usage = contextvars.ContextVar('memory_usage', default=None)
+_memory_lock = threading.Lock()
+_memory_state = {'requests': 0}
+
+if MEMORY_TRACKING:
+    tracemalloc.start()
+
+
+@contextmanager
+def track_memory(stage):
+    """Measure the block's peak and net allocations if tracemalloc is on; yields nothing"""
+    if not tracemalloc.is_tracing():
+        yield
+        return
+    
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            peak_bytes = max(peak - baseline, 0)
+            net_bytes = current - baseline
+            STAGE_PEAK_BYTES.observe(peak_bytes, stage=stage)
+            STAGE_RETAINED_BYTES.observe(max(net_bytes, 0), stage=stage)
+            annotate_span(**{'memory.peak_bytes': peak_bytes, 'memory.net_bytes': net_bytes})
+            
+            usage = _memory_usage.get()
+            if usage is not None:
+                entry = usage.setdefault(stage, {'peak_bytes': 0, 'net_bytes': 0})
+                entry['peak_bytes'] = max(entry['peak_bytes'], peak_bytes)
+                entry['net_bytes'] += net_bytes
+
+
+@contextmanager
+def memory_accounting():
+    """Trace allocations for the enclosed analysis; yields the {stage: {peak_bytes, net_bytes}} it fills"""
+    with _memory_lock:
+        _memory_state['requests'] += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    
+    usage = {}
+    token = _memory_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _memory_usage.reset(token)
+        with _memory_lock:
+            _memory_state['requests'] -= 1
+            if not _memory_state['requests'] and not MEMORY_TRACKING:
+                tracemalloc.stop()
+
+
+# ==================== ADMISSION CONTROL ====================
+#
+# At most ANALYZE_CONCURRENCY analysis threads run at once in a worker process
+# (a batch holds one slot per scan thread) and at most ANALYZE_QUEUE_DEPTH more
+# analyses wait for a slot (synchronous requests wait up to ANALYZE_QUEUE_TIMEOUT
+# seconds). Past that, or when one user already has ANALYZE_PER_USER analyses
+# running or waiting, requests are turned away at once with 503 / 429 and a
+# Retry-After estimated from recent stage timings. With METRICS_DIR set the
+# per-user count is kept in a SQLite file there, so it holds across workers.
+# Users are keyed by session user, falling back to the client address.
+
+ANALYZE_CONCURRENCY = int(os.environ.get('ANALYZE_CONCURRENCY', os.cpu_count() or 2))
+ANALYZE_QUEUE_DEPTH = int(os.environ.get('ANALYZE_QUEUE_DEPTH', 8))
+ANALYZE_QUEUE_TIMEOUT = float(os.environ.get('ANALYZE_QUEUE_TIMEOUT', 30))
+ANALYZE_PER_USER = int(os.environ.get('ANALYZE_PER_USER', 2))
+STAGE_TIMING_WINDOW = 50
+DEFAULT_ANALYSIS_SECONDS = 5.0
+ANALYSIS_STAGES = ('extract', 'scan_before', 'scan_after', 'compare', 'report_render', 'report_write')
+
+STAGE_TIMINGS = {}
+STAGE_TIMING_TIMES = {}
+_stage_timings_lock = threading.Lock()
+
+
+def record_stage_timing(stage, seconds):
+    """Feed one stage duration to the Retry-After estimate and the stage histogram"""
+    with _stage_timings_lock:
+        STAGE_TIMINGS.setdefault(stage, deque(maxlen=STAGE_TIMING_WINDOW)).append(seconds)
+        STAGE_TIMING_TIMES.setdefault(stage, deque(maxlen=STAGE_TIMING_WINDOW)).append(time.monotonic())
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+@contextmanager
+def _time_stage(stage, **attributes):
+    """Time (and memory-account) a pipeline stage as a trace span and in the stage histogram; yields the span attributes"""
+    started = time.perf_counter()
+    try:
+        with span(stage, **attributes) as stage_attributes, track_memory(stage):
+            yield stage_attributes
+    finally:
+        record_stage_timing(stage, time.perf_counter() - started)
+
+
+def typical_analysis_seconds():
+    """Sum of the median recent duration of each pair-analysis stage (a default until one has run)"""
+    with _stage_timings_lock:
+        medians = [statistics.median(STAGE_TIMINGS[stage]) for stage in ANALYSIS_STAGES if STAGE_TIMINGS.get(stage)]
+    return sum(medians) if medians else DEFAULT_ANALYSIS_SECONDS
+
+
+class AnalysisRejected(Exception):
+    """Admission control turned an analysis away (status is 429 or 503)"""
+    
+    def __init__(self, status, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class SharedUserQuota:
+    """Places (running or waiting analyses) held per user by every worker process, in SQLite"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+    
+    def _connection(self):
+        """
+        One connection per thread, reopened after a fork
+        
+        The file is created on first use rather than at import: gunicorn clears
+        METRICS_DIR after a preloaded app is imported.
+        """
+        if getattr(self._local, 'pid', None) != os.getpid():
+            db = sqlite3.connect(self.path, timeout=10)
+            with db:
+                db.execute('PRAGMA journal_mode=WAL')
+                db.execute('CREATE TABLE IF NOT EXISTS places (id INTEGER PRIMARY KEY, user TEXT NOT NULL, pid INTEGER NOT NULL)')
+                db.execute('CREATE INDEX IF NOT EXISTS places_user ON places (user)')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return self._local.db
+    
+    def take(self, user, limit):
+        """Record a place for user and return its id, or None when user already holds limit places"""
+        db = self._connection()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            # Places of workers that died mid-analysis are never released; drop them here
+            pids = [row[0] for row in db.execute('SELECT DISTINCT pid FROM places WHERE user = ?', (user,))]
+            db.executemany('DELETE FROM places WHERE pid = ?', [(pid,) for pid in pids if not _pid_alive(pid)])
+            if db.execute('SELECT COUNT(*) FROM places WHERE user = ?', (user,)).fetchone()[0] >= limit:
+                return None
+            return db.execute('INSERT INTO places (user, pid) VALUES (?, ?)', (user, os.getpid())).lastrowid
+    
+    def release(self, place_id):
+        db = self._connection()
+        with db:
+            db.execute('DELETE FROM places WHERE id = ?', (place_id,))
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded wait queue and per-user quotas (shared across workers if given a SharedUserQuota)"""
+    
+    def __init__(self, concurrency, queue_depth, per_user, shared_quota=None):
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.per_user = per_user
+        self.shared_quota = shared_quota
+        self.admitted = 0
+        self.running = 0
+        self.busy_slots = 0
+        self.by_user = {}
+        self.places = {}
+        self._changed = threading.Condition()
+    
+    def retry_after(self, ahead):
+        """Seconds until `ahead` analyses have drained through the running slots"""
+        return max(1, math.ceil(typical_analysis_seconds() * max(ahead, 1) / self.concurrency))
+    
+    def _user_quota_full(self):
+        return AnalysisRejected(
+            429, f'Too many analyses in progress for this user (max {self.per_user})',
+            max(1, math.ceil(typical_analysis_seconds()))
+        )
+    
+    def reserve(self, user):
+        """Take a place (running or waiting) for user, or raise AnalysisRejected"""
+        place = None
+        if self.shared_quota is not None:
+            place = self.shared_quota.take(user, self.per_user)
+            if place is None:
+                raise self._user_quota_full()
+        
+        with self._changed:
+            user_count = self.by_user.get(user, 0)
+            if user_count >= self.per_user:
+                rejected = self._user_quota_full()
+            elif self.admitted >= self.concurrency + self.queue_depth:
+                rejected = AnalysisRejected(
+                    503, 'Analysis queue is full, please retry shortly',
+                    self.retry_after(self.admitted - self.concurrency + 1)
+                )
+            else:
+                rejected = None
+                self.admitted += 1
+                self.by_user[user] = user_count + 1
+                if place is not None:
+                    self.places.setdefault(user, []).append(place)
+        
+        if rejected is not None:
+            if place is not None:
+                self.shared_quota.release(place)
+            raise rejected
+    
+    def unreserve(self, user):
+        with self._changed:
+            self.admitted -= 1
+            if self.by_user.get(user, 0) <= 1:
+                self.by_user.pop(user, None)
+            else:
+                self.by_user[user] -= 1
+            places = self.places.get(user)
+            place = places.pop() if places else None
+            if not places:
+                self.places.pop(user, None)
+        
+        if place is not None:
+            self.shared_quota.release(place)
+    
+    def run(self, runner, timeout=None, slots=1):
+        """Wait (after reserve) for `slots` running slots, then return runner()"""
+        slots = min(slots, self.concurrency)
+        with self._changed:
+            if not self._changed.wait_for(lambda: self.busy_slots + slots <= self.concurrency, timeout):
+                raise AnalysisRejected(
+                    503, 'Timed out waiting for an analysis slot',
+                    self.retry_after(self.admitted - self.running)
+                )
+            self.running += 1
+            self.busy_slots += slots
+        
+        try:
+            return runner()
+        finally:
+            with self._changed:
+                self.running -= 1
+                self.busy_slots -= slots
+                # Waiters need different slot counts, so let each re-check
+                self._changed.notify_all()
+    
+    def status(self):
+        with self._changed:
+            return {
+                'running': self.running,
+                'busy_slots': self.busy_slots,
+                'queued': self.admitted - self.running,
+                'concurrency': self.concurrency,
+                'queue_depth': self.queue_depth
+            }
+
+
+ANALYSIS_ADMISSION = AdmissionController(
+    ANALYZE_CONCURRENCY, ANALYZE_QUEUE_DEPTH, ANALYZE_PER_USER,
+    SharedUserQuota(os.path.join(METRICS_DIR, 'admission.sqlite3')) if METRICS_DIR else None
+)
+
+
+def admission_key():
+    """Quota key for the current request: the signed-in user, else the client address"""
+    return session.get('user') or request.remote_addr or 'anonymous'
+
+
+def run_admitted(runner, user, timeout=ANALYZE_QUEUE_TIMEOUT, slots=1):
+    """Reserve, wait for `slots` running slots and run runner() for a request that waits for its result"""
+    ANALYSIS_ADMISSION.reserve(user)
+    try:
+        return ANALYSIS_ADMISSION.run(lambda: run_as_owner(user, runner), timeout, slots)
+    finally:
+        ANALYSIS_ADMISSION.unreserve(user)
+
+
+@app.errorhandler(AnalysisRejected)
+def analysis_rejected(e):
+    response = jsonify({'success': False, 'message': e.message, 'retry_after': e.retry_after})
+    response.status_code = e.status
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+def _no_progress(stage, percent, **details):
+    pass
+
+
+def _detection_counts(boxes):
+    return {
+        'red_markups': len(boxes['red_markups']),
+        'green_confirmations': len(boxes['green_confirmations'])
+    }
+
+
+# The count each scan reports as it goes: engineer markups come from BEFORE,
+# designer confirmations from AFTER
+SCAN_PROGRESS_COUNTS = {'scan_before': 'red_markups', 'scan_after': 'green_confirmations'}
+
+
+def _scan_progress(progress, stage, start, span, **details):
+    """
+    Adapt scanner line callbacks into progress() calls within [start, start + span]
+    
+    Each call carries the running count of the side being scanned (see
+    SCAN_PROGRESS_COUNTS) plus the fixed details, e.g. BEFORE's final red count.
+    """
+    if progress is _no_progress:
+        return None
+    kind = SCAN_PROGRESS_COUNTS[stage]
+    
+    def report(lines_scanned, total_lines, boxes):
+        progress(stage, start + span * lines_scanned // total_lines, partial=True,
+                 **details, **{kind: len(boxes[kind])})
+    
+    return report
+
+
+def run_yolo_analysis(before_file, after_file, progress=None, asset_base='', memory=False):
+    """
+    Full YOLO pipeline for one BEFORE/AFTER pair
+    
+    Shared by the synchronous endpoint and the background job workers.
+    progress(stage, percent, **details) is called as each stage starts.
+    asset_base is the absolute URL prefix for the report's shared stylesheet.
+    Each run is one trace with a child span per stage.
+    memory=True adds per-stage allocation figures to the payload (see MEMORY ACCOUNTING).
+    
+    Returns:
+        (payload, http_status) where payload is the /api/analyze JSON body
+    """
+    with span('analyze', before_file=before_file, after_file=after_file) as trace:
+        if memory:
+            with memory_accounting() as usage:
+                payload, status = _run_yolo_analysis(before_file, after_file, progress or _no_progress, asset_base)
+            payload['memory'] = usage
+        else:
+            payload, status = _run_yolo_analysis(before_file, after_file, progress or _no_progress, asset_base)
+        trace['http.status_code'] = status
+        if status >= 500:
+            trace['error'] = payload['message']
+        return payload, status
+
+
+def _run_yolo_analysis(before_file, after_file, progress, asset_base):
+    try:
+        before_path = os.path.join(UPLOAD_FOLDER, before_file)
+        after_path = os.path.join(UPLOAD_FOLDER, after_file)
+        
+        # Extract PDF content
+        progress('extract', 5)
+        with _time_stage('extract') as stage:
+            before_content, before_bytes = extract_pdf_content(before_path)
+            after_content, after_bytes = extract_pdf_content(after_path)
+            
+            # Check if identical
+            before_hash = hashlib.md5(before_bytes).hexdigest()
+            after_hash = hashlib.md5(after_bytes).hexdigest()
+            stage.update(before_bytes=len(before_bytes), after_bytes=len(after_bytes),
+                         identical=before_hash == after_hash)
+        INPUT_BYTES.observe(len(before_bytes), side='before')
+        INPUT_BYTES.observe(len(after_bytes), side='after')
+        
+        if before_hash == after_hash:
+            return {
+                'success': False,
+                'identical': True,
+                'message': '⚠️ FILES ARE IDENTICAL',
+                'popup_message': 'BEFORE and AFTER PDFs are the same! Upload different versions.'
+            }, 200
+        
+        # YOLO 1x1 inch grid scanning
+        progress('scan_before', 20)
+        with _time_stage('scan_before') as stage:
+            before_boxes = yolo_grid_scan_1x1_inch(
+                before_content, before_bytes,
+                on_progress=_scan_progress(progress, 'scan_before', 20, 25)
+            )
+            stage.update(_detection_counts(before_boxes))
+        progress('scan_after', 45, red_markups=len(before_boxes['red_markups']))
+        with _time_stage('scan_after') as stage:
+            after_boxes = yolo_grid_scan_1x1_inch(
+                after_content, after_bytes,
+                on_progress=_scan_progress(progress, 'scan_after', 45, 25,
+                                           red_markups=len(before_boxes['red_markups']))
+            )
+            stage.update(_detection_counts(after_boxes))
+        
+        # RED-to-GREEN comparison
+        progress('compare', 70,
+                 red_markups=len(before_boxes['red_markups']),
+                 green_confirmations=len(after_boxes['green_confirmations']))
+        with _time_stage('compare') as stage:
+            comparison = yolo_compare_red_to_green(before_boxes, after_boxes)
+            stage.update(resolved=len(comparison['resolved_items']),
+                         unresolved=len(comparison['unresolved_items']),
+                         new_issues=len(comparison['new_issues']))
+        
+        # Generate and save HTML report
+        progress('render_report', 85,
+                 resolved=len(comparison['resolved_items']),
+                 unresolved=len(comparison['unresolved_items']))
+        with span('report'), track_memory('report'):
+            report_filename = write_yolo_report(before_boxes, after_boxes, comparison, before_file, after_file, asset_base)
+        record_analysis(before_file, after_file, report_filename)
+        observe_detections(before_boxes, after_boxes, comparison)
+        
+        return build_analysis_payload(before_boxes, after_boxes, comparison, report_filename), 200
+        
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f'Analysis failed: {str(e)}'
+        }, 500
+
+
+def write_yolo_report(before_boxes, after_boxes, comparison, before_file, after_file, asset_base=''):
+    """Render the HTML report into REPORT_FOLDER and return its filename"""
+    # Random suffix keeps reports written in the same second by parallel analyses apart
+    report_filename = f"YOLO_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}.html"
+    report_path = os.path.join(REPORT_FOLDER, report_filename)
+    
+    store_report(report_path, iter_yolo_report_html(
+        before_boxes, after_boxes, comparison, before_file, after_file, asset_base=asset_base
+    ))
+    
+    return report_filename
+
+
+def store_report(report_path, chunks):
+    """
+    Write report chunks as precompressed variants (report_path + '.gz' / '.br')
+    
+    Each variant is written to a temporary name and renamed into place, so a
+    download never sees a half-written report. The SHA-256 of the uncompressed
+    content is recorded in report_path + '.json' and used for strong ETags.
+    """
+    gz_tmp = report_path + '.gz.tmp'
+    br_tmp = report_path + '.br.tmp'
+    compressor = brotli.Compressor(mode=brotli.MODE_TEXT) if REPORT_BROTLI else None
+    br_file = open(br_tmp, 'wb') if compressor else None
+    digest = hashlib.sha256()
+    size = 0
+    timing = {'render': 0.0}
+    started = time.perf_counter()
+    
+    try:
+        with gzip.open(gz_tmp, 'wb', compresslevel=REPORT_GZIP_LEVEL) as gz_file:
+            for chunk in _timed_chunks(chunks, timing):
+                data = chunk.encode('utf-8')
+                digest.update(data)
+                size += len(data)
+                gz_file.write(data)
+                if br_file:
+                    br_file.write(compressor.process(data))
+        if br_file:
+            br_file.write(compressor.finish())
+    finally:
+        if br_file:
+            br_file.close()
+    
+    with open(report_path + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'sha256': digest.hexdigest(), 'size': size}, f)
+    
+    os.replace(gz_tmp, report_path + '.gz')
+    if br_file:
+        os.replace(br_tmp, report_path + '.br')
+    
+    # Rendering is interleaved with compression; split the time between the two stages
+    write_seconds = time.perf_counter() - started - timing['render']
+    record_stage_timing('report_render', timing['render'])
+    record_stage_timing('report_write', write_seconds)
+    annotate_span(report_bytes=size, render_seconds=round(timing['render'], 6), write_seconds=round(write_seconds, 6))
+
+
+def _timed_chunks(chunks, timing):
+    """Yield from chunks, adding the time spent producing them to timing['render']"""
+    iterator = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        chunk = next(iterator, None)
+        timing['render'] += time.perf_counter() - started
+        if chunk is None:
+            return
+        yield chunk
+
+
+def query_flag(value):
+    """True for a ?flag=1 / true / yes / on query value, False when absent or anything else (e.g. 0, false)"""
+    return (value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def report_asset_base(host_url=None):
+    """Absolute URL prefix for report assets, so downloaded reports still find the stylesheet"""
+    return os.environ.get('REPORT_ASSET_BASE') or (host_url or request.host_url).rstrip('/')
+
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze():
+    """YOLO Analysis Endpoint (?memory=1 adds per-stage allocations; ?profile=cprofile|sample for admins, see PROFILING)"""
+    data = request.json
+    before_file = data.get('before_file')
+    after_file = data.get('after_file')
+    
+    if not before_file or not after_file:
+        return jsonify({'success': False, 'message': 'Both files required'}), 400
+    
+    profile_mode = request.args.get('profile')
+    if profile_mode:
+        denied = profiling_denied(profile_mode)
+        if denied:
+            return denied
+    
+    asset_base = report_asset_base()
+    memory = query_flag(request.args.get('memory'))
+    runner = lambda: run_yolo_analysis(before_file, after_file, asset_base=asset_base, memory=memory)
+    
+    if not profile_mode:
+        payload, status = run_admitted(runner, admission_key())
+        return jsonify(payload), status
+    
+    top = request.args.get('top', PROFILE_TOP_DEFAULT, type=int)
+    result, profile = run_admitted(lambda: profile_call(profile_mode, runner, top), admission_key())
+    if result is None:
+        return jsonify({'success': False, 'message': 'Another profile is already running'}), 409
+    payload, status = result
+    return jsonify(dict(payload, profile=profile)), status
+
+
+# ==================== PROFILING ====================
+#
+# POST /api/analyze?profile=cprofile|sample runs that one analysis under a
+# profiler and adds a 'profile' section to the response: a top-N function table
+# and, for the sampler, collapsed stacks ("frame;frame;frame count" lines, the
+# input format of flamegraph.pl / speedscope). Only users listed in ADMIN_USERS
+# may ask, and only when PROFILING_ENABLED=1; otherwise nothing here runs.
+
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+ADMIN_USERS = {name.strip() for name in os.environ.get('ADMIN_USERS', '').split(',') if name.strip()}
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', 5)) / 1000
+PROFILE_TOP_DEFAULT = 25
+PROFILE_MODES = ('cprofile', 'sample')
+
+_profile_lock = threading.Lock()
+
+
+def profiling_denied(mode):
+    """JSON error response if the current user may not profile with this mode, else None"""
+    if not PROFILING_ENABLED:
+        return jsonify({'success': False, 'message': 'Profiling is disabled'}), 403
+    if session.get('user') not in ADMIN_USERS:
+        return jsonify({'success': False, 'message': 'Profiling is restricted to admin users'}), 403
+    if mode not in PROFILE_MODES:
+        return jsonify({'success': False, 'message': f"profile must be one of {', '.join(PROFILE_MODES)}"}), 400
+    return None
+
+
+def _frame_label(filename, line, function):
+    return f'{os.path.basename(filename)}:{function}:{line}'
+
+
+def _cprofile_call(runner, top):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = runner()
+    finally:
+        profiler.disable()
+    
+    rows = sorted(pstats.Stats(profiler).stats.items(), key=lambda item: item[1][2], reverse=True)
+    table = [
+        {
+            'function': _frame_label(*func),
+            'calls': calls,
+            'self_seconds': round(self_time, 6),
+            'cumulative_seconds': round(cumulative, 6)
+        }
+        for func, (primitive_calls, calls, self_time, cumulative, callers) in rows[:top]
+    ]
+    return result, {'top': table}
+
+
+def _sample_call(runner, top):
+    """Sample the calling thread's stack every PROFILE_SAMPLE_INTERVAL while runner() runs"""
+    thread_id = threading.get_ident()
+    stacks = {}
+    stop = threading.Event()
+    
+    def sample():
+        while not stop.wait(PROFILE_SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code.co_filename, frame.f_code.co_firstlineno, frame.f_code.co_name))
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            stacks[key] = stacks.get(key, 0) + 1
+    
+    sampler = threading.Thread(target=sample, name='yolo-profile-sampler', daemon=True)
+    sampler.start()
+    try:
+        result = runner()
+    finally:
+        stop.set()
+        sampler.join()
+    
+    self_samples = {}
+    total_samples = {}
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        self_samples[frames[-1]] = self_samples.get(frames[-1], 0) + count
+        for frame in set(frames):
+            total_samples[frame] = total_samples.get(frame, 0) + count
+    
+    samples = sum(stacks.values())
+    table = [
+        {
+            'function': frame,
+            'self_samples': count,
+            'total_samples': total_samples[frame],
+            'self_percent': round(100 * count / samples, 1)
+        }
+        for frame, count in sorted(self_samples.items(), key=lambda item: item[1], reverse=True)[:top]
+    ]
+    collapsed = '\n'.join(f'{stack} {count}' for stack, count in sorted(stacks.items()))
+    return result, {
+        'samples': samples,
+        'interval_ms': PROFILE_SAMPLE_INTERVAL * 1000,
+        'top': table,
+        'collapsed': collapsed
+    }
+
+
+def profile_call(mode, runner, top=PROFILE_TOP_DEFAULT):
+    """
+    Run runner() under the requested profiler
+    
+    Returns:
+        (runner's result, profile dict), or (None, None) if a profile is already running
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None, None
+    try:
+        started = time.perf_counter()
+        call = _cprofile_call if mode == 'cprofile' else _sample_call
+        result, profile = call(runner, top)
+        profile.update(mode=mode, duration_seconds=round(time.perf_counter() - started, 6))
+        return result, profile
+    finally:
+        _profile_lock.release()
+
+
+# ==================== BACKGROUND ANALYSIS JOBS ====================
+#
+# POST /api/analyze/jobs returns a job id immediately; a bounded pool of worker
+# threads runs run_yolo_analysis() and GET /api/analyze/jobs/<id> reports
+# stage, progress and (once finished) the same body /api/analyze would return.
+# GET /api/analyze/jobs/<id>/events streams the same progress as Server-Sent Events.
+#
+# Jobs run in the worker process that accepted them. Under a pre-fork server
+# the next request may land on another worker, so every state change is also
+# published as reports/.jobs/<id>.json, which the other workers read (and poll
+# for SSE) when the job is not their own.
+
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 2))
+JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_MINUTES', 60)) * 60
+JOB_FOLDER = os.path.join(REPORT_FOLDER, '.jobs')
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+JOB_SNAPSHOT_POLL_SECONDS = 0.5
+JOB_SNAPSHOT_PRUNE_SECONDS = 60
+os.makedirs(JOB_FOLDER, exist_ok=True)
+
+JOBS = {}
+_job_published = {}
+_snapshots_pruned = {'at': 0.0}
+_jobs_lock = threading.Lock()
+_jobs_changed = threading.Condition(_jobs_lock)
+_analysis_executor = None
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def get_analysis_executor():
+    """Create the worker pool lazily so it is never inherited across a fork"""
+    global _analysis_executor
+    with _jobs_lock:
+        if _analysis_executor is None:
+            _analysis_executor = ThreadPoolExecutor(
+                max_workers=ANALYSIS_WORKERS,
+                thread_name_prefix='yolo-analysis'
+            )
+        return _analysis_executor
+
+
+def _prune_jobs():
+    """Forget finished jobs older than JOB_RETENTION_SECONDS (caller holds _jobs_lock)"""
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    for job_id in [j for j, job in JOBS.items() if job['finished'] and job['finished'] < cutoff]:
+        del JOBS[job_id]
+        _job_published.pop(job_id, None)
+
+
+def _prune_job_snapshots():
+    """Delete expired published snapshots, at most every JOB_SNAPSHOT_PRUNE_SECONDS (called without _jobs_lock)"""
+    now = time.time()
+    if now - _snapshots_pruned['at'] < JOB_SNAPSHOT_PRUNE_SECONDS:
+        return
+    _snapshots_pruned['at'] = now
+    cutoff = now - JOB_RETENTION_SECONDS
+    
+    # Snapshots outlive the worker that wrote them (recycled workers included)
+    with os.scandir(JOB_FOLDER) as entries:
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def _job_snapshot(job, force=True):
+    """
+    Copy of the job record to publish, or None when throttled (caller holds _jobs_lock)
+    
+    Unforced snapshots (partial scan progress) are skipped within
+    JOB_SNAPSHOT_POLL_SECONDS of the last one, since readers poll no faster;
+    skipped events go out with the next snapshot.
+    """
+    now = time.monotonic()
+    if not force and now - _job_published.get(job['id'], 0) < JOB_SNAPSHOT_POLL_SECONDS:
+        return None
+    _job_published[job['id']] = now
+    return dict(job, events=list(job['events']))
+
+
+def _save_job_snapshot(snapshot):
+    """Publish a _job_snapshot() for the other server workers (without holding _jobs_lock)"""
+    if snapshot is None:
+        return
+    path = os.path.join(JOB_FOLDER, f"{snapshot['id']}.json")
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    os.replace(temp_path, path)
+
+
+def _load_job_snapshot(job_id):
+    """Job record published by another worker, or None"""
+    if not JOB_ID_PATTERN.match(job_id):
+        return None
+    try:
+        with open(os.path.join(JOB_FOLDER, f'{job_id}.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_job(job_id):
+    """Return (job, is_local): this worker's live record, else the published snapshot"""
+    with _jobs_lock:
+        job = JOBS.get(job_id)
+    if job is not None:
+        return job, True
+    return _load_job_snapshot(job_id), False
+
+
+def _add_job_event(job, event, data):
+    """
+    Record an event for SSE listeners and wake them (caller holds _jobs_lock)
+    
+    Returns the snapshot for the caller to _save_job_snapshot() after releasing the lock.
+    """
+    job['events'].append({'event': event, 'data': data})
+    _jobs_changed.notify_all()
+    return _job_snapshot(job, force=not data.get('partial'))
+
+
+def _run_analysis_job(job_id, runner, admission_user, slots):
+    job = JOBS[job_id]
+    
+    def progress(stage, percent, **details):
+        with _jobs_lock:
+            job['stage'] = stage
+            job['progress'] = percent
+            snapshot = _add_job_event(job, 'progress', dict(details, stage=stage, progress=percent))
+        _save_job_snapshot(snapshot)
+    
+    def run():
+        with _jobs_lock:
+            job['status'] = 'running'
+            job['started'] = time.time()
+            snapshot = _job_snapshot(job)
+        _save_job_snapshot(snapshot)
+        return run_as_owner(admission_user, lambda: runner(progress))
+    
+    # The place was reserved at submit time; the job now waits for a running slot
+    try:
+        payload, http_status = ANALYSIS_ADMISSION.run(run, slots=slots)
+    except Exception as e:
+        # A runner that raises must still finish the job, or pollers wait forever
+        payload, http_status = {'success': False, 'message': f'Analysis failed: {str(e)}'}, 500
+    finally:
+        ANALYSIS_ADMISSION.unreserve(admission_user)
+    
+    with _jobs_lock:
+        job['status'] = 'failed' if http_status >= 500 else 'done'
+        job['stage'] = 'done'
+        job['progress'] = 100
+        job['result'] = payload
+        job['finished'] = time.time()
+        snapshot = _add_job_event(job, 'done', _job_status(job))
+    _save_job_snapshot(snapshot)
+
+
+def _job_status(job):
+    status = {
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': job['progress'],
+        'submitted': job['submitted'],
+        'started': job['started'],
+        'finished': job['finished']
+    }
+    if job['result'] is not None:
+        status['result'] = job['result']
+    return status
+
+
+@app.route('/api/analyze/jobs', methods=['POST'])
+def submit_analysis_job():
+    """Queue an analysis and return its job id without waiting for it"""
+    data = request.json or {}
+    before_file = data.get('before_file')
+    after_file = data.get('after_file')
+    
+    if not before_file or not after_file:
+        return jsonify({'success': False, 'message': 'Both files required'}), 400
+    
+    asset_base = report_asset_base()
+    memory = query_flag(request.args.get('memory'))
+    job_id = submit_job(
+        lambda progress: run_yolo_analysis(before_file, after_file, progress, asset_base, memory),
+        kind='pair',
+        before_file=before_file,
+        after_file=after_file
+    )
+    return _job_accepted(job_id)
+
+
+def submit_job(runner, slots=1, **fields):
+    """
+    Queue runner(progress) -> (payload, http_status) on the analysis pool
+    
+    The job waits for `slots` running slots (one per thread it uses). Extra
+    fields (kind, files, ...) are stored on the job record. Raises
+    AnalysisRejected when the user's quota or the wait queue is full.
+    """
+    admission_user = admission_key()
+    ANALYSIS_ADMISSION.reserve(admission_user)
+    
+    job_id = secrets.token_hex(16)
+    job = dict(fields, **{
+        'id': job_id,
+        'user': session.get('user'),
+        'owner': admission_user,
+        'status': 'queued',
+        'stage': 'queued',
+        'progress': 0,
+        'submitted': time.time(),
+        'started': None,
+        'finished': None,
+        'result': None,
+        'events': []
+    })
+    
+    with _jobs_lock:
+        _prune_jobs()
+        JOBS[job_id] = job
+        snapshot = _job_snapshot(job)
+    _save_job_snapshot(snapshot)
+    _prune_job_snapshots()
+    
+    get_analysis_executor().submit(_run_analysis_job, job_id, runner, admission_user, slots)
+    return job_id
+
+
+def _job_accepted(job_id):
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/api/analyze/jobs/{job_id}',
+        'events_url': f'/api/analyze/jobs/{job_id}/events'
+    }), 202
+
+
+def get_own_job(job_id):
+    """get_job() for the caller's own jobs only (same quota key as at submit)"""
+    job, is_local = get_job(job_id)
+    if job is not None and job.get('owner') != admission_key():
+        return None, False
+    return job, is_local
+
+
+@app.route('/api/analyze/jobs/<job_id>')
+def analysis_job_status(job_id):
+    job, is_local = get_own_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Unknown job'}), 404
+    with _jobs_lock:
+        return jsonify(_job_status(job))
+
+
+@app.route('/api/analyze/jobs/<job_id>/events')
+def analysis_job_events(job_id):
+    """
+    Server-Sent Events stream of stage progress for one job
+    
+    Emits 'progress' events (stage, progress and partial red/green counts as the
+    scanner finds them) followed by a single 'done' event carrying the job status.
+    Reconnecting clients resume after the Last-Event-ID they last saw.
+    """
+    job, is_local = get_own_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Unknown job'}), 404
+    
+    try:
+        next_index = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        next_index = 0
+    
+    def wait_for_snapshot(current, index):
+        """Poll another worker's snapshot until it has new events or the keepalive is due"""
+        deadline = time.monotonic() + SSE_KEEPALIVE_SECONDS
+        while index >= len(current['events']) and current['finished'] is None and time.monotonic() < deadline:
+            time.sleep(JOB_SNAPSHOT_POLL_SECONDS)
+            current = _load_job_snapshot(job_id) or current
+        return current
+    
+    def stream():
+        nonlocal job
+        index = next_index
+        while True:
+            if is_local:
+                with _jobs_changed:
+                    if index >= len(job['events']) and job['finished'] is None:
+                        _jobs_changed.wait(SSE_KEEPALIVE_SECONDS)
+                    pending = job['events'][index:]
+            else:
+                job = wait_for_snapshot(job, index)
+                pending = job['events'][index:]
+            
+            if not pending:
+                if job['finished'] is not None:
+                    return
+                yield ': keepalive\n\n'
+                continue
+            
+            for event in pending:
+                yield f"id: {index}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+                index += 1
+                if event['event'] == 'done':
+                    return
+    
+    return app.response_class(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+# ==================== BATCH ANALYSIS ====================
+#
+# POST /api/analyze/batch {"pairs": [{"before_file", "after_file"}, ...], "async": false}
+# Each unique upload is extracted and scanned once, even when it appears in
+# several pairs (e.g. a sheet revision that is AFTER of one pair and BEFORE of
+# the next); comparisons and report writes then run in parallel per pair, on at
+# most min(BATCH_WORKERS, ANALYZE_CONCURRENCY) threads that each hold a slot.
+
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 4))
+MAX_BATCH_PAIRS = int(os.environ.get('MAX_BATCH_PAIRS', 200))
+
+
+def scan_upload(filename):
+    """Extract and scan one uploaded file, returning its content hash and boxes"""
+    path = os.path.join(UPLOAD_FOLDER, filename)
+    # extract_pdf_content reads a missing file as empty, which would scan as a clean sheet
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f'File not found: {filename}')
+    with _time_stage('batch_extract'):
+        content, raw_bytes = extract_pdf_content(path)
+    INPUT_BYTES.observe(len(raw_bytes), side='batch')
+    with _time_stage('batch_scan'):
+        boxes = yolo_grid_scan_1x1_inch(content, raw_bytes)
+    return {
+        'hash': hashlib.md5(raw_bytes).hexdigest(),
+        'boxes': boxes
+    }
+
+
+def _compare_scanned_pair(before_file, after_file, before_scan, after_scan, asset_base=''):
+    """Compare two pre-scanned uploads and write their report (batch worker task)"""
+    try:
+        if before_scan['hash'] == after_scan['hash']:
+            return {
+                'success': False,
+                'identical': True,
+                'message': '⚠️ FILES ARE IDENTICAL',
+                'popup_message': 'BEFORE and AFTER PDFs are the same! Upload different versions.'
+            }
+        
+        before_boxes, after_boxes = before_scan['boxes'], after_scan['boxes']
+        with _time_stage('compare'):
+            comparison = yolo_compare_red_to_green(before_boxes, after_boxes)
+        with span('report', before_file=before_file, after_file=after_file):
+            report_filename = write_yolo_report(before_boxes, after_boxes, comparison, before_file, after_file, asset_base)
+        record_analysis(before_file, after_file, report_filename)
+        observe_detections(before_boxes, after_boxes, comparison)
+        return build_analysis_payload(before_boxes, after_boxes, comparison, report_filename)
+    except Exception as e:
+        return {'success': False, 'message': f'Analysis failed: {str(e)}'}
+
+
+def summarize_batch(results):
+    """Combine per-pair payloads into one batch summary"""
+    summary = {
+        'total_pairs': len(results),
+        'analyzed': 0,
+        'identical': 0,
+        'failed': 0,
+        'total_comments': 0,
+        'resolved': 0,
+        'unresolved': 0,
+        'resolution_rate': 0,
+        'status_counts': {}
+    }
+    
+    for result in results:
+        if result.get('identical'):
+            summary['identical'] += 1
+        elif not result.get('success'):
+            summary['failed'] += 1
+        else:
+            comparison = result['yolo_analysis']['comparison']
+            summary['analyzed'] += 1
+            summary['total_comments'] += comparison['total_comments']
+            summary['resolved'] += comparison['resolved']
+            summary['unresolved'] += comparison['unresolved']
+            summary['status_counts'][comparison['status']] = summary['status_counts'].get(comparison['status'], 0) + 1
+    
+    if summary['total_comments'] > 0:
+        summary['resolution_rate'] = int((summary['resolved'] / summary['total_comments']) * 100)
+    
+    return summary
+
+
+def run_yolo_batch(pairs, progress=None, asset_base='', workers=BATCH_WORKERS):
+    """
+    Analyze many (before_file, after_file) pairs on a pool of `workers` threads
+    
+    Returns:
+        (payload, http_status) with a combined summary and per-pair results
+    """
+    with span('analyze_batch', pairs=len(pairs), workers=workers) as trace:
+        payload, status = _run_yolo_batch(pairs, progress or _no_progress, asset_base, workers)
+        trace.update(unique_files=payload['summary']['unique_files'], failed=payload['summary']['failed'])
+        return payload, status
+
+
+def _run_yolo_batch(pairs, progress, asset_base, workers):
+    unique_files = list(dict.fromkeys(name for pair in pairs for name in pair))
+    scans = {}
+    results = [None] * len(pairs)
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='yolo-batch') as pool:
+        progress('scan', 0, files_scanned=0, unique_files=len(unique_files))
+        # Each task runs in a copy of this context so its spans join the batch trace
+        futures = {pool.submit(contextvars.copy_context().run, scan_upload, name): name for name in unique_files}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                scans[futures[future]] = future.result()
+            except Exception as e:
+                scans[futures[future]] = e
+            progress('scan', 50 * done // len(unique_files), files_scanned=done, unique_files=len(unique_files))
+        
+        futures = {}
+        for index, (before_file, after_file) in enumerate(pairs):
+            before_scan, after_scan = scans[before_file], scans[after_file]
+            failed = next((s for s in (before_scan, after_scan) if isinstance(s, Exception)), None)
+            if failed is not None:
+                results[index] = {'success': False, 'message': f'Analysis failed: {str(failed)}'}
+            else:
+                futures[pool.submit(contextvars.copy_context().run, _compare_scanned_pair,
+                                    before_file, after_file, before_scan, after_scan, asset_base)] = index
+        
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            progress('compare', 50 + 50 * done // len(futures), pairs_done=done, pairs=len(futures))
+    
+    for (before_file, after_file), result in zip(pairs, results):
+        result['before_file'] = before_file
+        result['after_file'] = after_file
+    
+    summary = summarize_batch(results)
+    summary['unique_files'] = len(unique_files)
+    summary['duplicate_scans_avoided'] = 2 * len(pairs) - len(unique_files)
+    CACHE_LOOKUPS.inc(len(unique_files), cache='batch_scan', result='miss')
+    CACHE_LOOKUPS.inc(summary['duplicate_scans_avoided'], cache='batch_scan', result='hit')
+    
+    return {'success': True, 'summary': summary, 'results': results}, 200
+
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Analyze a submittal package of revision pairs in one request"""
+    data = request.json or {}
+    raw_pairs = data.get('pairs') or []
+    if not isinstance(raw_pairs, list):
+        return jsonify({'success': False, 'message': 'pairs must be a list'}), 400
+    
+    pairs = []
+    for pair in raw_pairs:
+        before_file = pair.get('before_file') if isinstance(pair, dict) else None
+        after_file = pair.get('after_file') if isinstance(pair, dict) else None
+        if not before_file or not after_file or not isinstance(before_file, str) or not isinstance(after_file, str):
+            return jsonify({'success': False, 'message': 'Each pair needs before_file and after_file names'}), 400
+        pairs.append((before_file, after_file))
+    
+    if not pairs:
+        return jsonify({'success': False, 'message': 'At least one pair required'}), 400
+    
+    if len(pairs) > MAX_BATCH_PAIRS:
+        return jsonify({'success': False, 'message': f'Too many pairs (max {MAX_BATCH_PAIRS})'}), 400
+    
+    asset_base = report_asset_base()
+    # Every scan thread counts against the worker's analysis slots
+    workers = min(BATCH_WORKERS, ANALYSIS_ADMISSION.concurrency)
+    if data.get('async'):
+        return _job_accepted(submit_job(
+            lambda progress: run_yolo_batch(pairs, progress, asset_base, workers), slots=workers, kind='batch', pairs=pairs
+        ))
+    
+    payload, status = run_admitted(lambda: run_yolo_batch(pairs, asset_base=asset_base, workers=workers),
+                                   admission_key(), slots=workers)
+    return jsonify(payload), status
+
+
+@app.route('/reports/assets/report.<css_hash>.css')
+def report_stylesheet(css_hash):
+    """Shared report stylesheet; the URL changes with its content so it can be cached forever"""
+    if css_hash != REPORT_CSS_HASH:
+        return jsonify({'error': 'File not found'}), 404
+    
+    response = make_response(REPORT_CSS)
+    response.mimetype = 'text/css'
+    response.set_etag(REPORT_CSS_HASH)
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+
+def report_variants(filename):
+    """Map content-coding -> absolute path for every stored variant of a report"""
+    base = os.path.abspath(os.path.join(REPORT_FOLDER, filename))
+    return {
+        encoding: base + suffix
+        for encoding, suffix in REPORT_ENCODINGS
+        if os.path.isfile(base + suffix)
+    }
+
+
+def report_etag(filename, encoding):
+    """
+    Strong ETag for one stored variant, derived from the report's content hash
+    
+    Returns None for reports written before hashes were recorded, in which case
+    send_file falls back to its mtime/size based tag.
+    """
+    try:
+        with open(os.path.join(REPORT_FOLDER, filename + '.json'), 'r', encoding='utf-8') as f:
+            content_hash = json.load(f)['sha256'][:32]
+    except (OSError, ValueError, KeyError):
+        return None
+    return content_hash if encoding == 'identity' else f'{content_hash}-{encoding}'
+
+
+def _accel_redirect(path, encoding, filename, etag):
+    """Let nginx serve the stored bytes; conditional requests are answered here first"""
+    response = app.response_class(mimetype='text/html', headers={
+        'X-Accel-Redirect': f'{REPORT_ACCEL_PREFIX}/{os.path.basename(path)}',
+        'Content-Disposition': f'attachment; filename="{filename}"'
+    })
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(etag)
+    response.last_modified = os.path.getmtime(path)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def _send_report_variant(variants, encoding, filename):
+    """Send one stored variant with ETag, If-None-Match/If-Modified-Since and Range support"""
+    path = variants[encoding]
+    etag = report_etag(filename, encoding)
+    
+    if REPORT_SENDFILE == 'x-accel':
+        response = _accel_redirect(path, encoding, filename, etag)
+    else:
+        # send_file answers 304/206/416 itself and honours USE_X_SENDFILE
+        response = send_file(path, mimetype='text/html', as_attachment=True,
+                             download_name=filename, etag=etag or True)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def ensure_identity_variant(filename, variants):
+    """
+    Decompress a report's gzip variant to an identity file beside it, once
+    
+    Clients that can't take gzip then get the plain file with Range and sendfile
+    support, instead of an on-the-fly decompression on every download.
+    """
+    path = variants['gzip'][:-len('.gz')]
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with gzip.open(variants['gzip'], 'rb') as source, open(tmp, 'wb') as target:
+            shutil.copyfileobj(source, target, REPORT_CHUNK_SIZE)
+        # link() fails if a parallel download got there first, so the size is indexed once
+        os.link(tmp, path)
+    except FileExistsError:
+        return dict(variants, identity=path)
+    finally:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+    
+    if not os.path.isfile(variants['gzip']):
+        # Evicted while decompressing: don't leave an unindexed copy behind
+        os.remove(path)
+        raise FileNotFoundError(variants['gzip'])
+    with _indexing(f'sizing {filename}'):
+        storage_index().grow('report', filename, os.path.getsize(path))
+    return dict(variants, identity=path)
+
+
+def _open_report_text(variants):
+    """Open the cheapest-to-decode stored variant of a report as text"""
+    if 'identity' in variants:
+        return open(variants['identity'], 'r', encoding='utf-8')
+    return gzip.open(variants['gzip'], 'rt', encoding='utf-8')
+
+
+def _stream_report_text(variants, inline_stylesheet=False):
+    """Decompress a stored report on the fly, optionally embedding its stylesheet"""
+    with _open_report_text(variants) as f:
+        head = f.read(REPORT_CHUNK_SIZE)
+        if inline_stylesheet:
+            head = REPORT_CSS_LINK_PATTERN.sub(lambda m: report_stylesheet_tag('inline'), head, count=1)
+        yield head
+        for chunk in iter(lambda: f.read(REPORT_CHUNK_SIZE), ''):
+            yield chunk
+
+
+@app.route('/download/<filename>')
+def download(filename):
+    variants = report_variants(filename)
+    if 'identity' not in variants and 'gzip' not in variants:
+        return jsonify({'error': 'File not found'}), 404
+    touch_report(filename)
+    
+    attachment = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    
+    # ?inline=1 returns a self-contained copy (stylesheet embedded) for emailing
+    if query_flag(request.args.get('inline')):
+        return app.response_class(_stream_report_text(variants, inline_stylesheet=True),
+                                  mimetype='text/html', headers=attachment)
+    
+    # Serve a stored compressed variant as-is when the client accepts it
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and request.accept_encodings[encoding]:
+            return _send_report_variant(variants, encoding, filename)
+    
+    # Client can't take gzip: write the identity variant on first use
+    if 'identity' not in variants:
+        try:
+            variants = ensure_identity_variant(filename, variants)
+        except FileNotFoundError:
+            return jsonify({'error': 'File not found'}), 404
+    return _send_report_variant(variants, 'identity', filename)
+
+
+def health_status():
+    """Body of /health (shared with the ASGI front end)"""
+    return {
+        'status': 'healthy',
+        'version': '7.0.0 - YOLO COMPLETE',
+        'features': [
+            'YOLO 1x1 Inch Grid Scanning',
+            'Red Markup Detection',
+            'Green Confirmation Detection',
+            'RED-to-GREEN Matching',
+            'Comprehensive PDF Reports',
             'Identical File Detection',
             'Professional HTML Frontend'
         ]
-    })
+    }
+
+
+@app.route('/health')
+def health():
+    return jsonify(health_status())
+
+
+# ==================== READINESS ====================
+#
+# GET /ready is for load balancers: unlike /health it answers 503 while this
+# node should not get more analyses - the admission queue or the background
+# job backlog is nearly full, UPLOAD_FOLDER / REPORT_FOLDER is running out of
+# disk, or analyses of the last READY_LATENCY_WINDOW_SECONDS are slower than
+# READY_MAX_ANALYSIS_SECONDS at p95 (with none that recent, latency passes, so
+# a node taken out for being slow can come back). Pool, queue, cache and latency
+# figures are those of the worker answering.
+
+READY_MAX_QUEUE_FILL = float(os.environ.get('READY_MAX_QUEUE_FILL', 0.9))
+READY_MAX_QUEUED_JOBS = int(os.environ.get('READY_MAX_QUEUED_JOBS', 4 * ANALYSIS_WORKERS))
+READY_MIN_FREE_DISK_MB = int(os.environ.get('READY_MIN_FREE_DISK_MB', 1024))
+READY_MAX_ANALYSIS_SECONDS = float(os.environ.get('READY_MAX_ANALYSIS_SECONDS', 120))
+READY_LATENCY_WINDOW_SECONDS = float(os.environ.get('READY_LATENCY_WINDOW_SECONDS', 300))
+READY_PERCENTILES = (50, 95, 99)
+
+
+def _percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[max(math.ceil(p * len(sorted_values) / 100), 1) - 1]
+
+
+def stage_percentiles(max_age=None):
+    """p50/p95/p99 seconds of each stage over its last STAGE_TIMING_WINDOW runs (those under max_age seconds old)"""
+    since = time.monotonic() - max_age if max_age is not None else -math.inf
+    with _stage_timings_lock:
+        timings = {
+            stage: sorted(seconds for seconds, at in zip(values, STAGE_TIMING_TIMES[stage]) if at >= since)
+            for stage, values in STAGE_TIMINGS.items()
+        }
+    timings = {stage: values for stage, values in timings.items() if values}
+    return {
+        stage: {f'p{p}': round(_percentile(values, p), 4) for p in READY_PERCENTILES} | {'samples': len(values)}
+        for stage, values in timings.items()
+    }
+
+
+def cache_status():
+    """Bytes held by the precompressed page/asset caches and hit rates of the counted caches"""
+    responses = [INDEX_RESPONSE, *ASSET_RESPONSES.values()]
+    memory = sum(len(data) for static in responses for data, _ in static['variants'].values())
+    
+    with _metrics_lock:
+        lookups = dict(CACHE_LOOKUPS.values)
+    hit_rates = {}
+    for cache in sorted({cache for cache, _ in lookups}):
+        hits, misses = lookups.get((cache, 'hit'), 0), lookups.get((cache, 'miss'), 0)
+        hit_rates[cache] = round(hits / (hits + misses), 4) if hits + misses else None
+    return {'memory_bytes': memory, 'entries': len(responses), 'hit_rate': hit_rates}
+
+
+def _disk_check(folder):
+    usage = shutil.disk_usage(folder)
+    free_mb = usage.free // (1024 * 1024)
+    return {
+        'ok': free_mb >= READY_MIN_FREE_DISK_MB,
+        'free_mb': free_mb,
+        'total_mb': usage.total // (1024 * 1024),
+        'min_free_mb': READY_MIN_FREE_DISK_MB
+    }
+
+
+def readiness_status():
+    """(body, ready) for /ready"""
+    admission = ANALYSIS_ADMISSION.status()
+    queue_fill = admission['queued'] / admission['queue_depth'] if admission['queue_depth'] else 0
+    with _jobs_lock:
+        job_statuses = [job['status'] for job in JOBS.values()]
+    queued_jobs = job_statuses.count('queued')
+    percentiles = stage_percentiles(READY_LATENCY_WINDOW_SECONDS)
+    analysis_p95 = sum(percentiles[stage]['p95'] for stage in ANALYSIS_STAGES if stage in percentiles)
+    
+    checks = {
+        'analysis_pool': {
+            'ok': queue_fill < READY_MAX_QUEUE_FILL,
+            'saturation': round(admission['running'] / admission['concurrency'], 4),
+            'queue_fill': round(queue_fill, 4),
+            'max_queue_fill': READY_MAX_QUEUE_FILL,
+            **admission
+        },
+        'job_queue': {
+            'ok': queued_jobs < READY_MAX_QUEUED_JOBS,
+            'queued': queued_jobs,
+            'running': job_statuses.count('running'),
+            'workers': ANALYSIS_WORKERS,
+            'max_queued': READY_MAX_QUEUED_JOBS
+        },
+        'upload_disk': _disk_check(UPLOAD_FOLDER),
+        'report_disk': _disk_check(REPORT_FOLDER),
+        'latency': {
+            'ok': analysis_p95 <= READY_MAX_ANALYSIS_SECONDS,
+            'analysis_p95_seconds': round(analysis_p95, 4),
+            'max_analysis_seconds': READY_MAX_ANALYSIS_SECONDS,
+            'window_seconds': READY_LATENCY_WINDOW_SECONDS,
+            'stages': percentiles
+        }
+    }
+    is_ready = all(check['ok'] for check in checks.values())
+    return {
+        'status': 'ready' if is_ready else 'not_ready',
+        'failing': [name for name, check in checks.items() if not check['ok']],
+        'checks': checks,
+        'cache': cache_status()
+    }, is_ready
+
+
+@app.route('/ready')
+def ready():
+    body, is_ready = readiness_status()
+    response = jsonify(body)
+    response.cache_control.no_store = True
+    return response, 200 if is_ready else 503
+
+
+def warm_up():
+    """
+    Run a tiny document through scan, compare and render once
+    
+    Called in the master of a pre-fork server (gunicorn.conf.py) so lazily
+    built state such as the re module's cache is created before forking and
+    shared copy-on-write instead of being rebuilt by every worker's first request.
+    """
+    before_text = 'GENERAL NOTES\nCHECK BEAM DEPTH d\nFIX 200MM THK SLAB\nSECTION A-A'
+    after_text = 'GENERAL NOTES\nBEAM DEPTH 450MM - DONE ✓\nSLAB 200MM THK FIXED\nSECTION A-A'
+    before_boxes = yolo_grid_scan_1x1_inch(before_text, before_text.encode('utf-8'))
+    after_boxes = yolo_grid_scan_1x1_inch(after_text, after_text.encode('utf-8'))
+    comparison = yolo_compare_red_to_green(before_boxes, after_boxes)
+    for _ in iter_yolo_report_html(before_boxes, after_boxes, comparison, 'before.pdf', 'after.pdf'):
+        pass
 
 
 if __name__ == '__main__':
@@ -2374,5 +3230,6 @@ if __name__ == '__main__':
     📊 Analysis Engine: YOLO-Style
     🎯 Detection Accuracy: 95%+
     """.format(port=port))
+    print("    ⚠️  Single-process development server - in production run: gunicorn -c gunicorn.conf.py\n")
     
     app.run(debug=False, host='0.0.0.0', port=port)
@@ -0,0 +1,291 @@
+"""
+🎯 CMT NEXUS - ASYNC (ASGI) SERVING MODE
+Starlette front end for the I/O-bound endpoints. Uploads and report downloads
+use non-blocking file I/O and analysis runs on the shared analysis thread pool,
+so a slow client holds a coroutine instead of a worker thread. Every other
+route is the Flask app, mounted unchanged.
+
+Usage:
+    pip install -r requirements_async.txt
+    uvicorn asgi_yolo:app --host 0.0.0.0 --port 5000
+    SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+
+import anyio
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_accept_header, parse_date, parse_etags
+
+from app_yolo_complete import (
+    ANALYSIS_ADMISSION,
+    ANALYZE_CONCURRENCY,
+    ANALYZE_QUEUE_DEPTH,
+    ANALYZE_QUEUE_TIMEOUT,
+    MAX_UPLOAD_SIZE,
+    REPORT_CHUNK_SIZE,
+    REPORT_SENDFILE,
+    UPLOAD_FOLDER,
+    UPLOAD_TYPES,
+    AnalysisRejected,
+    app as flask_app,
+    ensure_background_threads,
+    ensure_identity_variant,
+    health_status,
+    query_flag,
+    record_request_metrics,
+    register_upload,
+    report_asset_base,
+    report_etag,
+    report_variants,
+    run_as_owner,
+    run_yolo_analysis,
+    touch_report,
+    upload_filename,
+)
+
+UPLOAD_COPY_CHUNK = 1024 * 1024
+FLASK_THREADS = int(os.environ.get('ASGI_FLASK_THREADS', 16))
+
+flask_asgi = WSGIMiddleware(flask_app, workers=FLASK_THREADS)
+_executor_lock = threading.Lock()
+_analyze_executor = None
+
+
+def get_analyze_executor():
+    """
+    Threads for /api/analyze, one per place admission control can grant
+
+    Kept apart from the background job pool (ANALYSIS_WORKERS threads) so
+    synchronous analyses never queue behind jobs; created lazily so it is
+    never inherited across a fork.
+    """
+    global _analyze_executor
+    with _executor_lock:
+        if _analyze_executor is None:
+            _analyze_executor = ThreadPoolExecutor(
+                max_workers=ANALYZE_CONCURRENCY + ANALYZE_QUEUE_DEPTH,
+                thread_name_prefix='yolo-asgi-analyze'
+            )
+        return _analyze_executor
+
+
+def _too_large():
+    return JSONResponse({
+        'success': False,
+        'message': f'File too large (max {MAX_UPLOAD_SIZE // (1024 * 1024)} MB)'
+    }, 413)
+
+
+async def upload(request):
+    """Same contract as Flask's /api/upload; the file is copied to disk without blocking the loop"""
+    if int(request.headers.get('content-length') or 0) > flask_app.config['MAX_CONTENT_LENGTH']:
+        return _too_large()
+
+    async with request.form(max_files=1) as form:
+        file = form.get('file')
+        if file is None or isinstance(file, str):
+            return JSONResponse({'success': False, 'message': 'No file uploaded'}, 400)
+
+        file_type = form.get('type')
+
+        if file_type not in UPLOAD_TYPES:
+            return JSONResponse({'success': False, 'message': 'Upload type must be before or after'}, 400)
+
+        if not file.filename.endswith('.pdf'):
+            return JSONResponse({'success': False, 'message': 'Only PDF files allowed'}, 400)
+
+        filename = upload_filename(file_type, file.filename)
+        filepath = os.path.join(UPLOAD_FOLDER, filename)
+
+        size = 0
+        async with await anyio.open_file(filepath, 'wb') as out:
+            while chunk := await file.read(UPLOAD_COPY_CHUNK):
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    break
+                await out.write(chunk)
+
+        if size > MAX_UPLOAD_SIZE:
+            await anyio.Path(filepath).unlink()
+            return _too_large()
+
+    await anyio.to_thread.run_sync(register_upload, filename, size, _admission_key(request))
+    return JSONResponse({
+        'success': True,
+        'filename': filename,
+        'size': size
+    })
+
+
+def _admission_key(request):
+    """Same quota key as the Flask side: session user, else client address"""
+    session = flask_app.session_interface.open_session(flask_app, request)
+    return (session or {}).get('user') or (request.client.host if request.client else None) or 'anonymous'
+
+
+def _rejected(e):
+    return JSONResponse(
+        {'success': False, 'message': e.message, 'retry_after': e.retry_after},
+        e.status, headers={'Retry-After': str(e.retry_after)}
+    )
+
+
+async def analyze(request):
+    """
+    YOLO Analysis Endpoint; the CPU-bound pipeline runs on the analysis pool
+
+    Returns None for profiled runs (?profile=...), which Flask's handler serves.
+    """
+    if 'profile' in request.query_params:
+        return None
+
+    data = await request.json()
+    before_file = data.get('before_file')
+    after_file = data.get('after_file')
+
+    if not before_file or not after_file:
+        return JSONResponse({'success': False, 'message': 'Both files required'}, 400)
+
+    # Reserve before queueing so a full queue or quota is answered immediately;
+    # the shared quota is a SQLite write, so it stays off the loop
+    user = _admission_key(request)
+    try:
+        await anyio.to_thread.run_sync(ANALYSIS_ADMISSION.reserve, user)
+    except AnalysisRejected as e:
+        return _rejected(e)
+
+    asset_base = report_asset_base(str(request.base_url))
+    memory = query_flag(request.query_params.get('memory'))
+    runner = functools.partial(run_as_owner, user,
+                               functools.partial(run_yolo_analysis, before_file, after_file, None, asset_base, memory))
+    loop = asyncio.get_running_loop()
+    try:
+        payload, status = await loop.run_in_executor(
+            get_analyze_executor(), ANALYSIS_ADMISSION.run, runner, ANALYZE_QUEUE_TIMEOUT
+        )
+    except AnalysisRejected as e:
+        return _rejected(e)
+    finally:
+        await anyio.to_thread.run_sync(ANALYSIS_ADMISSION.unreserve, user)
+    return JSONResponse(payload, status)
+
+
+async def _iter_file(path):
+    async with await anyio.open_file(path, 'rb') as f:
+        while chunk := await f.read(REPORT_CHUNK_SIZE):
+            yield chunk
+
+
+def _not_modified(request, etag, mtime):
+    """Conditional GET as Werkzeug answers it: If-None-Match wins, else If-Modified-Since (whole seconds)"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match:
+        return parse_etags(if_none_match).contains(etag)
+    since = parse_date(request.headers.get('if-modified-since'))
+    return since is not None and int(mtime) <= since.timestamp()
+
+
+async def download(request):
+    """
+    Stream a stored report variant the client accepts, answering If-None-Match / If-Modified-Since
+
+    Returns None for the rare cases Flask's handler already covers (?inline=1,
+    Range requests, proxy sendfile, reports without a content hash), which are
+    then passed through to it.
+    """
+    if query_flag(request.query_params.get('inline')) or 'range' in request.headers or REPORT_SENDFILE:
+        return None
+
+    filename = request.path_params['filename']
+    variants = await anyio.to_thread.run_sync(report_variants, filename)
+    if 'identity' not in variants and 'gzip' not in variants:
+        return JSONResponse({'error': 'File not found'}, 404)
+    await anyio.to_thread.run_sync(touch_report, filename)
+
+    accepted = parse_accept_header(request.headers.get('accept-encoding'))
+    encoding = next((e for e in ('br', 'gzip') if e in variants and accepted[e]), None)
+    if encoding is None:
+        encoding = 'identity'
+        if 'identity' not in variants:
+            try:
+                variants = await anyio.to_thread.run_sync(ensure_identity_variant, filename, variants)
+            except FileNotFoundError:
+                return JSONResponse({'error': 'File not found'}, 404)
+
+    etag = await anyio.to_thread.run_sync(report_etag, filename, encoding)
+    if etag is None:
+        return None
+
+    path = variants[encoding]
+    stat = await anyio.Path(path).stat()
+    headers = {
+        'ETag': f'"{etag}"',
+        'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    headers['Content-Length'] = str(stat.st_size)
+    if request.method == 'HEAD':
+        return Response(media_type='text/html', headers=headers)
+    return StreamingResponse(_iter_file(path), media_type='text/html', headers=headers)
+
+
+async def health(request):
+    return JSONResponse(health_status())
+
+
+class FlaskFallback:
+    """
+    ASGI endpoint that answers with handler(request), or hands the request to Flask when it returns None
+
+    Answers given here are counted in /metrics under the Flask endpoint name
+    (Flask counts the ones it serves itself), and start the same per-process
+    background threads a Flask request would.
+    """
+
+    def __init__(self, handler, endpoint=None):
+        self.handler = handler
+        self.endpoint = endpoint or handler.__name__
+
+    async def __call__(self, scope, receive, send):
+        started = time.perf_counter()
+        ensure_background_threads()
+        response = await self.handler(Request(scope, receive))
+        if response is None:
+            await flask_asgi(scope, receive, send)
+            return
+
+        async def send_measured(message):
+            if message['type'] == 'http.response.start':
+                record_request_metrics(scope['method'], self.endpoint, message['status'],
+                                       time.perf_counter() - started)
+            await send(message)
+
+        await response(scope, receive, send_measured)
+
+
+app = Starlette(routes=[
+    Route('/api/upload', FlaskFallback(upload), methods=['POST']),
+    Route('/api/analyze', FlaskFallback(analyze), methods=['POST']),
+    Route('/download/{filename}', FlaskFallback(download), methods=['GET', 'HEAD']),
+    Route('/health', FlaskFallback(health), methods=['GET', 'HEAD']),
+    Mount('/', app=flask_asgi),
+])
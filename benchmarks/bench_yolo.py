@@ -0,0 +1,237 @@
+"""
+🎯 CMT NEXUS - YOLO PIPELINE MICRO-BENCHMARKS
+Times yolo_grid_scan_1x1_inch, yolo_compare_red_to_green, _adjacent_position
+and generate_yolo_report_html on synthetic drawings (benchmarks/corpus.py)
+from 10 to 1M lines and writes the results as JSON.
+
+Each case runs up to --repeat times, stopping early once it has used its
+--budget seconds. A size is skipped when the growth measured on the two
+sizes below it predicts more than the budget, so the quadratic stages stop
+where they become impractical while the linear ones run to 1M lines. The
+'scaling' section reports that growth as an exponent (time ~ lines^k).
+
+Usage:
+    python benchmarks/bench_yolo.py                                   # all targets, JSON to stdout
+    python benchmarks/bench_yolo.py --targets compare --sizes 100,1000,10000 --output compare.json
+    python benchmarks/bench_yolo.py --budget 5 --repeat 3
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from yolo_pipeline import (  # noqa: E402
+    _adjacent_position,
+    generate_yolo_report_html,
+    yolo_compare_red_to_green,
+    yolo_grid_scan_1x1_inch,
+)
+from corpus import expected_counts, generate_pair  # noqa: E402
+
+TARGETS = ('scan', 'compare', 'adjacent', 'report')
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000, 1000000)
+DEFAULT_BUDGET = 30.0
+DEFAULT_REPEAT = 5
+
+
+class Case:
+    """Inputs for one corpus size, built (and checked against the corpus spec) once for every target"""
+
+    def __init__(self, lines, seed=0):
+        self.lines = lines
+        self.before, self.after = generate_pair(lines, seed=seed)
+        self.before_boxes = yolo_grid_scan_1x1_inch(self.before, self.before.encode('utf-8'))
+        self.after_boxes = yolo_grid_scan_1x1_inch(self.after, self.after.encode('utf-8'))
+        self.comparison = None
+        self.positions = [f"({i % 10}in, {i // 10}in)" for i in range(lines)]
+
+        detections = {
+            'before_red_markups': len(self.before_boxes['red_markups']),
+            'after_red_markups': len(self.after_boxes['red_markups']),
+            'after_green_confirmations': len(self.after_boxes['green_confirmations']),
+            'dimensions': len(self.before_boxes['dimensions']),
+            'annotations': len(self.before_boxes['annotations']),
+        }
+        if detections != expected_counts(lines):
+            raise RuntimeError(f'Scanner found {detections} in the {lines}-line corpus, '
+                               f'expected {expected_counts(lines)}')
+        self.detections = detections
+
+    def scan(self):
+        return yolo_grid_scan_1x1_inch(self.before, self.before.encode('utf-8'))
+
+    def compare(self):
+        self.comparison = yolo_compare_red_to_green(self.before_boxes, self.after_boxes)
+        return self.comparison
+
+    def adjacent(self):
+        positions = self.positions
+        for i in range(len(positions)):
+            _adjacent_position(positions[i], positions[i - 1])
+
+    def report(self):
+        return generate_yolo_report_html(self.before_boxes, self.after_boxes, self.comparison,
+                                         'before.pdf', 'after.pdf')
+
+
+def time_case(func, repeat, budget):
+    """Run func up to repeat times (at least once) within budget seconds; returns the run times"""
+    seconds = []
+    while len(seconds) < repeat and (not seconds or sum(seconds) < budget):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - started)
+    return seconds
+
+
+def growth_exponent(smaller, larger):
+    """k in time ~ lines^k between two measured results (None when either is too fast to tell)"""
+    if min(smaller['median'], larger['median']) <= 0:
+        return None
+    return math.log(larger['median'] / smaller['median']) / math.log(larger['lines'] / smaller['lines'])
+
+
+def predict_seconds(measured, lines):
+    """Extrapolate a target's median to `lines` from its two largest measured sizes (linear if only one)"""
+    if not measured:
+        return 0.0
+    last = measured[-1]
+    exponent = growth_exponent(measured[-2], last) if len(measured) > 1 else None
+    return last['median'] * (lines / last['lines']) ** max(exponent or 1.0, 1.0)
+
+
+def run_benchmarks(targets=TARGETS, sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, budget=DEFAULT_BUDGET, seed=0):
+    """
+    Benchmark each target at each size; returns the result records in run order
+
+    The report renders the comparison the compare target produced, so asking
+    for 'report' always benchmarks 'compare' too.
+    """
+    if 'report' in targets:
+        targets = set(targets) | {'compare'}
+    targets = [target for target in TARGETS if target in targets]
+    results = []
+    measured = {target: [] for target in targets}
+
+    for lines in sorted(sizes):
+        case = Case(lines, seed)
+        for target in targets:
+            record = {'target': target, 'lines': lines, 'detections': case.detections}
+            results.append(record)
+
+            if target == 'report' and case.comparison is None:
+                record.update(status='skipped', reason='compare was skipped at this size')
+                continue
+
+            estimate = predict_seconds(measured[target], lines)
+            if estimate > budget:
+                record.update(status='skipped', reason='predicted over budget', predicted_seconds=round(estimate, 3))
+                continue
+
+            seconds = time_case(getattr(case, target), repeat, budget)
+            record.update(
+                status='ok' if seconds[0] <= budget else 'over_budget',
+                runs=len(seconds),
+                seconds=[round(s, 6) for s in seconds],
+                min=round(min(seconds), 6),
+                median=round(statistics.median(seconds), 6),
+                max=round(max(seconds), 6)
+            )
+            measured[target].append(record)
+            print(f"⏱️  {target:<9}{lines:>9} lines  median {record['median']:.6f}s  ({len(seconds)} run(s))",
+                  file=sys.stderr)
+        del case
+
+    return results
+
+
+def scaling(results):
+    """Growth exponent of each target between its two largest measured sizes"""
+    summary = {}
+    for target in TARGETS:
+        measured = [r for r in results if r['target'] == target and 'median' in r]
+        if len(measured) > 1:
+            exponent = growth_exponent(measured[-2], measured[-1])
+            summary[target] = {
+                'exponent': round(exponent, 3) if exponent is not None else None,
+                'from_lines': measured[-2]['lines'],
+                'to_lines': measured[-1]['lines']
+            }
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def benchmark(targets=TARGETS, sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, budget=DEFAULT_BUDGET, seed=0):
+    """Run the benchmarks and return the JSON document this script writes"""
+    results = run_benchmarks(targets, sizes, repeat, budget, seed)
+    return {
+        'benchmark': 'bench_yolo',
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'budget_seconds': budget,
+        'seed': seed,
+        'results': results,
+        'scaling': scaling(results)
+    }
+
+
+def _csv(value, convert=str):
+    return tuple(convert(item) for item in value.split(',') if item)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for the YOLO scan / compare / report pipeline')
+    parser.add_argument('--targets', type=_csv, default=TARGETS,
+                        help=f"Comma-separated subset of {','.join(TARGETS)}")
+    parser.add_argument('--sizes', type=lambda v: _csv(v, int), default=DEFAULT_SIZES,
+                        help='Comma-separated corpus sizes in lines (default 10 ... 1000000)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Runs per case (default 5)')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help='Seconds one case may take (default 30)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    parser.add_argument('--output', '-o', help='Write the JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    document = benchmark(args.targets, args.sizes, max(args.repeat, 1), args.budget, args.seed)
+
+    text = json.dumps(document, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    for target, growth in document['scaling'].items():
+        print(f"📈 {target}: time ~ lines^{growth['exponent']} "
+              f"({growth['from_lines']} -> {growth['to_lines']} lines)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
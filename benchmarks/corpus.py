@@ -0,0 +1,218 @@
+"""
+🎯 CMT NEXUS - SYNTHETIC DRAWING CORPUS
+Generates BEFORE/AFTER drawing text with a controlled number of red markups,
+green confirmations, dimensions and annotations, as plain text streams or as
+minimal (uncompressed) PDFs that extract_pdf_content() reads the same way.
+Every template line triggers exactly one detector, so the scanner's counts on
+a text stream equal the requested counts (see expected_counts()); a PDF adds
+the few dimensions/annotations its own object syntax matches (/MediaBox, /Type).
+
+Usage:
+    python benchmarks/corpus.py out/ --lines 100000             # out/before.txt, out/after.txt
+    python benchmarks/corpus.py out/ --lines 5000 --pdf --red 40 --resolved 0.5
+"""
+
+import argparse
+import os
+import random
+import sys
+
+# Default share of lines per kind when a count isn't given
+RED_DENSITY = 0.02
+DIMENSION_DENSITY = 0.05
+ANNOTATION_DENSITY = 0.03
+BLANK_DENSITY = 0.10
+DEFAULT_RESOLVED = 0.7
+DEFAULT_NEW_ISSUES = 0.05
+
+# Words chosen so filler lines match no detector (no X, MM, DIA, @, "ok", "add", ...)
+FILLER_WORDS = ('GRID', 'LINE', 'BEAM', 'SLAB', 'COLUMN', 'FOOTING', 'WALL', 'STAIR',
+                'LEVEL', 'RAMP', 'CORE', 'PIER', 'LINTEL', 'PURLIN', 'TRUSS', 'BRACE')
+GRID_LETTERS = 'ABCEFGH'
+RED_TEMPLATES = (
+    'CHECK REINFORCEMENT LAP LENGTH AT GRID {letter}{n}',
+    'VERIFY BEAM {n} SUPPORT BEARING',
+    'REVIEW SLAB EDGE AT GRID {letter}{n}',
+    'BOLD LINE FOR WALL {n}',
+    'MISSING LINTEL OVER OPENING {n}',
+    'CORRECT COLUMN {letter}{n} ORIENTATION',
+    'SLAB DEPTH d AT GRID {letter}',
+)
+GREEN_TEMPLATES = (
+    '✓ REINFORCEMENT LAP LENGTH AT GRID {letter}{n}',
+    'DONE BEAM {n} SUPPORT BEARING',
+    'COMPLETED SLAB EDGE AT GRID {letter}{n}',
+    'RESOLVED LINE FOR WALL {n}',
+    'CONFIRMED LINTEL OVER OPENING {n}',
+    'OK COLUMN {letter}{n} ORIENTATION',
+)
+DIMENSION_TEMPLATES = (
+    'BEAM {n}0 MM WIDE',
+    'SLAB {n} THK',
+    '{n} DIA BAR AT 150 C/C',
+    'COLUMN {n}00 @ 300',
+)
+ANNOTATION_TEMPLATES = (
+    'NOTE {n}: ALL LEVELS IN METRES',
+    'TYPICAL SECTION THROUGH BEAM {n}',
+    'DETAIL {n} SEE SHEET S-{n}',
+    'SCHEDULE OF COLUMN {letter}{n}',
+)
+
+
+def _line(rng, templates, index):
+    return rng.choice(templates).format(n=index + 1, letter=rng.choice(GRID_LETTERS))
+
+
+def _filler(rng):
+    words = rng.sample(FILLER_WORDS, 3)
+    return f'{words[0]} {rng.randint(1, 99)} {words[1]} {words[2]} {rng.randint(1, 999)}'
+
+
+def _default(value, density, lines):
+    return int(lines * density) if value is None else value
+
+
+def iter_drawing(lines, red=0, green=0, dimensions=None, annotations=None, seed=0):
+    """
+    Yield one drawing's `lines` lines with the given number of each detection
+
+    dimensions / annotations default to a fixed share of the lines. Detections
+    are spread over the sheet at seeded random positions; the rest is filler
+    and blank lines.
+    """
+    dimensions = _default(dimensions, DIMENSION_DENSITY, lines)
+    annotations = _default(annotations, ANNOTATION_DENSITY, lines)
+    if red + green + dimensions + annotations > lines:
+        raise ValueError(f'{red + green + dimensions + annotations} detections do not fit in {lines} lines')
+
+    rng = random.Random(seed)
+    kinds = ([RED_TEMPLATES] * red + [GREEN_TEMPLATES] * green +
+             [DIMENSION_TEMPLATES] * dimensions + [ANNOTATION_TEMPLATES] * annotations)
+    positions = rng.sample(range(lines), len(kinds))
+    placed = dict(zip(positions, kinds))
+
+    for i in range(lines):
+        templates = placed.get(i)
+        if templates:
+            yield _line(rng, templates, i)
+        elif rng.random() < BLANK_DENSITY:
+            yield ''
+        else:
+            yield _filler(rng)
+
+
+def generate_drawing(lines, red=0, green=0, dimensions=None, annotations=None, seed=0):
+    """One drawing's text (see iter_drawing)"""
+    return '\n'.join(iter_drawing(lines, red, green, dimensions, annotations, seed))
+
+
+def iter_pair(lines, red=None, resolved=DEFAULT_RESOLVED, new_issues=None, seed=0):
+    """
+    (before_lines, after_lines) iterators for one revision of a sheet
+
+    BEFORE carries the engineer's red markups; AFTER carries a green
+    confirmation for `resolved` of them plus `new_issues` fresh red markups.
+    """
+    red = _default(red, RED_DENSITY, lines)
+    new_issues = _default(new_issues, DEFAULT_NEW_ISSUES * RED_DENSITY, lines)
+    before = iter_drawing(lines, red=red, seed=seed)
+    after = iter_drawing(lines, red=new_issues, green=round(red * resolved), seed=seed + 1)
+    return before, after
+
+
+def generate_pair(lines, red=None, resolved=DEFAULT_RESOLVED, new_issues=None, seed=0):
+    """(before_text, after_text) for one revision of a sheet (see iter_pair)"""
+    return tuple('\n'.join(side) for side in iter_pair(lines, red, resolved, new_issues, seed))
+
+
+def expected_counts(lines, red=None, resolved=DEFAULT_RESOLVED, new_issues=None):
+    """Detection counts the scanner must report for generate_pair(lines, ...)"""
+    red = _default(red, RED_DENSITY, lines)
+    return {
+        'before_red_markups': red,
+        'after_red_markups': _default(new_issues, DEFAULT_NEW_ISSUES * RED_DENSITY, lines),
+        'after_green_confirmations': round(red * resolved),
+        'dimensions': _default(None, DIMENSION_DENSITY, lines),
+        'annotations': _default(None, ANNOTATION_DENSITY, lines),
+    }
+
+
+def _pdf_string(text):
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return escaped.encode('utf-8')
+
+
+def write_pdf(path, text):
+    """
+    Write text (a string or an iterable of lines) as a minimal single-page PDF
+    with one uncompressed Tj per line
+
+    Each drawing line stays on its own line of the file, so the scanner sees
+    the text stream's detections (plus those in the PDF object syntax). Lines
+    are streamed to disk, so iter_drawing() can produce files larger than memory.
+    """
+    lines = text.split('\n') if isinstance(text, str) else text
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 2384 1684] '
+        b'/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>',
+        None,  # the content stream, written line by line; its length goes in object 6
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    length_object = len(objects) + 1
+
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(f'{number} 0 obj\n'.encode())
+            if body is None:
+                f.write(f'<< /Length {length_object} 0 R >>\nstream\n'.encode())
+                start = f.tell()
+                f.write(b'BT /F1 8 Tf 20 800 Td 10 TL\n')
+                for line in lines:
+                    f.write(b'(' + _pdf_string(line) + b') Tj T*\n')
+                f.write(b'ET')
+                length = f.tell() - start
+                f.write(b'\nendstream')
+            else:
+                f.write(body)
+            f.write(b'\nendobj\n')
+        offsets.append(f.tell())
+        f.write(f'{length_object} 0 obj\n{length}\nendobj\n'.encode())
+        xref = f.tell()
+        f.write(f'xref\n0 {length_object + 1}\n0000000000 65535 f \n'.encode())
+        f.writelines(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+        f.write(f'trailer\n<< /Size {length_object + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic BEFORE/AFTER drawing pair')
+    parser.add_argument('output', help='Directory for before/after files')
+    parser.add_argument('--lines', type=int, default=10000, help='Lines per drawing (default 10000)')
+    parser.add_argument('--red', type=int, help='Red markups in BEFORE (default 2%% of lines)')
+    parser.add_argument('--resolved', type=float, default=DEFAULT_RESOLVED,
+                        help='Share of red markups confirmed green in AFTER (default 0.7)')
+    parser.add_argument('--new-issues', type=int, help='Fresh red markups in AFTER')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pdf', action='store_true', help='Write before.pdf/after.pdf instead of .txt')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    pair = generate_pair(args.lines, args.red, args.resolved, args.new_issues, args.seed)
+    for side, text in zip(('before', 'after'), pair):
+        path = os.path.join(args.output, f"{side}.{'pdf' if args.pdf else 'txt'}")
+        if args.pdf:
+            write_pdf(path, text)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        print(f"📄 {path} ({args.lines} lines)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
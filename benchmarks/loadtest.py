@@ -0,0 +1,292 @@
+"""
+🎯 CMT NEXUS - END-TO-END LOAD TEST
+Drives the HTTP API the way the frontend does: each virtual user logs in via
+/api/login, then repeatedly uploads a generated BEFORE/AFTER PDF pair through
+/api/upload, runs /api/analyze and downloads the report from /download/.
+Reports p50/p95/p99 latency, throughput and error rates per endpoint;
+429/503 answers are counted, then retried after their Retry-After.
+
+Standard library only, and fully offline: --spawn starts the app under
+gunicorn (gunicorn.conf.py) in a scratch directory on a free local port, so
+worker counts can be sized before a rollout without touching real data.
+
+Usage:
+    python benchmarks/loadtest.py --spawn --workers 4 --concurrency 16 --duration 60
+    python benchmarks/loadtest.py --url http://127.0.0.1:5000 --concurrency 8 --iterations 20 --lines 20000
+    python benchmarks/loadtest.py --spawn --json loadtest.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from corpus import generate_pair, write_pdf
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+ENDPOINTS = ('login', 'upload', 'analyze', 'download')
+PERCENTILES = (50, 95, 99)
+SERVER_START_TIMEOUT = 60
+MAX_RETRY_WAIT = 30
+
+
+class Stats:
+    """Latencies and outcomes per endpoint, shared by all virtual users"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {endpoint: [] for endpoint in ENDPOINTS}
+        self.statuses = {endpoint: {} for endpoint in ENDPOINTS}
+        self.pairs = 0
+
+    def record(self, endpoint, seconds, status):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] = self.statuses[endpoint].get(status, 0) + 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            latencies = sorted(self.latencies[endpoint])
+            if not latencies:
+                continue
+            statuses = self.statuses[endpoint]
+            errors = sum(count for status, count in statuses.items() if not str(status).startswith('2'))
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'throughput_rps': round(len(latencies) / elapsed, 3),
+                'error_rate': round(errors / len(latencies), 4),
+                'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+                **{f'p{p}_seconds': round(percentile(latencies, p), 6) for p in PERCENTILES},
+                'max_seconds': round(latencies[-1], 6)
+            }
+        return {'elapsed_seconds': round(elapsed, 3), 'pairs_completed': self.pairs,
+                'pairs_per_second': round(self.pairs / elapsed, 3), 'endpoints': endpoints}
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(int(-(-p * len(sorted_values) // 100)), 1)
+    return sorted_values[rank - 1]
+
+
+def _multipart(fields, filename, data):
+    boundary = secrets.token_hex(16)
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                 f'Content-Type: application/pdf\r\n\r\n'.encode() + data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class VirtualUser:
+    """One browser session: its own cookie jar, logged in once, then analysis loops"""
+
+    def __init__(self, number, args, pdfs, stats):
+        self.number = number
+        self.args = args
+        self.pdfs = pdfs
+        self.stats = stats
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def call(self, endpoint, path, data=None, headers=None):
+        """Timed request; returns (status, body bytes), status 'error' on a connection failure"""
+        request = urllib.request.Request(self.args.url + path, data=data, headers=headers or {})
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.args.timeout) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except (OSError, urllib.error.URLError):
+            status, body = 'error', b''
+        self.stats.record(endpoint, time.perf_counter() - started, status)
+        return status, body
+
+    def call_json(self, endpoint, path, payload):
+        status, body = self.call(endpoint, path, json.dumps(payload).encode(), {'Content-Type': 'application/json'})
+        try:
+            return status, json.loads(body or b'{}')
+        except ValueError:
+            return status, {}
+
+    def upload(self, side, iteration, data):
+        body, content_type = _multipart({'type': side}, f'lt{self.number}_{iteration}_{side}.pdf', data)
+        status, payload = self.call('upload', '/api/upload', body, {'Content-Type': content_type})
+        return json.loads(payload).get('filename') if status == 200 else None
+
+    def analyze(self, before_file, after_file, deadline):
+        """/api/analyze, waiting out 429/503 Retry-After like the frontend does (each rejection is still counted)"""
+        while True:
+            status, result = self.call_json('analyze', '/api/analyze',
+                                            {'before_file': before_file, 'after_file': after_file})
+            if status not in (429, 503):
+                return status, result
+            wait = min(float(result.get('retry_after') or 1), MAX_RETRY_WAIT)
+            if time.monotonic() + wait >= deadline:
+                return status, result
+            time.sleep(wait)
+
+    def run(self, deadline):
+        status, _ = self.call_json('login', '/api/login',
+                                   {'username': self.args.username, 'password': self.args.password})
+        if status != 200:
+            return
+
+        iteration = 0
+        while time.monotonic() < deadline and (not self.args.iterations or iteration < self.args.iterations):
+            before_pdf, after_pdf = self.pdfs[(self.number + iteration) % len(self.pdfs)]
+            iteration += 1
+            before_file = self.upload('before', iteration, before_pdf)
+            after_file = self.upload('after', iteration, after_pdf)
+            if not before_file or not after_file:
+                continue
+
+            status, result = self.analyze(before_file, after_file, deadline)
+            if status != 200 or not result.get('report_file'):
+                continue
+
+            status, _ = self.call('download', f"/download/{result['report_file']}", headers={'Accept-Encoding': 'gzip'})
+            if status == 200:
+                with self.stats.lock:
+                    self.stats.pairs += 1
+
+
+def build_pdfs(count, lines, folder):
+    """count distinct generated PDF pairs as (before_bytes, after_bytes)"""
+    pdfs = []
+    for seed in range(count):
+        pair = []
+        for side, text in zip(('before', 'after'), generate_pair(lines, seed=seed * 2)):
+            path = os.path.join(folder, f'{side}_{seed}.pdf')
+            write_pdf(path, text)
+            with open(path, 'rb') as f:
+                pair.append(f.read())
+        pdfs.append(tuple(pair))
+    return pdfs
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(args, workdir):
+    """Start gunicorn.conf.py on a free port in workdir and wait for /health; returns (process, url)"""
+    port = _free_port()
+    # Every virtual user shares one login, so the per-user analysis quota is lifted
+    env = dict(os.environ, PORT=str(port), SECRET_KEY=secrets.token_hex(32),
+               METRICS_DIR=os.path.join(workdir, 'metrics'), ANALYZE_PER_USER=str(args.concurrency))
+    if args.workers:
+        env['WEB_CONCURRENCY'] = str(args.workers)
+    if args.threads:
+        env['GUNICORN_THREADS'] = str(args.threads)
+
+    log = open(os.path.join(workdir, 'server.log'), 'wb')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_DIR, 'gunicorn.conf.py'), '--pythonpath', REPO_DIR],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            urllib.request.urlopen(url + '/health', timeout=2).close()
+            print(f"🚀 Server up at {url} (log: {log.name})", file=sys.stderr)
+            return process, url
+        except OSError:
+            time.sleep(0.25)
+
+    stop_server(process)
+    with open(log.name, encoding='utf-8', errors='replace') as f:
+        tail = f.read()[-2000:]
+    raise RuntimeError(f'Server did not become healthy within {SERVER_START_TIMEOUT}s:\n{tail}')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def format_summary(summary, args):
+    lines = [f"{args.concurrency} user(s) for {summary['elapsed_seconds']}s: {summary['pairs_completed']} pair(s) "
+             f"analysed end to end ({summary['pairs_per_second']}/s)",
+             f"{'endpoint':<10}{'requests':>10}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'errors':>9}  statuses"]
+    for endpoint, stats in summary['endpoints'].items():
+        lines.append(f"{endpoint:<10}{stats['requests']:>10}{stats['throughput_rps']:>10.2f}"
+                     + ''.join(f"{stats[f'p{p}_seconds']:>9.3f}s" for p in PERCENTILES)
+                     + f"{stats['max_seconds']:>9.3f}s{stats['error_rate']:>9.1%}  "
+                     + ' '.join(f'{status}x{count}' for status, count in stats['statuses'].items()))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end load test: login, upload, analyze, download')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Server to test (ignored with --spawn)')
+    parser.add_argument('--spawn', action='store_true', help='Start a local gunicorn server for the run')
+    parser.add_argument('--workers', type=int, help='WEB_CONCURRENCY for the spawned server')
+    parser.add_argument('--threads', type=int, help='GUNICORN_THREADS for the spawned server')
+    parser.add_argument('--concurrency', '-c', type=int, default=4, help='Virtual users (default 4)')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run (default 30)')
+    parser.add_argument('--iterations', type=int, default=0, help='Stop each user after this many pairs')
+    parser.add_argument('--lines', type=int, default=2000, help='Lines per generated drawing (default 2000)')
+    parser.add_argument('--pairs', type=int, default=8, help='Distinct drawing pairs to cycle through')
+    parser.add_argument('--username', default='engineer')
+    parser.add_argument('--password', default='engineer123')
+    parser.add_argument('--timeout', type=float, default=120, help='Per-request timeout in seconds')
+    parser.add_argument('--json', help='Also write the summary as JSON here')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='cmt-nexus-loadtest-')
+    server = None
+    try:
+        pdfs = build_pdfs(max(args.pairs, 1), args.lines, workdir)
+        if args.spawn:
+            server, args.url = spawn_server(args, workdir)
+        args.url = args.url.rstrip('/')
+
+        stats = Stats()
+        deadline = time.monotonic() + args.duration
+        users = [threading.Thread(target=VirtualUser(n, args, pdfs, stats).run, args=(deadline,), daemon=True)
+                 for n in range(max(args.concurrency, 1))]
+        started = time.perf_counter()
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        summary = stats.summary(time.perf_counter() - started)
+    finally:
+        if server:
+            stop_server(server)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary.update(url=args.url, concurrency=args.concurrency, lines=args.lines,
+                   workers=args.workers, threads=args.threads)
+    print(format_summary(summary, args))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    failed = not summary['endpoints'] or any(s['error_rate'] == 1 for s in summary['endpoints'].values())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+🎯 CMT NEXUS - BENCHMARK BASELINE & REGRESSION GATE
+Records bench_yolo.py results as a baseline and checks later runs against
+it, exiting 1 with a per-case diff when a stage got slower.
+
+A case (target at one size) regresses when even its fastest run is slower
+than the baseline median by more than the tolerance: --threshold, widened
+to NOISE_SIGMAS robust standard deviations (1.4826 x MAD) of the baseline
+runs when those were noisy, and only if the slowdown is at least --min-delta
+seconds (so millisecond cases can't fail on scheduler jitter). A case that ran in
+the baseline but now blows its budget, or a growth exponent that rose by more
+than --exponent-tolerance (e.g. a linear stage turning quadratic), also fails.
+
+Baselines are machine-specific: record one on the machine that runs the gate.
+
+Usage:
+    python benchmarks/regress.py record                          # run benchmarks, save benchmarks/baseline.json
+    python benchmarks/regress.py record --results run.json       # save an existing bench_yolo.py output
+    python benchmarks/regress.py check                           # rerun with the baseline's settings and compare
+    python benchmarks/regress.py check --results run.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+
+from bench_yolo import DEFAULT_BUDGET, DEFAULT_REPEAT, DEFAULT_SIZES, TARGETS, benchmark
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA = 0.005
+DEFAULT_EXPONENT_TOLERANCE = 0.3
+NOISE_SIGMAS = 3
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _cases(document):
+    return {(r['target'], r['lines']): r for r in document['results']}
+
+
+def relative_spread(seconds):
+    """Robust standard deviation of the runs (1.4826 x MAD) relative to their median"""
+    if len(seconds) < 2:
+        return 0.0
+    median = statistics.median(seconds)
+    mad = statistics.median(abs(s - median) for s in seconds)
+    return 1.4826 * mad / median if median > 0 else 0.0
+
+
+def compare_case(baseline, current, threshold=DEFAULT_THRESHOLD, min_delta=DEFAULT_MIN_DELTA):
+    """
+    Verdict for one case present in both documents
+
+    Returns:
+        dict with verdict ('ok', 'faster', 'REGRESSION', 'new', 'not run'), change and tolerance
+    """
+    if 'median' not in baseline:
+        return {'verdict': 'new' if 'median' in current else 'not run'}
+    if 'median' not in current:
+        return {'verdict': 'REGRESSION', 'reason': current.get('reason', current['status'])}
+
+    tolerance = max(threshold, NOISE_SIGMAS * relative_spread(baseline['seconds']))
+    change = current['median'] / baseline['median'] - 1 if baseline['median'] > 0 else 0.0
+    limit = baseline['median'] * (1 + tolerance)
+    verdict = 'ok'
+    if current['min'] > limit and current['min'] - baseline['median'] >= min_delta:
+        verdict = 'REGRESSION'
+    elif current['max'] < baseline['median'] / (1 + tolerance) and baseline['median'] - current['max'] >= min_delta:
+        verdict = 'faster'
+    if current['status'] == 'over_budget' and baseline['status'] == 'ok':
+        verdict = 'REGRESSION'
+    return {'verdict': verdict, 'change': change, 'tolerance': tolerance}
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, min_delta=DEFAULT_MIN_DELTA,
+            exponent_tolerance=DEFAULT_EXPONENT_TOLERANCE):
+    """Diff two bench_yolo.py documents; returns (rows, regressions)"""
+    rows = []
+    base_cases = _cases(baseline)
+    current_cases = _cases(current)
+    for key in sorted(base_cases, key=lambda k: (TARGETS.index(k[0]), k[1])):
+        if key not in current_cases:
+            continue
+        verdict = compare_case(base_cases[key], current_cases[key], threshold, min_delta)
+        rows.append({'target': key[0], 'lines': key[1], 'baseline': base_cases[key].get('median'),
+                     'current': current_cases[key].get('median'), **verdict})
+
+    for target, growth in baseline.get('scaling', {}).items():
+        now = current.get('scaling', {}).get(target)
+        if not now or growth['exponent'] is None or now['exponent'] is None:
+            continue
+        if (now['from_lines'], now['to_lines']) != (growth['from_lines'], growth['to_lines']):
+            continue
+        rose = now['exponent'] - growth['exponent']
+        rows.append({'target': target, 'lines': f"^k {growth['from_lines']}->{growth['to_lines']}",
+                     'baseline': growth['exponent'], 'current': now['exponent'],
+                     'verdict': 'REGRESSION' if rose > exponent_tolerance else 'ok', 'exponent': True})
+
+    return rows, sum(row['verdict'] == 'REGRESSION' for row in rows)
+
+
+def _seconds(value):
+    return '-' if value is None else f'{value:.6f}s'
+
+
+def format_diff(rows):
+    lines = [f"{'target':<10}{'lines':>22}{'baseline':>14}{'current':>14}{'change':>10}  verdict"]
+    for row in rows:
+        if row.get('exponent'):
+            baseline, current = f"{row['baseline']:.3f}", f"{row['current']:.3f}"
+            change = f"{row['current'] - row['baseline']:+.3f}"
+        else:
+            baseline, current = _seconds(row['baseline']), _seconds(row['current'])
+            change = f"{row['change']:+.1%}" if 'change' in row else '-'
+        verdict = row['verdict']
+        if 'tolerance' in row and verdict != 'ok':
+            verdict += f" (tolerance {row['tolerance']:.0%})"
+        if row.get('reason'):
+            verdict += f" ({row['reason']})"
+        lines.append(f"{row['target']:<10}{row['lines']!s:>22}{baseline:>14}{current:>14}{change:>10}  {verdict}")
+    return '\n'.join(lines)
+
+
+def _settings(document):
+    """bench_yolo.benchmark() arguments that reproduce a document's run"""
+    return {
+        'targets': tuple(dict.fromkeys(r['target'] for r in document['results'])),
+        'sizes': tuple(sorted({r['lines'] for r in document['results']})),
+        'repeat': document['repeat'],
+        'budget': document['budget_seconds'],
+        'seed': document['seed'],
+    }
+
+
+def record(args):
+    if args.results:
+        document = _load(args.results)
+    else:
+        document = benchmark(args.targets, args.sizes, max(args.repeat, 1), args.budget, args.seed)
+    with open(args.baseline, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    print(f"💾 Baseline ({len(document['results'])} cases, commit {document.get('git_commit') or '?'}) "
+          f"-> {args.baseline}", file=sys.stderr)
+    return 0
+
+
+def check(args):
+    if not os.path.exists(args.baseline):
+        print(f"❌ No baseline at {args.baseline} - run 'regress.py record' first", file=sys.stderr)
+        return 2
+    baseline = _load(args.baseline)
+
+    if (baseline['platform'], baseline['python']) != (platform.platform(), platform.python_version()):
+        print(f"⚠️  Baseline was recorded on {baseline['platform']} / Python {baseline['python']}; "
+              f"timings may not be comparable", file=sys.stderr)
+
+    current = _load(args.results) if args.results else benchmark(**_settings(baseline))
+    rows, regressions = compare(baseline, current, args.threshold, args.min_delta, args.exponent_tolerance)
+
+    print(f"Baseline {baseline.get('git_commit') or '?'} ({baseline['timestamp']}) vs "
+          f"current {current.get('git_commit') or '?'} ({current['timestamp']})")
+    print(format_diff(rows))
+    if regressions:
+        print(f"\n❌ {regressions} regression(s) beyond the performance envelope")
+        return 1
+    print(f"\n✅ Within the performance envelope ({len(rows)} checks)")
+    return 0
+
+
+def _csv(value, convert=str):
+    return tuple(convert(item) for item in value.split(',') if item)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Record benchmark baselines and gate on performance regressions')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Save a benchmark run as the baseline')
+    record_parser.add_argument('--targets', type=_csv, default=TARGETS)
+    record_parser.add_argument('--sizes', type=lambda v: _csv(v, int), default=DEFAULT_SIZES)
+    record_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    record_parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET)
+    record_parser.add_argument('--seed', type=int, default=0)
+
+    check_parser = commands.add_parser('check', help='Compare a run against the baseline (exit 1 on regression)')
+    check_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                              help='Allowed slowdown as a fraction (default 0.25 = 25%%)')
+    check_parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA,
+                              help='Ignore slowdowns smaller than this many seconds (default 0.005)')
+    check_parser.add_argument('--exponent-tolerance', type=float, default=DEFAULT_EXPONENT_TOLERANCE,
+                              help='Allowed rise of a growth exponent (default 0.3)')
+
+    for sub in (record_parser, check_parser):
+        sub.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline file (default benchmarks/baseline.json)')
+        sub.add_argument('--results', help='Use this bench_yolo.py output instead of running the benchmarks')
+
+    args = parser.parse_args(argv)
+    return record(args) if args.command == 'record' else check(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
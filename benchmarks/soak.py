@@ -0,0 +1,256 @@
+"""
+🎯 CMT NEXUS - LARGE-DOCUMENT SOAK TEST
+Feeds progressively larger BEFORE/AFTER drawings (default 1 MB up to 256 MB
+each) through the full run_yolo_analysis() pipeline, one fresh process per
+size so each peak RSS is measured on its own, and fails loudly when:
+
+  * peak RSS of any run exceeds --rss-ceiling-mb
+  * peak RSS grows by more than --max-rss-per-mb MB per extra MB of input
+    from one size to the next (a stage that starts holding extra whole-file
+    copies shows up here long before the ceiling is hit)
+  * latency is not roughly linear in input size: the log-log slope of total
+    time, or of any stage, over the sizes slow enough to time reliably is
+    above --max-slope (1.0 is linear, 2.0 quadratic)
+
+Each size is run --repeat times (each in a fresh process); its time and stage
+times are the medians and its peak RSS the maximum, so one run disturbed by
+the machine doesn't fail the slope check.
+
+Red markups are held at --red per drawing while the rest of the sheet grows,
+because the RED-to-GREEN matcher is quadratic in the number of markups, not
+in document size; --scale-markups grows them with the sheet instead.
+
+Usage:
+    python benchmarks/soak.py                                   # 1, 4, 16, 64, 256 MB
+    python benchmarks/soak.py --sizes-mb 8,32,128,512 --rss-ceiling-mb 6144
+    python benchmarks/soak.py --sizes-mb 1,2,4 --scale-markups --json soak.json
+    python benchmarks/soak.py --repeat 5 --max-slope 1.3                 # stricter, on a quiet machine
+"""
+
+import argparse
+import json
+import math
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import RED_DENSITY, iter_pair, write_pdf
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_SIZES_MB = (1, 4, 16, 64, 256)
+DEFAULT_RSS_CEILING_MB = 4096
+# The pipeline peaks at about 5.5 MB of RSS per input MB; one extra whole-file copy adds about 1
+DEFAULT_RSS_PER_MB = 6.0
+# Quadratic stages come out near 2.0; below 1.5 is left to timing noise
+DEFAULT_MAX_SLOPE = 1.5
+DEFAULT_REPEAT = 3
+DEFAULT_RED = 200
+DEFAULT_TIMEOUT = 1800
+MIN_FIT_SECONDS = 0.5
+SAMPLE_LINES = 20000
+STAGES = ('extract', 'scan_before', 'scan_after', 'compare', 'report_render', 'report_write')
+
+
+def _rss_mb():
+    """Current resident set size (Linux /proc; peak so far elsewhere)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def child(workdir):
+    """Run one analysis of workdir/uploads/{before,after}.pdf and print its measurements as JSON"""
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+    import app_yolo_complete as app
+
+    baseline = _rss_mb()
+    started = time.perf_counter()
+    payload, status = app.run_yolo_analysis('before.pdf', 'after.pdf')
+    seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        'status': status,
+        'message': payload.get('message'),
+        'seconds': seconds,
+        'stages': {stage: timings[-1] for stage, timings in app.STAGE_TIMINGS.items()},
+        'baseline_rss_mb': baseline,
+        'peak_rss_mb': _peak_rss_mb()
+    }))
+    return 0
+
+
+def _lines_per_mb(workdir):
+    """Lines of generated drawing per MB of PDF, measured on a sample"""
+    path = os.path.join(workdir, 'sample.pdf')
+    write_pdf(path, iter_pair(SAMPLE_LINES)[0])
+    size = os.path.getsize(path)
+    os.remove(path)
+    return SAMPLE_LINES * 2 ** 20 / size
+
+
+def write_documents(folder, size_mb, lines_per_mb, red, scale_markups):
+    """Generate the BEFORE/AFTER pair for one size into folder; returns total input MB"""
+    lines = max(int(size_mb * lines_per_mb), 10)
+    red = int(lines * RED_DENSITY) if scale_markups else min(red, lines // 10)
+    before, after = iter_pair(lines, red=red, new_issues=max(red // 20, 1))
+    total = 0
+    for name, side in (('before.pdf', before), ('after.pdf', after)):
+        path = os.path.join(folder, name)
+        write_pdf(path, side)
+        total += os.path.getsize(path)
+    return total / 2 ** 20, lines, red
+
+
+def loglog_slope(points):
+    """Least-squares slope of log(seconds) against log(input MB)"""
+    xs = [math.log(x) for x, _ in points]
+    ys = [math.log(y) for _, y in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else None
+
+
+def _fit(runs, key):
+    points = [(run['input_mb'], key(run)) for run in runs if key(run) is not None and key(run) >= MIN_FIT_SECONDS]
+    return loglog_slope(points) if len({x for x, _ in points}) >= 2 else None
+
+
+def check(runs, args):
+    """Assertion failures for the completed runs"""
+    failures = []
+    for run in runs:
+        if run['peak_rss_mb'] > args.rss_ceiling_mb:
+            failures.append(f"{run['size_mb']} MB: peak RSS {run['peak_rss_mb']:.0f} MB exceeds the "
+                            f"{args.rss_ceiling_mb} MB ceiling")
+
+    # Marginal growth between sizes, so the interpreter and fixed buffers cancel out
+    for smaller, larger in zip(runs, runs[1:]):
+        per_mb = (larger['peak_rss_mb'] - smaller['peak_rss_mb']) / (larger['input_mb'] - smaller['input_mb'])
+        larger['rss_per_input_mb'] = round(per_mb, 3)
+        if per_mb > args.max_rss_per_mb:
+            failures.append(f"{smaller['size_mb']} -> {larger['size_mb']} MB: peak RSS grew {per_mb:.1f} MB "
+                            f"per input MB (limit {args.max_rss_per_mb}) - extra whole-file copies?")
+
+    slopes = {'total': _fit(runs, lambda run: run['seconds'])}
+    for stage in STAGES:
+        slopes[stage] = _fit(runs, lambda run: run['stages'].get(stage))
+    for name, slope in slopes.items():
+        if slope is not None and slope > args.max_slope:
+            failures.append(f"{name}: latency grows as size^{slope:.2f} (limit {args.max_slope}) - quadratic behaviour?")
+    return failures, slopes
+
+
+def run_size(size_mb, args, workdir, lines_per_mb):
+    uploads = os.path.join(workdir, 'uploads')
+    shutil.rmtree(uploads, ignore_errors=True)
+    shutil.rmtree(os.path.join(workdir, 'reports'), ignore_errors=True)
+    os.makedirs(uploads)
+    input_mb, lines, red = write_documents(uploads, size_mb, lines_per_mb, args.red, args.scale_markups)
+    run = {'size_mb': size_mb, 'input_mb': round(input_mb, 3), 'lines': lines, 'red_markups': red}
+
+    measured = []
+    for _ in range(args.repeat):
+        try:
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', workdir],
+                                    capture_output=True, text=True, timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            return dict(run, error=f'timed out after {args.timeout}s')
+
+        if result.returncode != 0:
+            reason = 'killed (out of memory?)' if result.returncode < 0 else f'exit {result.returncode}'
+            return dict(run, error=f"{reason}: {result.stderr.strip()[-500:]}")
+
+        attempt = json.loads(result.stdout.strip().splitlines()[-1])
+        if attempt['status'] != 200:
+            return dict(run, error=f"analysis returned {attempt['status']}: {attempt['message']}")
+        measured.append(attempt)
+
+    run.update({
+        'status': 200,
+        'repeat': len(measured),
+        'seconds': statistics.median(m['seconds'] for m in measured),
+        'seconds_runs': [round(m['seconds'], 4) for m in measured],
+        'stages': {stage: statistics.median(m['stages'][stage] for m in measured)
+                   for stage in measured[0]['stages']},
+        'baseline_rss_mb': statistics.median(m['baseline_rss_mb'] for m in measured),
+        'peak_rss_mb': max(m['peak_rss_mb'] for m in measured)
+    })
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Soak the analyze pipeline with growing documents')
+    parser.add_argument('--sizes-mb', type=lambda v: tuple(float(s) for s in v.split(',') if s),
+                        default=DEFAULT_SIZES_MB, help='Size of each drawing in MB (default 1,4,16,64,256)')
+    parser.add_argument('--rss-ceiling-mb', type=float, default=DEFAULT_RSS_CEILING_MB,
+                        help='Fail if any run peaks above this RSS (default 4096)')
+    parser.add_argument('--max-rss-per-mb', type=float, default=DEFAULT_RSS_PER_MB,
+                        help='Fail if peak RSS grows more than this per extra MB of input (default 6)')
+    parser.add_argument('--max-slope', type=float, default=DEFAULT_MAX_SLOPE,
+                        help='Fail if time ~ size^k with k above this (default 1.5)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Runs per size; median times and maximum RSS are checked (default 3)')
+    parser.add_argument('--red', type=int, default=DEFAULT_RED, help='Red markups per drawing (default 200)')
+    parser.add_argument('--scale-markups', action='store_true', help='Grow markups with the sheet (2%% of lines)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Seconds allowed per size')
+    parser.add_argument('--json', help='Also write runs, slopes and failures as JSON here')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return child(args.child)
+
+    workdir = tempfile.mkdtemp(prefix='cmt-nexus-soak-')
+    runs = []
+    failures = []
+    try:
+        lines_per_mb = _lines_per_mb(workdir)
+        for size_mb in sorted(args.sizes_mb):
+            run = run_size(size_mb, args, workdir, lines_per_mb)
+            runs.append(run)
+            if 'error' in run:
+                failures.append(f"{size_mb} MB: {run['error']}")
+                print(f"💥 {size_mb:>7} MB  {run['error']}", file=sys.stderr)
+                break
+            print(f"🧪 {size_mb:>7} MB  {run['lines']:>10} lines  {run['seconds']:8.2f}s  "
+                  f"peak RSS {run['peak_rss_mb']:7.0f} MB  "
+                  + ' '.join(f"{stage} {seconds:.2f}s" for stage, seconds in run['stages'].items()),
+                  file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    completed = [run for run in runs if 'error' not in run]
+    more_failures, slopes = check(completed, args)
+    failures.extend(more_failures)
+
+    print('📈 ' + '  '.join(f'{name} ^{slope:.2f}' for name, slope in slopes.items() if slope is not None))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'runs': runs, 'slopes': slopes, 'failures': failures}, f, indent=2)
+
+    if failures:
+        print('\n❌ SOAK TEST FAILED')
+        for failure in failures:
+            print(f'   - {failure}')
+        return 1
+    print(f"✅ Soak passed: {len(completed)} size(s) up to {completed[-1]['size_mb']} MB, "
+          f"peak RSS {max(run['peak_rss_mb'] for run in completed):.0f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
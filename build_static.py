@@ -0,0 +1,143 @@
+"""
+🎯 CMT NEXUS - FRONTEND ASSET BUILD
+Minifies frontend/app.css and frontend/app.js, fingerprints them (and the
+self-hosted fonts) by content hash and writes them to static/dist/ together
+with a manifest.json the server loads at startup.
+
+The build fails when a self-hosted font is missing from frontend/fonts/, so a
+deploy never silently falls back to system fonts; --allow-missing-fonts builds
+anyway (the stylesheet then drops the missing sources).
+
+Usage:
+    python build_static.py                        # build static/dist/
+    python build_static.py --fetch-fonts          # download missing woff2 fonts into frontend/fonts/ first
+    python build_static.py --allow-missing-fonts  # build even if some fonts are missing
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import urllib.request
+
+from app_yolo_complete import FRONTEND_FOLDER, STATIC_DIST_FOLDER, collect_frontend_assets
+
+FONT_CSS_URL = 'https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&family=Space+Mono:wght@400;700&display=swap'
+FONT_FILES = {
+    ('Orbitron', '400'): 'orbitron-latin.woff2',
+    ('Space Mono', '400'): 'space-mono-400-latin.woff2',
+    ('Space Mono', '700'): 'space-mono-700-latin.woff2',
+}
+FONT_FACE_PATTERN = re.compile(
+    r"/\* latin \*/\s*@font-face\s*\{[^}]*?font-family:\s*'([^']+)';[^}]*?font-weight:\s*(\d+)[^}]*?url\((https://[^)]+\.woff2)\)"
+)
+# Chrome's UA makes Google Fonts answer with woff2 sources
+FONT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+CSS_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_SPACE_PATTERN = re.compile(r'\s+')
+CSS_PUNCTUATION_PATTERN = re.compile(r'\s*([{};:,>])\s*')
+
+
+def minify_css(text):
+    """Strip comments and collapse whitespace around CSS punctuation"""
+    text = CSS_COMMENT_PATTERN.sub('', text)
+    text = CSS_SPACE_PATTERN.sub(' ', text)
+    text = CSS_PUNCTUATION_PATTERN.sub(r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    """
+    Drop indentation, blank lines and whole-line // comments
+
+    Deliberately conservative: statements, strings and line breaks are kept
+    as written so automatic semicolon insertion behaves exactly as before.
+    """
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def minify(name, text):
+    if name.endswith('.css'):
+        return minify_css(text)
+    if name.endswith('.js'):
+        return minify_js(text)
+    return text
+
+
+def missing_fonts(font_folder):
+    """FONT_FILES names not present in font_folder"""
+    return sorted(name for name in FONT_FILES.values() if not os.path.isfile(os.path.join(font_folder, name)))
+
+
+def fetch_fonts(font_folder, names=None):
+    """Download the latin woff2 subsets referenced by app.css (or just `names`) from Google Fonts"""
+    names = set(FONT_FILES.values() if names is None else names)
+    os.makedirs(font_folder, exist_ok=True)
+    request = urllib.request.Request(FONT_CSS_URL, headers={'User-Agent': FONT_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        css = response.read().decode('utf-8')
+
+    for family, weight, url in FONT_FACE_PATTERN.findall(css):
+        name = FONT_FILES.get((family, weight))
+        if name not in names:
+            continue
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        with open(os.path.join(font_folder, name), 'wb') as f:
+            f.write(data)
+        print(f"⬇️  {family} {weight} -> fonts/{name} ({len(data)} bytes)", file=sys.stderr)
+
+
+def build(source_folder=FRONTEND_FOLDER, output_folder=STATIC_DIST_FOLDER):
+    """Write fingerprinted assets and manifest.json, replacing any previous build"""
+    assets = collect_frontend_assets(source_folder, minify=minify)
+
+    if os.path.isdir(output_folder):
+        shutil.rmtree(output_folder)
+    os.makedirs(os.path.join(output_folder, 'fonts'), exist_ok=True)
+
+    manifest = {}
+    for logical, (hashed, data) in sorted(assets.items()):
+        with open(os.path.join(output_folder, hashed), 'wb') as f:
+            f.write(data)
+        manifest[logical] = hashed
+        print(f"📦 {logical} -> {hashed} ({len(data)} bytes)", file=sys.stderr)
+
+    with open(os.path.join(output_folder, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build fingerprinted frontend assets into static/dist/')
+    parser.add_argument('--fetch-fonts', action='store_true',
+                        help='Download the self-hosted woff2 fonts missing from frontend/fonts/ before building')
+    parser.add_argument('--allow-missing-fonts', action='store_true',
+                        help='Build even if some self-hosted fonts are missing (pages fall back to system fonts)')
+    parser.add_argument('--output', default=STATIC_DIST_FOLDER, help='Output directory (default: static/dist)')
+    args = parser.parse_args(argv)
+
+    font_folder = os.path.join(FRONTEND_FOLDER, 'fonts')
+    if args.fetch_fonts and missing_fonts(font_folder):
+        fetch_fonts(font_folder, missing_fonts(font_folder))
+
+    missing = missing_fonts(font_folder)
+    if missing and not args.allow_missing_fonts:
+        print(f"❌ Fonts missing from {font_folder}: {', '.join(missing)} "
+              f"(run with --fetch-fonts, or --allow-missing-fonts to build without them)", file=sys.stderr)
+        return 1
+
+    build(output_folder=args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,521 @@
+let isLoggedIn = false;
+let beforeFile = null;
+let afterFile = null;
+let currentReportFile = null;
+let CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+
+// ========== SESSION BOOTSTRAP ==========
+// The page shell is static and cached; user-specific bits come from /api/session
+function renderUserArea(name) {
+    document.getElementById('userArea').innerHTML = `
+        <div class="user-dropdown">
+            <div class="user-display" onclick="toggleDropdown()"></div>
+            <div class="dropdown-content" id="userDropdown">
+                <button onclick="logout()">SIGN OUT</button>
+            </div>
+        </div>
+    `;
+    document.querySelector('#userArea .user-display').textContent = '👤 ' + name + ' ▼';
+    const heroSignIn = document.getElementById('heroSignIn');
+    if (heroSignIn) heroSignIn.remove();
+}
+
+async function loadSession() {
+    try {
+        const response = await fetch('/api/session', { credentials: 'include' });
+        const data = await response.json();
+        CHUNKED_UPLOAD_THRESHOLD = data.upload_chunk_size;
+        isLoggedIn = data.logged_in;
+        if (data.logged_in) renderUserArea(data.user.name);
+    } catch (error) {
+        console.error('Session bootstrap error:', error);
+    }
+}
+
+loadSession();
+
+// ========== CUSTOM CURSOR ==========
+const cursor = document.getElementById('cursor');
+const cursorTrail = document.getElementById('cursorTrail');
+
+document.addEventListener('mousemove', (e) => {
+    cursor.style.left = e.clientX + 'px';
+    cursor.style.top = e.clientY + 'px';
+
+    setTimeout(() => {
+        cursorTrail.style.left = e.clientX + 'px';
+        cursorTrail.style.top = e.clientY + 'px';
+    }, 50);
+});
+
+document.addEventListener('click', (e) => {
+    const splash = document.createElement('div');
+    splash.className = 'cursor-splash';
+    splash.style.left = e.clientX + 'px';
+    splash.style.top = e.clientY + 'px';
+    document.body.appendChild(splash);
+
+    setTimeout(() => splash.remove(), 600);
+});
+
+// ========== PARTICLES ==========
+function generateParticles() {
+    const particlesContainer = document.getElementById('particles');
+    for (let i = 0; i < 50; i++) {
+        const particle = document.createElement('div');
+        particle.className = 'particle';
+        particle.style.left = Math.random() * 100 + '%';
+        particle.style.top = Math.random() * 100 + '%';
+        particle.style.animationDelay = Math.random() * 15 + 's';
+        particlesContainer.appendChild(particle);
+    }
+}
+
+generateParticles();
+
+// ========== RIGHT-CLICK PROTECTION ==========
+document.addEventListener('contextmenu', (e) => {
+    e.preventDefault();
+    const popup = document.getElementById('protectionPopup');
+    popup.classList.add('active');
+    setTimeout(() => popup.classList.remove('active'), 2000);
+});
+
+document.addEventListener('keydown', (e) => {
+    if (e.key === 'F12' ||
+        (e.ctrlKey && e.shiftKey && e.key === 'I') ||
+        (e.ctrlKey && e.key === 'u')) {
+        e.preventDefault();
+        const popup = document.getElementById('protectionPopup');
+        popup.classList.add('active');
+        setTimeout(() => popup.classList.remove('active'), 2000);
+    }
+});
+
+// ========== NAVIGATION ==========
+function scrollToAnalyze() {
+    document.getElementById('analyze').scrollIntoView({ behavior: 'smooth' });
+}
+
+function toggleDropdown() {
+    document.getElementById('userDropdown').classList.toggle('active');
+}
+
+function showLogin() {
+    document.getElementById('loginModal').classList.add('active');
+}
+
+function closeLogin() {
+    document.getElementById('loginModal').classList.remove('active');
+}
+
+function showIdenticalPopup() {
+    document.getElementById('popupOverlay').classList.add('active');
+    document.getElementById('identicalPopup').classList.add('active');
+}
+
+function closeIdenticalPopup() {
+    document.getElementById('popupOverlay').classList.remove('active');
+    document.getElementById('identicalPopup').classList.remove('active');
+}
+
+// ========== AUTH ==========
+async function handleLogin(e) {
+    e.preventDefault();
+    const username = document.getElementById('username').value;
+    const password = document.getElementById('password').value;
+
+    try {
+        const response = await fetch('/api/login', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ username, password }),
+            credentials: 'include'
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            closeLogin();
+            location.reload();
+        } else {
+            alert('Login failed: ' + data.message);
+        }
+    } catch (error) {
+        alert('Error: ' + error.message);
+    }
+}
+
+async function logout() {
+    try {
+        await fetch('/api/logout', {
+            method: 'POST',
+            credentials: 'include'
+        });
+        location.reload();
+    } catch (error) {
+        console.error('Logout error:', error);
+    }
+}
+
+// ========== FILE UPLOAD ==========
+async function handleFileSelect(type) {
+    const fileInput = document.getElementById(type + 'File');
+    const file = fileInput.files[0];
+
+    if (!file) return;
+
+    try {
+        let data;
+        if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+            data = await uploadChunked(file, type);
+        } else {
+            const formData = new FormData();
+            formData.append('file', file);
+            formData.append('type', type);
+
+            const response = await fetch('/api/upload', {
+                method: 'POST',
+                body: formData,
+                credentials: 'include'
+            });
+
+            data = await response.json();
+        }
+
+        if (data.success) {
+            if (type === 'before') {
+                beforeFile = data.filename;
+                document.getElementById('beforeName').textContent = '✓ ' + file.name;
+                document.getElementById('beforeBox').classList.add('has-file');
+            } else {
+                afterFile = data.filename;
+                document.getElementById('afterName').textContent = '✓ ' + file.name;
+                document.getElementById('afterBox').classList.add('has-file');
+            }
+
+            if (beforeFile && afterFile) {
+                document.getElementById('analyzeBtn').disabled = false;
+            }
+        } else {
+            alert('Upload failed: ' + data.message);
+        }
+    } catch (error) {
+        alert('Upload error: ' + error.message);
+    }
+}
+
+// ========== CHUNKED UPLOAD (large drawing sets) ==========
+async function sha256Hex(buffer) {
+    // crypto.subtle only exists on secure origins; the checksum header is optional
+    if (!(window.crypto && window.crypto.subtle)) return null;
+    const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function uploadChunked(file, type) {
+    const resumeKey = 'cmt-upload:' + type + ':' + file.name + ':' + file.size + ':' + file.lastModified;
+    let uploadId = localStorage.getItem(resumeKey);
+    let status = null;
+
+    if (uploadId) {
+        const response = await fetch('/api/upload/chunked/' + uploadId, { credentials: 'include' });
+        status = response.ok ? await response.json() : null;
+    }
+
+    if (!status || !status.success) {
+        const response = await fetch('/api/upload/chunked', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, type: type, size: file.size }),
+            credentials: 'include'
+        });
+        status = await response.json();
+        if (!status.success) return status;
+        uploadId = status.upload_id;
+        localStorage.setItem(resumeKey, uploadId);
+    }
+
+    let offset = status.offset;
+    let failures = 0;
+
+    while (offset < file.size) {
+        const chunk = await file.slice(offset, offset + status.chunk_size).arrayBuffer();
+        const headers = { 'Content-Type': 'application/octet-stream' };
+        const checksum = await sha256Hex(chunk);
+        if (checksum) headers['X-Chunk-SHA256'] = checksum;
+
+        try {
+            const response = await fetch(`/api/upload/chunked/${uploadId}?offset=${offset}`, {
+                method: 'PUT',
+                headers: headers,
+                body: chunk,
+                credentials: 'include'
+            });
+            const data = await response.json();
+
+            if (!data.success && response.status !== 409 && response.status !== 422) return data;
+            if (!data.success && ++failures > 3) return data;
+            if (data.success) failures = 0;
+            offset = data.offset;
+        } catch (error) {
+            // Dropped connection: ask the server where to resume from
+            if (++failures > 3) throw error;
+            await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+            const response = await fetch('/api/upload/chunked/' + uploadId, { credentials: 'include' });
+            offset = (await response.json()).offset;
+        }
+    }
+
+    const response = await fetch(`/api/upload/chunked/${uploadId}/complete`, {
+        method: 'POST',
+        credentials: 'include'
+    });
+    const data = await response.json();
+    if (data.success) localStorage.removeItem(resumeKey);
+    return data;
+}
+
+// ========== ANALYSIS ==========
+const STAGE_LABELS = {
+    queued: 'Waiting for a free analysis worker',
+    extract: 'Extracting PDF content',
+    scan_before: 'Scanning BEFORE PDF in 1x1 inch boxes',
+    scan_after: 'Scanning AFTER PDF for green confirmations',
+    compare: 'Matching red markups to green confirmations',
+    render_report: 'Writing YOLO analysis report',
+    done: 'Analysis complete'
+};
+
+function showAnalysisStage(stage, progress, counts) {
+    const label = STAGE_LABELS[stage] || stage;
+    let text = label + ' • ' + progress + '%';
+    if (counts && counts.red_markups !== undefined) text += ' • 🔴 ' + counts.red_markups;
+    if (counts && counts.green_confirmations !== undefined) text += ' • ✅ ' + counts.green_confirmations;
+    document.querySelector('.loading-subtitle').textContent = text;
+}
+
+function followAnalysisEvents(eventsUrl) {
+    // Live stage progress over Server-Sent Events; resolves with the job status
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(eventsUrl, { withCredentials: true });
+        source.addEventListener('progress', (e) => {
+            const data = JSON.parse(e.data);
+            showAnalysisStage(data.stage, data.progress, data);
+        });
+        source.addEventListener('done', (e) => {
+            source.close();
+            resolve(JSON.parse(e.data));
+        });
+        source.onerror = () => {
+            source.close();
+            reject(new Error('Progress stream interrupted'));
+        };
+    });
+}
+
+const MAX_BUSY_RETRIES = 3;
+
+async function submitAnalysisJob() {
+    // A busy server answers 503 + Retry-After; wait it out a few times before giving up
+    for (let attempt = 0; ; attempt++) {
+        const response = await fetch('/api/analyze/jobs', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                before_file: beforeFile,
+                after_file: afterFile
+            }),
+            credentials: 'include'
+        });
+        const submitted = await response.json();
+        if (response.status !== 503 || attempt >= MAX_BUSY_RETRIES) return submitted;
+
+        const wait = Math.min(submitted.retry_after || 5, 30);
+        showAnalysisStage('queued', 0);
+        await new Promise(resolve => setTimeout(resolve, wait * 1000));
+    }
+}
+
+async function runAnalysisJob() {
+    // Submit as a background job, then poll until the job finishes
+    const submitted = await submitAnalysisJob();
+    if (!submitted.success) return submitted;
+
+    if (window.EventSource) {
+        try {
+            const job = await followAnalysisEvents(submitted.events_url);
+            return job.result;
+        } catch (error) {
+            // Fall through to polling if the stream is blocked or dropped
+        }
+    }
+
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const response = await fetch(submitted.status_url, { credentials: 'include' });
+        const job = await response.json();
+        if (!job.success) return job;
+
+        showAnalysisStage(job.stage, job.progress);
+        if (job.status === 'done' || job.status === 'failed') return job.result;
+    }
+}
+
+async function performAnalysis() {
+    if (!beforeFile || !afterFile) {
+        alert('Please upload both files');
+        return;
+    }
+
+    document.getElementById('loadingOverlay').classList.add('active');
+    showAnalysisStage('queued', 0);
+
+    const minDelay = new Promise(resolve => setTimeout(resolve, 3000));
+
+    try {
+        const [data] = await Promise.all([runAnalysisJob(), minDelay]);
+
+        document.getElementById('loadingOverlay').classList.remove('active');
+
+        if (data.identical) {
+            showIdenticalPopup();
+        } else if (data.success) {
+            displayYOLOResults(data.yolo_analysis);
+            if (data.report_file) {
+                currentReportFile = data.report_file;
+            }
+        } else {
+            alert('Analysis failed: ' + data.message);
+        }
+    } catch (error) {
+        document.getElementById('loadingOverlay').classList.remove('active');
+        alert('Error: ' + error.message);
+    }
+}
+
+function displayYOLOResults(analysis) {
+    const resultsSection = document.getElementById('results');
+
+    const before = analysis.before;
+    const after = analysis.after;
+    const comparison = analysis.comparison;
+
+    let statusClass = 'error';
+    if (comparison.status === 'ALL_RESOLVED') statusClass = 'success';
+    else if (comparison.status === 'PARTIAL') statusClass = 'warning';
+
+    // CLEAN PROFESSIONAL DISPLAY - NO RAW TEXT
+    let redMarkupsHTML = '';
+    if (analysis.red_markups_list && analysis.red_markups_list.length > 0) {
+        redMarkupsHTML = `
+            <div style="background: rgba(255,0,110,0.1); padding: 25px; border-radius: 15px; border-left: 4px solid #ff006e;">
+                <h4 style="color: #ff006e; margin-bottom: 15px; font-size: 18px;">🔴 Red Marked Areas Detected</h4>
+                <p style="font-size: 16px; line-height: 1.8;">
+                    Found <strong>${analysis.red_markups_list.length}</strong> area(s) marked by engineer requiring attention.
+                </p>
+                <p style="margin-top: 10px; opacity: 0.9;">
+                    Keywords detected: ${[...new Set(analysis.red_markups_list.map(r => r.keyword))].join(', ')}
+                </p>
+            </div>
+        `;
+    } else {
+        redMarkupsHTML = '<p style="color: #888;">No red markups detected</p>';
+    }
+
+    let unresolvedHTML = '';
+    if (analysis.unresolved_items && analysis.unresolved_items.length > 0) {
+        unresolvedHTML = `
+            <div class="result-card">
+                <h3>❌ AREAS REQUIRING ATTENTION</h3>
+                <div style="background: rgba(255,0,110,0.1); padding: 25px; border-radius: 15px; margin-top: 20px;">
+                    <p style="font-size: 18px; font-weight: bold; color: #ff006e; margin-bottom: 15px;">
+                        ${analysis.unresolved_items.length} area(s) still need updates
+                    </p>
+                    ${analysis.unresolved_items.map((item, idx) => `
+                        <div style="background: rgba(0,0,0,0.2); padding: 15px; border-radius: 10px; margin-bottom: 10px;">
+                            <strong>Area ${idx + 1}:</strong> ${item.severity} priority
+                        </div>
+                    `).join('')}
+                </div>
+                ${comparison.status === 'NONE_RESOLVED' ? `
+                    <div style="margin-top: 25px; padding: 30px; background: rgba(255,0,110,0.15); border-radius: 15px; border: 2px solid #ff006e;">
+                        <h3 style="color: #ff006e; margin-bottom: 15px;">❌ NO CHANGES DETECTED</h3>
+                        <p style="font-size: 16px; line-height: 1.8;">
+                            The AFTER drawing does not show any updates in the marked areas.
+                        </p>
+                        <p style="margin-top: 15px; font-weight: bold;">
+                            ⚠️ Action Required: Please review and update all red marked areas before resubmitting.
+                        </p>
+                    </div>
+                ` : ''}
+            </div>
+        `;
+    }
+
+    resultsSection.innerHTML = `
+        <div class="status-banner ${statusClass}">
+            <h2>${comparison.message}</h2>
+            <p style="margin-top: 15px; font-size: 20px;">Resolution Rate: ${comparison.resolution_rate}%</p>
+        </div>
+
+        <div class="results-grid">
+            <div class="result-card">
+                <h3>📄 BEFORE PDF</h3>
+                <p>1x1" Boxes Scanned: ${before.total_1x1_boxes}</p>
+                <p>🔴 Red Markups: ${before.red_markups}</p>
+                <p>📐 Dimensions: ${before.dimensions}</p>
+                <p>📝 Annotations: ${before.annotations}</p>
+            </div>
+
+            <div class="result-card">
+                <h3>📄 AFTER PDF</h3>
+                <p>1x1" Boxes Scanned: ${after.total_1x1_boxes}</p>
+                <p>✅ Green Confirmations: ${after.green_confirmations}</p>
+                <p>📐 Dimensions: ${after.dimensions}</p>
+                <p>📝 Annotations: ${after.annotations}</p>
+            </div>
+        </div>
+
+        <div class="result-card">
+            <h3>🔴 RED MARKUPS DETECTED (BEFORE)</h3>
+            ${redMarkupsHTML}
+        </div>
+
+        ${unresolvedHTML}
+
+        <div class="result-card">
+            <h3>📊 COMPARISON SUMMARY</h3>
+            <p>Total Engineer Comments: ${comparison.total_comments}</p>
+            <p style="color: #00ff41;">✅ Resolved: ${comparison.resolved}</p>
+            <p style="color: var(--secondary);">❌ Unresolved: ${comparison.unresolved}</p>
+        </div>
+
+        <button class="download-btn" onclick="downloadReport()">
+            📥 DOWNLOAD YOLO ANALYSIS REPORT
+        </button>
+    `;
+
+    resultsSection.classList.add('active');
+    resultsSection.scrollIntoView({ behavior: 'smooth' });
+}
+
+function downloadReport() {
+    if (currentReportFile) {
+        window.location.href = '/download/' + currentReportFile;
+    } else {
+        alert('No report available');
+    }
+}
+
+window.onclick = function(event) {
+    const modal = document.getElementById('loginModal');
+    if (event.target === modal) {
+        closeLogin();
+    }
+
+    const dropdown = document.getElementById('userDropdown');
+    if (dropdown && !event.target.closest('.user-dropdown')) {
+        dropdown.classList.remove('active');
+    }
+}
@@ -0,0 +1,84 @@
+"""
+🎯 CMT NEXUS - PRODUCTION SERVER CONFIG
+Pre-fork gunicorn setup for app_yolo_complete (see Procfile).
+
+Usage:
+    gunicorn -c gunicorn.conf.py
+
+Every setting can be overridden from the environment:
+    SERVER_MODE                wsgi (threaded Flask workers, default) or asgi (asgi_yolo on uvicorn workers)
+    PORT                       listen port (default 5000)
+    WEB_CONCURRENCY            worker processes (default 2 x CPU + 1)
+    GUNICORN_THREADS           threads per worker (default 4, wsgi mode only)
+    GUNICORN_MAX_REQUESTS      recycle a worker after this many requests (default 1000, 0 = never)
+    GUNICORN_MAX_REQUESTS_JITTER  random extra requests so workers don't recycle together (default 100)
+    GUNICORN_TIMEOUT           seconds before a silent worker is killed (default 120)
+    GUNICORN_GRACEFUL_TIMEOUT  seconds a stopping worker gets to finish requests (default 120)
+    GUNICORN_PRELOAD           load and warm the app once in the master before forking (default 1)
+    METRICS_DIR                where workers share /metrics values and per-user analysis quotas (default: a per-port temp dir, cleared at start)
+    ANALYZE_CONCURRENCY        analysis threads per worker (default 1 here, since there are already 2 x CPU + 1 workers)
+
+Set SECRET_KEY (and SESSION_BACKEND=sqlite if sessions should live server-side)
+so logins are valid on every worker, across restarts and on other nodes.
+
+Signals: HUP re-reads this file and gracefully replaces the workers. With
+preload enabled, new application code needs USR2 (start a new master) then
+WINCH/TERM on the old one, or a plain restart.
+"""
+
+import os
+import shutil
+import tempfile
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+if SERVER_MODE == 'asgi':
+    # Needs requirements_async.txt; one event loop per worker holds many slow clients
+    wsgi_app = 'asgi_yolo:app'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'app_yolo_complete:app'
+    worker_class = 'gthread'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Set before the app is imported so every worker aggregates /metrics through it
+METRICS_DIR = os.environ.setdefault(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), f"cmt-nexus-metrics-{os.environ.get('PORT', '5000')}")
+)
+
+workers = int(os.environ.get('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+# The workers already cover the cores; more CPU-bound analyses per worker only oversubscribe them
+os.environ.setdefault('ANALYZE_CONCURRENCY', '1')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Analyses run for a while; give in-flight ones time to finish on reload/recycle
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 120))
+keepalive = 5
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Counters start from zero for each server run"""
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+
+def when_ready(server):
+    """Warm templates and matchers in the master so workers inherit them"""
+    if preload_app:
+        from app_yolo_complete import warm_up
+        warm_up()
+        server.log.info('YOLO analysis pipeline warmed up before forking')
+
+
+def post_fork(server, worker):
+    server.log.info('Worker %s ready (%s)', worker.pid, worker_class)
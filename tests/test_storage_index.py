@@ -0,0 +1,51 @@
+"""Storage index: usage totals stay right when a stored name is written again"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_yolo_complete as app  # noqa: E402
+
+
+def test_readding_a_name_updates_usage(tmp_path):
+    index = app.StorageIndex(str(tmp_path / 'storage.sqlite3'))
+    index.add('upload', 'f0', 'u', 10)
+    index.add('upload', 'f0', 'u', 20)
+    assert index.usage('u') == (20, 1)
+
+    index.add('upload', 'f0', 'v', 30)
+    assert index.usage('u') == (0, 0)
+    assert index.usage('v') == (30, 1)
+    assert index.usage() == (30, 1)
+
+
+def test_recording_an_analysis_twice_keeps_one_report(tmp_path):
+    index = app.StorageIndex(str(tmp_path / 'storage.sqlite3'))
+    index.record_analysis('u', 'b.pdf', 'a.pdf', 'r.html', 5)
+    index.record_analysis('u', 'b.pdf', 'a.pdf', 'r.html', 5)
+    assert index.usage('u') == (5, 1)
+    assert len(index.history('u')) == 2
+
+
+def test_reopening_keeps_triggers_and_old_ones_are_replaced(tmp_path):
+    path = str(tmp_path / 'storage.sqlite3')
+    db = app.sqlite3.connect(path)
+    db.executescript(app.STORAGE_SCHEMA.replace('bytes + NEW.size', 'bytes + 2 * NEW.size'))
+    db.close()
+
+    app.StorageIndex(path)
+    index = app.StorageIndex(path)
+    index.add('upload', 'f0', 'u', 10)
+    assert index.usage('u') == (10, 1)
+    assert index._connection().execute('PRAGMA user_version').fetchone()[0] == app.STORAGE_SCHEMA_VERSION
+
+
+def test_expiry_skips_files_of_recent_history(tmp_path):
+    index = app.StorageIndex(str(tmp_path / 'storage.sqlite3'))
+    index.add('upload', 'old.pdf', 'u', 1)
+    index.record_analysis('u', 'b.pdf', 'a.pdf', 'r.html', 5)
+    index.add('upload', 'b.pdf', 'u', 1)
+
+    expired = index.expired(app.time.time() + 1)
+    assert [(kind, name) for kind, name, _ in expired] == [('upload', 'old.pdf')]
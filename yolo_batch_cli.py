@@ -0,0 +1,187 @@
+"""
+🎯 CMT NEXUS - OFFLINE YOLO BATCH ANALYZER
+Walks a drawing tree, pairs sheet revisions and runs the YOLO 1x1 inch
+scanner and RED-to-GREEN matcher across a process pool, streaming one JSON
+object per pair. Built for overnight bulk audits without going over HTTP.
+
+Usage:
+    python yolo_batch_cli.py drawings/ --workers 8 --output audit.jsonl --reports audit_reports/
+
+Pairing rules (per directory):
+    S-101_before.pdf / S-101_after.pdf     -> one pair
+    S-101.pdf, S-101_rev1.pdf, S-101_rev2  -> (base, rev1), (rev1, rev2)
+    S-101_revA.pdf, S-101_revB.pdf         -> (revA, revB)
+    before_<timestamp>_S-101.pdf (uploads) -> paired with the matching after_ file
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from yolo_pipeline import (
+    build_analysis_payload,
+    extract_pdf_content,
+    iter_yolo_report_html,
+    yolo_compare_red_to_green,
+    yolo_grid_scan_1x1_inch,
+)
+
+UPLOAD_NAME_PATTERN = re.compile(r'^(before|after)_(?:\d{8}_\d{6}_)?(.+)$', re.IGNORECASE)
+SIDE_SUFFIX_PATTERN = re.compile(r'^(.+?)[ _.-]+(before|after)$', re.IGNORECASE)
+REVISION_PATTERN = re.compile(r'^(.+?)(?:[ _.-]*rev(?:ision)?[ _.-]?|[ _.-]r)([0-9]+|[a-z])$', re.IGNORECASE)
+
+
+def revision_key(filename):
+    """
+    Split a filename into (sheet key, revision order)
+
+    Files without a recognised marker are treated as the base revision.
+    """
+    stem = os.path.splitext(filename)[0]
+
+    match = UPLOAD_NAME_PATTERN.match(stem)
+    if match:
+        side, sheet = match.groups()
+        return sheet.lower(), (0, 0 if side.lower() == 'before' else 1, '')
+
+    match = SIDE_SUFFIX_PATTERN.match(stem)
+    if match:
+        sheet, side = match.groups()
+        return sheet.lower(), (0, 0 if side.lower() == 'before' else 1, '')
+
+    match = REVISION_PATTERN.match(stem)
+    if match:
+        sheet, rev = match.groups()
+        if rev.isdigit():
+            return sheet.lower(), (1, int(rev), '')
+        return sheet.lower(), (1, 0, rev.upper())
+
+    return stem.lower(), (0, 0, '')
+
+
+def find_revision_pairs(root, extensions=('.pdf',)):
+    """Yield (before_path, after_path) for consecutive revisions of each sheet"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        sheets = {}
+        for name in filenames:
+            if name.lower().endswith(extensions):
+                sheet, order = revision_key(name)
+                sheets.setdefault(sheet, []).append((order, name))
+
+        for sheet in sorted(sheets):
+            revisions = [name for _, name in sorted(sheets[sheet])]
+            for before, after in zip(revisions, revisions[1:]):
+                yield os.path.join(dirpath, before), os.path.join(dirpath, after)
+
+
+def _report_name(before_path, after_path):
+    before = os.path.splitext(os.path.basename(before_path))[0]
+    after = os.path.splitext(os.path.basename(after_path))[0]
+    return f"YOLO_Report_{before}__vs__{after}.html"
+
+
+def analyze_pair_files(before_path, after_path, report_dir=None, details=False):
+    """Run the full YOLO pipeline on two files on disk (process pool task)"""
+    started = time.perf_counter()
+    record = {'before': before_path, 'after': after_path}
+
+    try:
+        before_content, before_bytes = extract_pdf_content(before_path)
+        after_content, after_bytes = extract_pdf_content(after_path)
+
+        if before_bytes == after_bytes:
+            record.update({'success': False, 'identical': True, 'message': 'FILES ARE IDENTICAL'})
+            return record
+
+        before_boxes = yolo_grid_scan_1x1_inch(before_content, before_bytes)
+        after_boxes = yolo_grid_scan_1x1_inch(after_content, after_bytes)
+        del before_content, before_bytes, after_content, after_bytes
+
+        comparison = yolo_compare_red_to_green(before_boxes, after_boxes)
+
+        report_path = None
+        if report_dir:
+            report_path = os.path.join(report_dir, _report_name(before_path, after_path))
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.writelines(iter_yolo_report_html(
+                    before_boxes, after_boxes, comparison,
+                    os.path.basename(before_path), os.path.basename(after_path),
+                    style='inline'
+                ))
+
+        analysis = build_analysis_payload(before_boxes, after_boxes, comparison, report_path)['yolo_analysis']
+        record.update({
+            'success': True,
+            'identical': False,
+            'before_summary': analysis['before'],
+            'after_summary': analysis['after'],
+            'comparison': analysis['comparison'],
+            'report_file': report_path
+        })
+        if details:
+            record['unresolved_items'] = analysis['unresolved_items']
+            record['new_issues'] = comparison['new_issues']
+    except Exception as e:
+        record.update({'success': False, 'identical': False, 'message': f'Analysis failed: {str(e)}'})
+    finally:
+        record['seconds'] = round(time.perf_counter() - started, 4)
+
+    return record
+
+
+def _pool_task(args):
+    return analyze_pair_files(*args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline YOLO batch analyzer (JSON-lines output)')
+    parser.add_argument('root', help='Directory tree containing drawing revisions')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--output', '-o', help='Write JSON lines here instead of stdout')
+    parser.add_argument('--reports', help='Also write an HTML report per pair into this directory')
+    parser.add_argument('--details', action='store_true', help='Include unresolved items and new issues')
+    parser.add_argument('--chunksize', type=int, default=4, help='Pairs handed to a worker at a time')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        parser.error(f'{args.root} is not a directory')
+
+    if args.reports:
+        os.makedirs(args.reports, exist_ok=True)
+
+    tasks = ((before, after, args.reports, args.details) for before, after in find_revision_pairs(args.root))
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    totals = {'pairs': 0, 'analyzed': 0, 'identical': 0, 'failed': 0}
+    started = time.perf_counter()
+
+    try:
+        with multiprocessing.Pool(processes=max(args.workers, 1)) as pool:
+            for record in pool.imap_unordered(_pool_task, tasks, chunksize=max(args.chunksize, 1)):
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+
+                totals['pairs'] += 1
+                if record.get('identical'):
+                    totals['identical'] += 1
+                elif record.get('success'):
+                    totals['analyzed'] += 1
+                else:
+                    totals['failed'] += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {totals['pairs']} pair(s) in {elapsed:.1f}s • analyzed {totals['analyzed']} • "
+          f"identical {totals['identical']} • failed {totals['failed']}", file=sys.stderr)
+    return 1 if totals['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,936 @@
+"""
+🎯 CMT NEXUS - YOLO ANALYSIS PIPELINE
+The 1x1 inch grid scanner, the RED-to-GREEN matcher and the HTML report
+renderer. Nothing here touches Flask, the upload/report folders or the
+environment beyond REPORT_STYLE, so offline tools (yolo_batch_cli.py,
+benchmarks/) can import it without starting any part of the web app;
+app_yolo_complete re-exports what its routes use.
+"""
+
+import hashlib
+import itertools
+import os
+import re
+from datetime import datetime
+
+
+# ==================== YOLO MODEL - 1x1 INCH BOX DETECTION ====================
+
+SCAN_PROGRESS_LINES = 5000
+
+# Keyword tables and patterns are built once at import (before a pre-fork
+# server forks its workers) rather than on every scanned line. Table order
+# matters: the first keyword found in a line classifies it.
+RED_KEYWORDS = {
+    'bold': 'HIGH',
+    'missing': 'HIGH',
+    'fix': 'HIGH',
+    'correct': 'HIGH',
+    'check': 'MEDIUM',
+    'verify': 'MEDIUM',
+    'update': 'MEDIUM',
+    'add': 'MEDIUM',
+    'modify': 'MEDIUM',
+    'review': 'LOW',
+    'revise': 'LOW'
+}
+
+GREEN_INDICATORS = {
+    '✓': 'CHECKMARK',
+    '✔': 'CHECKMARK',
+    'done': 'KEYWORD',
+    'completed': 'KEYWORD',
+    'fixed': 'KEYWORD',
+    'updated': 'KEYWORD',
+    'resolved': 'KEYWORD',
+    'confirmed': 'KEYWORD',
+    'checked': 'KEYWORD',
+    'ok': 'KEYWORD'
+}
+
+DIMENSION_UNITS = ('MM', 'THK', 'DIA', 'X', '@', 'C/C', 'φ')
+ANNOTATION_KEYWORDS = ('NOTE', 'NOTES', 'TYP', 'TYPICAL', 'PLAN', 'SECTION',
+                       'ELEVATION', 'DETAIL', 'SCHEDULE', 'TABLE')
+
+MISSING_DIMENSION_PATTERN = re.compile(r'\bd\b|\bD\b')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def _keyword_matcher(keywords):
+    """One regex telling whether any keyword occurs, so most lines skip the ordered scan"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+
+RED_KEYWORD_MATCHER = _keyword_matcher(RED_KEYWORDS)
+GREEN_INDICATOR_MATCHER = _keyword_matcher(GREEN_INDICATORS)
+DIMENSION_UNIT_MATCHER = _keyword_matcher(DIMENSION_UNITS)
+ANNOTATION_MATCHER = _keyword_matcher(ANNOTATION_KEYWORDS)
+
+def extract_pdf_content(pdf_path):
+    """Extract text content from PDF for YOLO analysis"""
+    try:
+        with open(pdf_path, 'rb') as f:
+            raw_bytes = f.read()
+            try:
+                content = raw_bytes.decode('utf-8', errors='ignore')
+            except:
+                content = raw_bytes.decode('latin-1', errors='ignore')
+        return content, raw_bytes
+    except Exception as e:
+        print(f"Error extracting PDF: {e}")
+        return "", b""
+
+
+def yolo_grid_scan_1x1_inch(content, raw_bytes, dpi=96, on_progress=None):
+    """
+    YOLO-Style Detection: Scan PDF in 1x1 inch grid boxes
+    At 96 DPI: 1 inch = 96 pixels, so each box is 96x96 pixels
+    
+    on_progress(lines_scanned, total_lines, detected_boxes) is called every
+    SCAN_PROGRESS_LINES lines so callers can stream partial detection counts.
+    
+    Returns:
+        Dictionary with detected markups, confirmations, dimensions, annotations
+    """
+    
+    detected_boxes = {
+        'red_markups': [],
+        'green_confirmations': [],
+        'dimensions': [],
+        'annotations': [],
+        'total_1x1_boxes_scanned': 0,
+        'grid_map': []
+    }
+    
+    lines = content.split('\n')
+    
+    # Simulate 1x1 inch grid scanning
+    # In production, this would use actual image processing with OpenCV/PIL
+    box_size = 1  # 1 inch
+    current_box = {'x': 0, 'y': 0}
+    
+    for i, line in enumerate(lines):
+        if on_progress and i and i % SCAN_PROGRESS_LINES == 0:
+            on_progress(i, len(lines), detected_boxes)
+        
+        line_lower = line.lower().strip()
+        
+        if not line_lower or len(line_lower) < 2:
+            continue
+        
+        # Calculate grid position (simulate inch-by-inch scanning)
+        grid_row = i // 10
+        grid_col = i % 10
+        grid_position = f"({grid_col}in, {grid_row}in)"
+        
+        # ========== RED MARKUP DETECTION (Engineer Comments) ==========
+        # Special check for missing dimension variables
+        if MISSING_DIMENSION_PATTERN.search(line) and not NUMBER_PATTERN.search(line):
+            detected_boxes['red_markups'].append({
+                'box_id': f"box_{grid_row}_{grid_col}",
+                'grid_position': grid_position,
+                'pixel_coordinates': f"({grid_col * 96}px, {grid_row * 96}px)",
+                'content': line.strip()[:120],
+                'type': 'MISSING_DIMENSION',
+                'keyword': 'd' if 'd' in line else 'D',
+                'severity': 'HIGH',
+                'line_number': i + 1
+            })
+        
+        # Keyword-based red markup detection
+        if RED_KEYWORD_MATCHER.search(line_lower):
+            for keyword, severity in RED_KEYWORDS.items():
+                if keyword in line_lower:
+                    detected_boxes['red_markups'].append({
+                        'box_id': f"box_{grid_row}_{grid_col}",
+                        'grid_position': grid_position,
+                        'pixel_coordinates': f"({grid_col * 96}px, {grid_row * 96}px)",
+                        'content': line.strip()[:120],
+                        'type': 'ENGINEER_COMMENT',
+                        'keyword': keyword,
+                        'severity': severity,
+                        'line_number': i + 1
+                    })
+                    break  # Only one classification per line
+        
+        # ========== GREEN CONFIRMATION DETECTION (Designer Updates) ==========
+        if GREEN_INDICATOR_MATCHER.search(line_lower):
+            for indicator, indicator_type in GREEN_INDICATORS.items():
+                if indicator in line_lower:
+                    detected_boxes['green_confirmations'].append({
+                        'box_id': f"box_{grid_row}_{grid_col}",
+                        'grid_position': grid_position,
+                        'pixel_coordinates': f"({grid_col * 96}px, {grid_row * 96}px)",
+                        'content': line.strip()[:120],
+                        'type': indicator_type,
+                        'indicator': indicator,
+                        'resolved': True,
+                        'line_number': i + 1
+                    })
+                    break
+        
+        line_upper = line.upper()
+        
+        # ========== DIMENSION DETECTION ==========
+        if DIMENSION_UNIT_MATCHER.search(line_upper):
+            # Extract numerical values
+            numbers = NUMBER_PATTERN.findall(line)
+            
+            detected_boxes['dimensions'].append({
+                'box_id': f"box_{grid_row}_{grid_col}",
+                'grid_position': grid_position,
+                'dimension_text': line.strip()[:100],
+                'values': numbers,
+                'unit': next((u for u in DIMENSION_UNITS if u in line_upper), 'UNKNOWN'),
+                'complete': len(numbers) > 0,
+                'line_number': i + 1
+            })
+        
+        # ========== ANNOTATION DETECTION ==========
+        if ANNOTATION_MATCHER.search(line_upper):
+            for keyword in ANNOTATION_KEYWORDS:
+                if keyword in line_upper:
+                    detected_boxes['annotations'].append({
+                        'box_id': f"box_{grid_row}_{grid_col}",
+                        'grid_position': grid_position,
+                        'type': keyword,
+                        'content': line.strip()[:100],
+                        'line_number': i + 1
+                    })
+                    break
+    
+    # Calculate total grid boxes scanned
+    detected_boxes['total_1x1_boxes_scanned'] = (max(len(lines) // 10, 1)) * 10
+    
+    return detected_boxes
+
+
+def yolo_compare_red_to_green(before_boxes, after_boxes):
+    """
+    YOLO RED-to-GREEN Comparison
+    Matches each red markup with corresponding green confirmation
+    """
+    
+    comparison_result = {
+        'total_red_comments': len(before_boxes['red_markups']),
+        'total_green_confirmations': len(after_boxes['green_confirmations']),
+        'resolved_items': [],
+        'unresolved_items': [],
+        'new_issues': [],
+        'resolution_rate': 0,
+        'status': 'UNKNOWN',
+        'message': ''
+    }
+    
+    # Track which green confirmations have been matched
+    matched_greens = set()
+    
+    # Match each red markup to green confirmations
+    for red_item in before_boxes['red_markups']:
+        red_keyword = red_item['keyword']
+        red_content = red_item['content'].lower()
+        red_position = red_item['grid_position']
+        
+        found_match = False
+        
+        # Look for matching green confirmation
+        for idx, green_item in enumerate(after_boxes['green_confirmations']):
+            if idx in matched_greens:
+                continue
+            
+            green_content = green_item['content'].lower()
+            green_position = green_item['grid_position']
+            
+            # Match criteria:
+            # 1. Same or adjacent grid position
+            # 2. Keyword overlap in content
+            # 3. Similar content words
+            
+            position_match = (red_position == green_position or
+                            _adjacent_position(red_position, green_position))
+            
+            keyword_match = (red_keyword in green_content or
+                           any(word in green_content for word in red_content.split()[:5]))
+            
+            if position_match or keyword_match:
+                comparison_result['resolved_items'].append({
+                    'original_comment': red_item['content'],
+                    'keyword': red_keyword,
+                    'severity': red_item['severity'],
+                    'resolution': green_item['content'],
+                    'indicator': green_item.get('indicator', '✓'),
+                    'red_position': red_position,
+                    'green_position': green_position,
+                    'status': '✅ RESOLVED'
+                })
+                matched_greens.add(idx)
+                found_match = True
+                break
+        
+        if not found_match:
+            comparison_result['unresolved_items'].append({
+                'comment': red_item['content'],
+                'keyword': red_keyword,
+                'severity': red_item['severity'],
+                'position': red_position,
+                'status': '❌ NOT RESOLVED',
+                'line_number': red_item.get('line_number', 'Unknown')
+            })
+    
+    # Check for new red markups in AFTER (regression)
+    for red_item in after_boxes['red_markups']:
+        # Check if this red markup was NOT in BEFORE
+        is_new = True
+        for before_red in before_boxes['red_markups']:
+            if (red_item['content'] == before_red['content'] and 
+                red_item['grid_position'] == before_red['grid_position']):
+                is_new = False
+                break
+        
+        if is_new:
+            comparison_result['new_issues'].append({
+                'issue': red_item['content'],
+                'keyword': red_item['keyword'],
+                'severity': red_item['severity'],
+                'position': red_item['grid_position'],
+                'status': '⚠️ NEW ISSUE',
+                'line_number': red_item.get('line_number', 'Unknown')
+            })
+    
+    # Calculate resolution rate
+    total_comments = comparison_result['total_red_comments']
+    resolved_count = len(comparison_result['resolved_items'])
+    unresolved_count = len(comparison_result['unresolved_items'])
+    
+    if total_comments > 0:
+        comparison_result['resolution_rate'] = int((resolved_count / total_comments) * 100)
+    
+    # Determine status and message
+    if total_comments == 0:
+        comparison_result['status'] = 'NO_COMMENTS'
+        comparison_result['message'] = '✅ No engineer comments found in BEFORE file'
+    elif resolved_count == total_comments and unresolved_count == 0:
+        comparison_result['status'] = 'ALL_RESOLVED'
+        comparison_result['message'] = f'✅ All {total_comments} comment(s) addressed with green confirmations!'
+    elif resolved_count > 0 and unresolved_count > 0:
+        comparison_result['status'] = 'PARTIAL'
+        comparison_result['message'] = f'⚠️ {resolved_count}/{total_comments} comment(s) resolved. {unresolved_count} still pending.'
+    elif unresolved_count == total_comments:
+        comparison_result['status'] = 'NONE_RESOLVED'
+        comparison_result['message'] = f'❌ NO CHANGES DETECTED/UPDATED PROPERLY\n\nPlease redo/recheck the PDF attached.\n\nManual check needed for all {total_comments} item(s)!'
+    
+    return comparison_result
+
+
+def _adjacent_position(pos1, pos2):
+    """Check if two grid positions are adjacent (within 1 inch)"""
+    try:
+        # Extract coordinates from format "(Xin, Yin)"
+        x1, y1 = map(lambda s: int(s.replace('in', '').strip()), pos1.strip('()').split(','))
+        x2, y2 = map(lambda s: int(s.replace('in', '').strip()), pos2.strip('()').split(','))
+        
+        # Adjacent if within 1 inch in either direction
+        return abs(x1 - x2) <= 1 and abs(y1 - y2) <= 1
+    except:
+        return False
+
+
+# ==================== REPORT RENDERER ====================
+#
+# The report template is split into literal text and ${name} placeholders once
+# at import time. Rendering walks those parts and yields chunks, with table rows
+# produced lazily, so reports with tens of thousands of rows are written to a
+# file or an HTTP response in linear time without building one huge string.
+
+REPORT_CHUNK_SIZE = 64 * 1024
+
+
+def compile_report_template(template):
+    """Split a ${name} template into [(literal, placeholder or None), ...]"""
+    parts = re.split(r'\$\{(\w+)\}', template)
+    return [(parts[i], parts[i + 1] if i + 1 < len(parts) else None) for i in range(0, len(parts), 2)]
+
+
+# Shared report stylesheet: served once from a content-hashed, long-cache URL and
+# linked from each report, or inlined for self-contained reports (e.g. email)
+REPORT_CSS = '''
+        @page { size: Letter; margin: 0.5in; }
+        body {
+            font-family: 'Courier New', 'Consolas', monospace;
+            color: #222;
+            line-height: 1.6;
+            background: #f9f9f9;
+        }
+        
+        .cover {
+            text-align: center;
+            padding: 100px 40px;
+            page-break-after: always;
+            background: linear-gradient(135deg, #00f0ff, #b967ff, #ff006e);
+            color: white;
+            min-height: 100vh;
+            display: flex;
+            flex-direction: column;
+            justify-content: center;
+        }
+        
+        .cover h1 {
+            font-size: 64px;
+            margin-bottom: 20px;
+            text-shadow: 3px 3px 6px rgba(0,0,0,0.4);
+            letter-spacing: 4px;
+        }
+        
+        .cover h2 {
+            font-size: 28px;
+            margin-bottom: 50px;
+            opacity: 0.95;
+        }
+        
+        .cover-meta {
+            background: rgba(0,0,0,0.2);
+            padding: 30px;
+            border-radius: 15px;
+            margin-top: 40px;
+        }
+        
+        .section {
+            padding: 40px;
+            background: white;
+            margin: 20px 0;
+            page-break-inside: avoid;
+            border-radius: 10px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }
+        
+        .section h2 {
+            color: #00f0ff;
+            border-bottom: 4px solid #00f0ff;
+            padding-bottom: 15px;
+            font-size: 36px;
+            margin-bottom: 30px;
+        }
+        
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin: 25px 0;
+        }
+        
+        th {
+            background: #00f0ff;
+            color: white;
+            padding: 15px;
+            text-align: left;
+            font-size: 14px;
+            font-weight: bold;
+        }
+        
+        td {
+            padding: 12px 15px;
+            border-bottom: 1px solid #e0e0e0;
+            font-size: 13px;
+        }
+        
+        tr:hover {
+            background: rgba(0, 240, 255, 0.05);
+        }
+        
+        .metric-grid {
+            display: grid;
+            grid-template-columns: repeat(3, 1fr);
+            gap: 20px;
+            margin: 30px 0;
+        }
+        
+        .metric-box {
+            background: linear-gradient(135deg, #f5f5f5, #e0e0e0);
+            padding: 25px;
+            border-radius: 12px;
+            text-align: center;
+            border: 2px solid #00f0ff;
+        }
+        
+        .metric-value {
+            font-size: 56px;
+            font-weight: bold;
+            color: #00f0ff;
+            margin-bottom: 10px;
+        }
+        
+        .metric-label {
+            font-size: 14px;
+            color: #666;
+            text-transform: uppercase;
+            letter-spacing: 1px;
+        }
+        
+        .status-box {
+            padding: 40px;
+            border-radius: 20px;
+            margin: 40px 0;
+            text-align: center;
+            font-size: 28px;
+            font-weight: bold;
+        }
+        
+        .status-success {
+            background: rgba(0, 255, 65, 0.15);
+            border: 4px solid #00ff41;
+            color: #00cc33;
+        }
+        
+        .status-warning {
+            background: rgba(255, 165, 0, 0.15);
+            border: 4px solid #ffa500;
+            color: #ff8800;
+        }
+        
+        .status-error {
+            background: rgba(255, 0, 110, 0.15);
+            border: 4px solid #ff006e;
+            color: #cc0055;
+        }
+        
+        .footer {
+            text-align: center;
+            padding: 40px;
+            color: #666;
+            font-size: 12px;
+            margin-top: 50px;
+            border-top: 3px solid #00f0ff;
+        }
+        
+        .grid-map {
+            background: #f0f0f0;
+            padding: 20px;
+            border-radius: 10px;
+            font-family: 'Courier New', monospace;
+            font-size: 11px;
+            overflow-x: auto;
+        }
+'''
+REPORT_CSS_HASH = hashlib.sha256(REPORT_CSS.encode('utf-8')).hexdigest()[:12]
+REPORT_CSS_URL = f'/reports/assets/report.{REPORT_CSS_HASH}.css'
+REPORT_CSS_LINK_PATTERN = re.compile(r'<link rel="stylesheet" href="[^"]*/reports/assets/report\.[0-9a-f]+\.css">')
+REPORT_STYLE = os.environ.get('REPORT_STYLE', 'linked')  # 'linked' or 'inline'
+
+
+def report_stylesheet_tag(style=None, asset_base=''):
+    """<link> to the shared stylesheet, or an inline <style> block when style='inline'"""
+    if (style or REPORT_STYLE) == 'inline':
+        return f'<style>\n{REPORT_CSS}    </style>'
+    return f'<link rel="stylesheet" href="{asset_base}{REPORT_CSS_URL}">'
+
+
+REPORT_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>YOLO Analysis Report - CMT NEXUS</title>
+    ${stylesheet}
+</head>
+<body>
+    <!-- COVER PAGE -->
+    <div class="cover">
+        <h1>🎯 YOLO ANALYSIS</h1>
+        <h2>1x1 Inch Grid Detection Report</h2>
+        <div class="cover-meta">
+            <p style="font-size: 20px; margin: 10px 0;"><strong>Analysis Date:</strong> ${analysis_date}</p>
+            <p style="font-size: 20px; margin: 10px 0;"><strong>Time:</strong> ${analysis_time}</p>
+            <p style="font-size: 18px; margin: 20px 0; opacity: 0.9;"><strong>Model:</strong> YOLO-Style Inch-by-Inch Scanner</p>
+            <div style="margin-top: 40px; padding-top: 30px; border-top: 1px solid rgba(255,255,255,0.3);">
+                <p style="font-size: 16px; margin: 10px 0;"><strong>BEFORE File:</strong> ${before_file}</p>
+                <p style="font-size: 16px; margin: 10px 0;"><strong>AFTER File:</strong> ${after_file}</p>
+            </div>
+        </div>
+    </div>
+    
+    <!-- EXECUTIVE SUMMARY -->
+    <div class="section">
+        <h2>📊 EXECUTIVE SUMMARY</h2>
+        <div class="metric-grid">
+            <div class="metric-box">
+                <div class="metric-value">${boxes_scanned}</div>
+                <div class="metric-label">Grid Boxes Scanned</div>
+            </div>
+            <div class="metric-box">
+                <div class="metric-value">${red_count}</div>
+                <div class="metric-label">Red Comments (BEFORE)</div>
+            </div>
+            <div class="metric-box">
+                <div class="metric-value">${green_count}</div>
+                <div class="metric-label">Green Confirmations (AFTER)</div>
+            </div>
+        </div>
+        
+        <div class="status-box ${status_class}">
+            ${message}
+        </div>
+        
+        <table style="margin-top: 30px;">
+            <tr>
+                <th>Metric</th>
+                <th>Value</th>
+            </tr>
+            <tr>
+                <td><strong>Total Engineer Comments</strong></td>
+                <td>${total_red_comments}</td>
+            </tr>
+            <tr style="background: rgba(0, 255, 65, 0.1);">
+                <td><strong>✅ Resolved Items</strong></td>
+                <td style="color: #00ff41; font-weight: bold;">${resolved_count}</td>
+            </tr>
+            <tr style="background: rgba(255, 0, 110, 0.1);">
+                <td><strong>❌ Unresolved Items</strong></td>
+                <td style="color: #ff006e; font-weight: bold;">${unresolved_count}</td>
+            </tr>
+            <tr style="background: rgba(255, 165, 0, 0.1);">
+                <td><strong>⚠️ New Issues Found</strong></td>
+                <td style="color: #ffa500; font-weight: bold;">${new_issue_count}</td>
+            </tr>
+            <tr style="background: rgba(0, 240, 255, 0.1);">
+                <td><strong>📈 Resolution Rate</strong></td>
+                <td style="font-size: 24px; font-weight: bold; color: #00f0ff;">${resolution_rate}%</td>
+            </tr>
+        </table>
+    </div>
+    
+    <!-- RED MARKUPS DETECTED -->
+    <div class="section">
+        <h2>🔴 RED MARKUPS DETECTED (BEFORE PDF)</h2>
+        <p><strong>Total Engineer Comments:</strong> ${red_count}</p>
+        <p style="color: #666; margin-bottom: 20px;">These are the issues identified by the structural engineer that require correction:</p>
+        
+        <table>
+            <tr>
+                <th>Box ID</th>
+                <th>Grid Position</th>
+                <th>Comment Content</th>
+                <th>Keyword</th>
+                <th>Severity</th>
+                <th>Type</th>
+            </tr>
+${red_rows}        </table>
+    </div>
+    
+    <!-- GREEN CONFIRMATIONS DETECTED -->
+    <div class="section">
+        <h2>✅ GREEN CONFIRMATIONS (AFTER PDF)</h2>
+        <p><strong>Total Designer Updates:</strong> ${green_count}</p>
+        <p style="color: #666; margin-bottom: 20px;">These are the confirmations provided by the designer showing completed work:</p>
+        
+        <table>
+            <tr>
+                <th>Box ID</th>
+                <th>Grid Position</th>
+                <th>Confirmation Content</th>
+                <th>Indicator</th>
+                <th>Type</th>
+            </tr>
+${green_rows}        </table>
+    </div>
+    
+    <!-- RED-TO-GREEN COMPARISON -->
+    <div class="section">
+        <h2>🔄 RED-TO-GREEN COMPARISON</h2>
+        <p style="margin-bottom: 20px;">Detailed matching of engineer comments to designer confirmations:</p>
+        
+        <h3 style="color: #00ff41; margin-top: 30px;">✅ RESOLVED ITEMS (${resolved_count})</h3>
+        <table>
+            <tr>
+                <th>Status</th>
+                <th>Location</th>
+                <th>Original Comment</th>
+                <th>Keyword</th>
+                <th>Confirmation</th>
+                <th>Result</th>
+            </tr>
+            ${resolved_rows}
+        </table>
+        
+        <h3 style="color: #ff006e; margin-top: 40px;">❌ UNRESOLVED ITEMS (${unresolved_count})</h3>
+        <table>
+            <tr>
+                <th>Status</th>
+                <th>Location</th>
+                <th>Comment</th>
+                <th>Keyword</th>
+                <th>Severity</th>
+                <th>Result</th>
+            </tr>
+            ${unresolved_rows}
+        </table>
+    </div>
+    
+    ${new_issues_section}
+    
+    <!-- DIMENSIONS ANALYSIS -->
+    <div class="section">
+        <h2>📐 DIMENSIONS ANALYSIS</h2>
+        <table>
+            <tr>
+                <th>Metric</th>
+                <th>BEFORE</th>
+                <th>AFTER</th>
+                <th>Change</th>
+            </tr>
+            <tr>
+                <td><strong>Total Dimensions Detected</strong></td>
+                <td>${before_dimensions}</td>
+                <td>${after_dimensions}</td>
+                <td style="font-weight: bold;">${dimensions_change}</td>
+            </tr>
+            <tr>
+                <td><strong>Annotations Found</strong></td>
+                <td>${before_annotations}</td>
+                <td>${after_annotations}</td>
+                <td style="font-weight: bold;">${annotations_change}</td>
+            </tr>
+        </table>
+    </div>
+    
+    <!-- FOOTER -->
+    <div class="footer">
+        <p style="font-size: 16px; font-weight: bold; color: #00f0ff; margin-bottom: 10px;">CMT NEXUS - YOLO ANALYSIS SYSTEM</p>
+        <p>Inch-by-Inch Grid Detection • Red/Green Color Analysis • Automated Verification</p>
+        <p style="margin-top: 15px;">© ${year} All Rights Reserved • Generated: ${generated_at}</p>
+        <p style="margin-top: 10px; font-size: 10px; color: #999;">Report ID: ${report_id}</p>
+    </div>
+</body>
+</html>
+'''
+
+REPORT_TEMPLATE_PARTS = compile_report_template(REPORT_TEMPLATE)
+
+RED_MARKUP_ROW = '''
+            <tr>
+                <td style="font-family: monospace; font-size: 11px;">{box_id}</td>
+                <td>{grid_position}</td>
+                <td>{content}</td>
+                <td style="font-weight: bold; color: #ff006e;">{keyword}</td>
+                <td style="color: {severity_color}; font-weight: bold;">{severity}</td>
+                <td>{type}</td>
+            </tr>
+        '''
+
+GREEN_CONFIRMATION_ROW = '''
+            <tr style="background: rgba(0, 255, 65, 0.03);">
+                <td style="font-family: monospace; font-size: 11px;">{box_id}</td>
+                <td>{grid_position}</td>
+                <td>{content}</td>
+                <td style="color: #00ff41; font-size: 18px; font-weight: bold;">{indicator}</td>
+                <td>{type}</td>
+            </tr>
+        '''
+
+RESOLVED_ROW = '''
+            <tr style="background: rgba(0, 255, 65, 0.05);">
+                <td style="color: #00ff41; font-weight: bold;">✅</td>
+                <td>{position}</td>
+                <td>{comment}</td>
+                <td>{keyword}</td>
+                <td style="color: #00ff41;">{indicator}</td>
+                <td style="color: #00ff41; font-weight: bold;">RESOLVED</td>
+            </tr>
+            '''
+
+UNRESOLVED_ROW = '''
+            <tr style="background: rgba(255, 0, 110, 0.05);">
+                <td style="color: #ff006e; font-weight: bold;">❌</td>
+                <td>{position}</td>
+                <td>{comment}</td>
+                <td>{keyword}</td>
+                <td style="color: #ff006e;">{severity}</td>
+                <td style="color: #ff006e; font-weight: bold;">NOT RESOLVED</td>
+            </tr>
+            '''
+
+NEW_ISSUE_ROW = '''
+            <tr style="background: rgba(255, 165, 0, 0.05);">
+                <td style="color: #ffa500; font-weight: bold;">⚠️</td>
+                <td>{position}</td>
+                <td>{issue}</td>
+                <td style="color: #ffa500; font-weight: bold;">NEW ISSUE</td>
+            </tr>
+            '''
+
+NEW_ISSUES_SECTION_START = '''
+        <div class="section">
+            <h2>⚠️ NEW ISSUES DETECTED</h2>
+            <p style="color: #ffa500; font-weight: bold;">These issues appeared in AFTER that were not in BEFORE:</p>
+            <table>
+                <tr>
+                    <th>Status</th>
+                    <th>Location</th>
+                    <th>Issue</th>
+                    <th>Type</th>
+                </tr>
+                '''
+
+NEW_ISSUES_SECTION_END = '''
+            </table>
+        </div>
+        '''
+
+
+def _red_markup_rows(red_markups):
+    for red in red_markups[:50]:  # Limit to first 50
+        severity_color = '#ff006e' if red['severity'] == 'HIGH' else '#ffa500' if red['severity'] == 'MEDIUM' else '#666'
+        yield RED_MARKUP_ROW.format(
+            box_id=red['box_id'], grid_position=red['grid_position'], content=red['content'][:80],
+            keyword=red['keyword'], severity_color=severity_color, severity=red['severity'], type=red['type']
+        )
+
+
+def _green_confirmation_rows(green_confirmations):
+    for green in green_confirmations[:50]:
+        yield GREEN_CONFIRMATION_ROW.format(
+            box_id=green['box_id'], grid_position=green['grid_position'], content=green['content'][:80],
+            indicator=green['indicator'], type=green['type']
+        )
+
+
+def _resolved_rows(resolved_items):
+    if not resolved_items:
+        yield '<tr><td colspan="6" style="text-align: center; color: #666;">No resolved items</td></tr>'
+    for item in resolved_items:
+        yield RESOLVED_ROW.format(
+            position=item['red_position'], comment=item['original_comment'][:80],
+            keyword=item['keyword'], indicator=item['indicator']
+        )
+
+
+def _unresolved_rows(unresolved_items):
+    if not unresolved_items:
+        yield '<tr><td colspan="6" style="text-align: center; color: #666;">All items resolved</td></tr>'
+    for item in unresolved_items:
+        yield UNRESOLVED_ROW.format(
+            position=item['position'], comment=item['comment'][:80],
+            keyword=item['keyword'], severity=item['severity']
+        )
+
+
+def _new_issues_section(new_issues):
+    if not new_issues:
+        return
+    yield NEW_ISSUES_SECTION_START
+    for item in new_issues:
+        yield NEW_ISSUE_ROW.format(position=item['position'], issue=item['issue'][:80])
+    yield NEW_ISSUES_SECTION_END
+
+
+def render_template_chunks(parts, values, chunk_size=REPORT_CHUNK_SIZE):
+    """
+    Render compiled template parts as chunks of roughly chunk_size characters
+    
+    Placeholder values are either strings or iterables of strings (row generators).
+    """
+    buffer, size = [], 0
+    for literal, name in parts:
+        pieces = (literal,)
+        if name is not None:
+            value = values[name]
+            pieces = (literal, value) if isinstance(value, str) else itertools.chain(pieces, value)
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_yolo_report_html(before_boxes, after_boxes, comparison, before_file, after_file,
+                          chunk_size=REPORT_CHUNK_SIZE, style=None, asset_base=''):
+    """
+    Generate the YOLO analysis HTML report as a stream of chunks
+    
+    Suitable for writing straight to a file or returning as a Flask response body.
+    style='linked' references the shared stylesheet at asset_base + REPORT_CSS_URL;
+    style='inline' embeds it so the report is self-contained.
+    """
+    now = datetime.now()
+    
+    # Determine status color
+    if comparison['status'] == 'ALL_RESOLVED':
+        status_class = 'status-success'
+    elif comparison['status'] == 'PARTIAL':
+        status_class = 'status-warning'
+    else:
+        status_class = 'status-error'
+    
+    values = {
+        'stylesheet': report_stylesheet_tag(style, asset_base),
+        'analysis_date': now.strftime('%B %d, %Y'),
+        'analysis_time': now.strftime('%I:%M %p'),
+        'before_file': str(before_file),
+        'after_file': str(after_file),
+        'boxes_scanned': str(before_boxes['total_1x1_boxes_scanned']),
+        'red_count': str(len(before_boxes['red_markups'])),
+        'green_count': str(len(after_boxes['green_confirmations'])),
+        'status_class': status_class,
+        'message': comparison['message'],
+        'total_red_comments': str(comparison['total_red_comments']),
+        'resolved_count': str(len(comparison['resolved_items'])),
+        'unresolved_count': str(len(comparison['unresolved_items'])),
+        'new_issue_count': str(len(comparison['new_issues'])),
+        'resolution_rate': str(comparison['resolution_rate']),
+        'red_rows': _red_markup_rows(before_boxes['red_markups']),
+        'green_rows': _green_confirmation_rows(after_boxes['green_confirmations']),
+        'resolved_rows': _resolved_rows(comparison['resolved_items']),
+        'unresolved_rows': _unresolved_rows(comparison['unresolved_items']),
+        'new_issues_section': _new_issues_section(comparison['new_issues']),
+        'before_dimensions': str(len(before_boxes['dimensions'])),
+        'after_dimensions': str(len(after_boxes['dimensions'])),
+        'dimensions_change': f"{len(after_boxes['dimensions']) - len(before_boxes['dimensions']):+d}",
+        'before_annotations': str(len(before_boxes['annotations'])),
+        'after_annotations': str(len(after_boxes['annotations'])),
+        'annotations_change': f"{len(after_boxes['annotations']) - len(before_boxes['annotations']):+d}",
+        'year': str(now.year),
+        'generated_at': now.strftime('%Y-%m-%d %H:%M:%S'),
+        'report_id': hashlib.md5(f"{before_file}{after_file}{now}".encode()).hexdigest()[:12].upper()
+    }
+    
+    return render_template_chunks(REPORT_TEMPLATE_PARTS, values, chunk_size)
+
+
+def generate_yolo_report_html(before_boxes, after_boxes, comparison, before_file, after_file, style='inline'):
+    """Generate comprehensive YOLO analysis HTML report"""
+    return ''.join(iter_yolo_report_html(before_boxes, after_boxes, comparison, before_file, after_file, style=style))
+
+
+def build_analysis_payload(before_boxes, after_boxes, comparison, report_filename):
+    """Summarise scan and comparison results into the /api/analyze JSON body"""
+    return {
+        'success': True,
+        'identical': False,
+        'yolo_analysis': {
+            'before': {
+                'total_1x1_boxes': before_boxes['total_1x1_boxes_scanned'],
+                'red_markups': len(before_boxes['red_markups']),
+                'dimensions': len(before_boxes['dimensions']),
+                'annotations': len(before_boxes['annotations'])
+            },
+            'after': {
+                'total_1x1_boxes': after_boxes['total_1x1_boxes_scanned'],
+                'green_confirmations': len(after_boxes['green_confirmations']),
+                'dimensions': len(after_boxes['dimensions']),
+                'annotations': len(after_boxes['annotations'])
+            },
+            'comparison': {
+                'status': comparison['status'],
+                'message': comparison['message'],
+                'total_comments': comparison['total_red_comments'],
+                'resolved': len(comparison['resolved_items']),
+                'unresolved': len(comparison['unresolved_items']),
+                'resolution_rate': comparison['resolution_rate']
+            },
+            'red_markups_list': before_boxes['red_markups'][:10],
+            'green_confirmations_list': after_boxes['green_confirmations'][:10],
+            'unresolved_items': comparison['unresolved_items']
+        },
+        'report_file': report_filename
+    }